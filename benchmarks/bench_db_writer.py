@@ -0,0 +1,135 @@
+"""
+Write latency seen by the caller, with two threads writing at once (clock + UI):
+- before: one shared check_same_thread=False connection, execute + commit on the caller
+- after:  db.Database, the caller only enqueues; the writer thread group-commits
+
+Both runs write the same rows; the row counts are checked afterwards, so a lost or
+interleaved write shows up as a mismatch.
+
+Run from the repo root:  python benchmarks/bench_db_writer.py [events] [ticks]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from db import Database
+from write_behind import PoolTimeWriteBehind
+
+EVENT_SQL = """
+    INSERT INTO events (match_id, match_code, player_id, event_type, quarter,
+                        time_remaining, timestamp, possession_team, ball_holder)
+    VALUES (1, 'bench', ?, 'Shot', 1, ?, ?, 'Home', ?)
+"""
+POOL_SQL = PoolTimeWriteBehind.POOL_UPSERT
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return (statistics.median(ordered) * 1000,
+            ordered[int(len(ordered) * 0.99) - 1] * 1000, ordered[-1] * 1000)
+
+
+def run_before(path, events, ticks):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    schema.configure_connection(conn)
+    schema.migrate(conn)
+    ui, clock, errors = [], [], []
+
+    def ui_thread():
+        for i in range(events):
+            start = time.perf_counter()
+            try:
+                conn.execute(EVENT_SQL, ("H-Player1", 480.0 - i % 480, time.time(), "H-Player1"))
+                conn.commit()
+            except sqlite3.Error as e:
+                errors.append(e)
+            ui.append(time.perf_counter() - start)
+
+    def clock_thread():
+        for t in range(ticks):
+            start = time.perf_counter()
+            try:
+                conn.executemany(POOL_SQL, [(1, f"H-Player{p}", 1, 0.1) for p in range(1, 8)])
+                conn.commit()
+            except sqlite3.Error as e:
+                errors.append(e)
+            clock.append(time.perf_counter() - start)
+
+    wall = run_threads(ui_thread, clock_thread)
+    counts = row_counts(conn)
+    conn.close()
+    return ui, clock, wall, counts, len(errors), None
+
+
+def run_after(path, events, ticks):
+    db = Database(path)
+    ui, clock = [], []
+
+    def ui_thread():
+        for i in range(events):
+            start = time.perf_counter()
+            db.execute(EVENT_SQL, ("H-Player1", 480.0 - i % 480, time.time(), "H-Player1"))
+            ui.append(time.perf_counter() - start)
+
+    def clock_thread():
+        for t in range(ticks):
+            start = time.perf_counter()
+            db.executemany(POOL_SQL, [(1, f"H-Player{p}", 1, 0.1) for p in range(1, 8)])
+            clock.append(time.perf_counter() - start)
+
+    wall = run_threads(ui_thread, clock_thread)
+    db.sync()
+    counts = row_counts(db.reader())
+    batches = db.batches
+    failures = db.failures
+    db.close()
+    return ui, clock, wall, counts, failures, batches
+
+
+def run_threads(*targets):
+    threads = [threading.Thread(target=t) for t in targets]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def row_counts(conn):
+    events = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    pool = conn.execute("SELECT COALESCE(SUM(pool_seconds), 0) FROM player_pool_time").fetchone()[0]
+    return events, round(pool, 3)
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    expected = (events, round(ticks * 7 * 0.1, 3))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            ("before", run_before(os.path.join(tmp, "before.db"), events, ticks)),
+            ("after", run_after(os.path.join(tmp, "after.db"), events, ticks)),
+        ]
+
+    print(f"{events} event writes (UI thread) + {ticks} pool upserts (clock thread), concurrently")
+    print(f"{'':7s} {'thread':6s} {'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s} {'wall s':>7s}  rows")
+    for label, (ui, clock, wall, counts, errors, batches) in results:
+        for name, samples in (("ui", ui), ("clock", clock)):
+            p50, p99, worst = percentiles(samples)
+            print(f"{label:7s} {name:6s} {p50:8.3f} {p99:8.3f} {worst:8.3f} {wall:7.2f}  "
+                  f"{'ok' if counts == expected else f'MISMATCH {counts} != {expected}'}")
+        extra = f", {batches} commits" if batches is not None else ""
+        print(f"{label:7s} errors: {errors}{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Merge time for a season scored on several devices (default 10 devices x 20 matches).
+Every device also carries a copy of its neighbour's first match to exercise de-duplication.
+
+Run from the repo root:  python benchmarks/bench_merge.py [devices] [matches_per_device] [events_per_match]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from merge import merge_databases
+from synthetic import populate_season
+
+
+def make_device_db(path, device, matches, events_per_match):
+    conn = sqlite3.connect(path)
+    schema.migrate(conn)
+    populate_season(conn, matches + 1, events_per_match, seed=device, code_prefix=f"dev{device}_")
+    # Codes are unique per device, except one copy of the next device's first match
+    conn.execute(
+        "UPDATE matches SET match_code = ? WHERE match_id = ?",
+        (f"dev{device + 1}_00001", matches + 1)
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    matches = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    events_per_match = int(sys.argv[3]) if len(sys.argv) > 3 else 600
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for d in range(devices):
+            path = os.path.join(tmp, f"device{d}.db")
+            make_device_db(path, d, matches, events_per_match)
+            paths.append(path)
+
+        conn = sqlite3.connect(os.path.join(tmp, "merged.db"))
+        schema.configure_connection(conn)
+        schema.migrate(conn)
+        start = time.perf_counter()
+        results = merge_databases(conn, paths)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        again = merge_databases(conn, paths)
+        remerge = time.perf_counter() - start
+        total_matches = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        total_events = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        conn.close()
+
+    imported = sum(c['matches'] for _, c in results)
+    skipped = sum(c['skipped'] for _, c in results)
+    print(f"{devices} devices x {matches + 1} matches x {events_per_match} events")
+    print(f"merge:    {elapsed:.2f} s  ({imported} matches imported, {skipped} duplicates skipped)")
+    print(f"re-merge: {remerge:.2f} s  ({sum(c['matches'] for _, c in again)} matches imported)")
+    print(f"result:   {total_matches} matches, {total_events} events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Full-season metric sheet (players and teams, per quarter) over a synthetic season:
+- before: every live event read once and folded with Counter / defaultdict loops
+- after:  metrics.season_sheets() on each available backend (array always, numpy when installed)
+- teams:  metrics.team_sheet(), what the season report uses
+All runs must agree on conversion, exclusion differential and saves per shot faced for every
+player and team, per quarter and for the season.
+
+Run from the repo root:  python benchmarks/bench_metrics.py [matches] [events_per_match]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+import schema
+from synthetic import populate_season
+
+
+def loop_sheet(conn):
+    """The same numbers the loop way: {(kind, key): {metric: [Q1..Q4, Season]}}."""
+    names = {m: (h, a) for m, h, a in conn.execute("SELECT match_id, home_team, away_team FROM matches")}
+    own = defaultdict(Counter)          # (kind, key) -> (event, column) -> n
+    side_attempts = defaultdict(Counter)  # (match, side) -> column -> n
+    played = defaultdict(set)           # player -> (match, opposing side)
+    for match_id, pid, event_type, quarter in conn.execute(
+        "SELECT match_id, player_id, event_type, quarter FROM events WHERE voided = 0"
+    ):
+        if not pid or pid[:2] not in ('H-', 'A-') or pid not in metrics.PLAYER_INDEX:
+            continue
+        side = 1 if pid.startswith('A-') else 0
+        for column in (quarter - 1, metrics.SEASON):
+            own[('player', pid)][(event_type, column)] += 1
+            own[('team', names[match_id][side])][(event_type, column)] += 1
+            if event_type in ('Goal', 'Shot'):
+                side_attempts[(match_id, side)][column] += 1
+        played[pid].add((match_id, 1 - side))
+
+    faced = defaultdict(Counter)
+    for pid, opposing in played.items():
+        for key in opposing:
+            faced[('player', pid)].update(side_attempts[key])
+    for (match_id, side), attempts in side_attempts.items():
+        faced[('team', names[match_id][1 - side])].update(attempts)
+
+    sheet = {}
+    for key, counts in own.items():
+        rows = defaultdict(list)
+        for c in range(len(metrics.COLUMNS)):
+            goals, shots = counts[('Goal', c)], counts[('Shot', c)]
+            rows['conversion'].append(metrics._ratio(goals, goals + shots))
+            rows['excl_diff'].append(counts[('Excl.Win', c)] - counts[('E.Lost', c)])
+            rows['save_rate'].append(metrics._ratio(counts[('Save', c)], faced[key][c]))
+        sheet[key] = rows
+    return sheet
+
+
+def sheet_values(player_sheet, team_sheet):
+    values = {}
+    for kind, sheet in (('player', player_sheet), ('team', team_sheet)):
+        for name in ('conversion', 'excl_diff', 'save_rate'):
+            for key, row in sheet.table(name).items():
+                values.setdefault((kind, key), {})[name] = row
+    return values
+
+
+def same(a, b):
+    if a.keys() != b.keys():
+        return False
+    return all(
+        abs(x - y) < 1e-9
+        for key in a for name in a[key] for x, y in zip(a[key][name], b[key][name])
+    )
+
+
+def timed(fn, samples):
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    backends = [metrics.ArrayBackend()]
+    if metrics.numpy is not None:
+        backends.append(metrics.NumpyBackend())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "season.db"))
+        schema.configure_connection(conn)
+        schema.migrate(conn)
+        populate_season(conn, matches, events)
+        before_s, expected = timed(lambda: loop_sheet(conn), 3)
+        results = []
+        for be in backends:
+            seconds, sheets = timed(lambda: metrics.season_sheets(conn, backend=be), 5)
+            results.append((be.name, seconds, same(sheet_values(*sheets), expected)))
+        _, (_, teams) = timed(lambda: metrics.season_sheets(conn), 1)
+        teams_s, teams_only = timed(lambda: metrics.team_sheet(conn), 5)
+        teams_ok = all(teams.table(name) == teams_only.table(name) for name in teams.planes)
+        conn.close()
+
+    print(f"{matches} matches x {events} events, full-season sheet (players + teams, per quarter)")
+    print(f"{'before':8s} {before_s * 1000:8.1f} ms")
+    for name, seconds, ok in results:
+        print(f"{name:8s} {seconds * 1000:8.1f} ms  {'ok' if ok else 'MISMATCH'}  "
+              f"({before_s / seconds:.1f}x)")
+    print(f"{'teams':8s} {teams_s * 1000:8.1f} ms  {'ok' if teams_ok else 'MISMATCH'}  "
+          f"(team sheet alone, as in the season report)")
+    if metrics.numpy is None:
+        print("numpy not installed: array backend only")
+
+
+if __name__ == "__main__":
+    main()
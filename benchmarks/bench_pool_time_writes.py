@@ -0,0 +1,112 @@
+"""
+Pool time / possession write cost per simulated match minute:
+- before: one correlated-subquery INSERT OR REPLACE per player per tick + commit every tick
+- after:  PoolTimeWriteBehind, one executemany upsert + commit per flush interval
+
+Run from the repo root:  python benchmarks/bench_pool_time_writes.py [minutes] [flush_interval]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from write_behind import PoolTimeWriteBehind
+
+IN_POOL = [f"H-Player{i}" for i in range(1, 8)] + [f"A-Player{i}" for i in range(1, 8)]
+
+
+def open_db(path):
+    conn = sqlite3.connect(path)
+    schema.configure_connection(conn)
+    schema.migrate(conn)
+    return conn
+
+
+def run_before(conn, ticks, match_id=1, quarter=1, dt=1.0):
+    writes = commits = 0
+    commit_time = 0.0
+    for t in range(ticks):
+        cur = conn.cursor()
+        for pid in IN_POOL:
+            cur.execute("""
+                INSERT OR REPLACE INTO player_pool_time
+                (match_id, player_id, quarter, pool_seconds, substitutions)
+                VALUES (
+                    ?, ?, ?,
+                    COALESCE(
+                        (SELECT pool_seconds FROM player_pool_time
+                         WHERE match_id=? AND player_id=? AND quarter=?),
+                        0
+                    ) + ?,
+                    COALESCE(
+                        (SELECT substitutions FROM player_pool_time
+                         WHERE match_id=? AND player_id=? AND quarter=?),
+                        0
+                    )
+                )
+            """, (match_id, pid, quarter, match_id, pid, quarter, dt,
+                  match_id, pid, quarter))
+            writes += 1
+        holder = IN_POOL[t % len(IN_POOL)]
+        cur.execute("""
+            INSERT OR REPLACE INTO player_possession
+            (match_id, player_id, quarter, possession_seconds)
+            VALUES (
+                ?, ?, ?,
+                COALESCE(
+                    (SELECT possession_seconds FROM player_possession
+                     WHERE match_id=? AND player_id=? AND quarter=?),
+                    0
+                ) + ?
+            )
+        """, (match_id, holder, quarter, match_id, holder, quarter, dt))
+        writes += 1
+        start = time.perf_counter()
+        conn.commit()
+        commit_time += time.perf_counter() - start
+        commits += 1
+    return writes, commits, commit_time
+
+
+def run_after(conn, ticks, flush_interval, match_id=1, quarter=1, dt=1.0):
+    # Simulated clock so the flush interval is measured in match seconds
+    fake_now = [0.0]
+    writer = PoolTimeWriteBehind(conn, flush_interval, time_source=lambda: fake_now[0])
+    commit_time = 0.0
+    for t in range(ticks):
+        fake_now[0] += dt
+        for pid in IN_POOL:
+            writer.add_pool_time(match_id, pid, quarter, dt)
+        writer.add_possession_time(match_id, IN_POOL[t % len(IN_POOL)], quarter, dt)
+        start = time.perf_counter()
+        writer.maybe_flush()
+        commit_time += time.perf_counter() - start
+    start = time.perf_counter()
+    writer.flush()
+    commit_time += time.perf_counter() - start
+    return writer.rows_written, writer.flush_count, commit_time
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 8.0
+    flush_interval = float(sys.argv[2]) if len(sys.argv) > 2 else 15.0
+    ticks = int(minutes * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = run_before(open_db(os.path.join(tmp, "before.db")), ticks)
+        after = run_after(open_db(os.path.join(tmp, "after.db")), ticks, flush_interval)
+
+    print(f"{minutes:g} simulated minutes, {len(IN_POOL)} players in pool, "
+          f"flush every {flush_interval:g}s")
+    print(f"{'':8s} {'writes/min':>11s} {'commits/min':>12s} {'commit ms total':>16s} {'ms/commit':>10s}")
+    for label, (writes, commits, commit_time) in (("before", before), ("after", after)):
+        print(f"{label:8s} {writes / minutes:11.1f} {commits / minutes:12.1f} "
+              f"{commit_time * 1000:16.1f} {commit_time * 1000 / max(commits, 1):10.2f}")
+
+
+if __name__ == "__main__":
+    main()
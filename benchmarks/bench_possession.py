@@ -0,0 +1,73 @@
+"""
+Possession chains over a synthetic season: possession.season_summary() streams every match's
+ball transfers and events through one SegmentBuilder.
+- time and rows/s for the whole season
+- Python peak memory (tracemalloc) for a small and a full season: streaming keeps it flat,
+  whereas fetchall() of the same rows grows with the season
+- per-row cost of the live builder (what set_ball_holder / log_event add per tap)
+
+Run from the repo root:  python benchmarks/bench_possession.py [matches] [events_per_match]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from possession import SegmentBuilder, build_segments, season_summary, stream_possession_rows
+from synthetic import populate_season
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "season.db"))
+        schema.configure_connection(conn)
+        schema.migrate(conn)
+        ids = populate_season(conn, matches, events)
+        rows = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM events) + (SELECT COUNT(*) FROM ball_transfers)"
+        ).fetchone()[0]
+
+        start = time.perf_counter()
+        summary = season_summary(conn)
+        season_s = time.perf_counter() - start
+        segments = sum(summary.possessions.values())
+
+        small = ids[:max(1, matches // 10)]
+        stream_small = peak_kib(lambda: season_summary(conn, small))
+        stream_full = peak_kib(lambda: season_summary(conn))
+        fetch_full = peak_kib(lambda: list(stream_possession_rows(conn)))
+
+        live_rows = list(stream_possession_rows(conn, ids[:1]))
+        start = time.perf_counter()
+        for _ in range(20):
+            for _ in build_segments(live_rows, builder=SegmentBuilder()):
+                pass
+        per_row_us = (time.perf_counter() - start) / (20 * len(live_rows)) * 1e6
+        conn.close()
+
+    print(f"{matches} matches x {events} events: {rows} event + transfer rows, {segments} possessions")
+    print(f"season pass: {season_s:.2f} s ({rows / season_s:,.0f} rows/s)")
+    print(f"peak Python memory: stream {len(small)} matches {stream_small:,.0f} KiB, "
+          f"stream {matches} matches {stream_full:,.0f} KiB, fetchall {fetch_full:,.0f} KiB")
+    print(f"live builder: {per_row_us:.2f} us per transfer / event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Replay cost for one large match (default 5,000 events plus substitutions).
+
+Run from the repo root:  python benchmarks/bench_replay.py [events] [runs]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from replay import replay_match
+from synthetic import populate_season
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    conn = sqlite3.connect(":memory:")
+    schema.migrate(conn)
+    populate_season(conn, 1, events)
+    n_events = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    n_subs = conn.execute("SELECT COUNT(*) FROM match_substitutions").fetchone()[0]
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        state = replay_match(conn, 1)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"{n_events} events + {n_subs} substitutions, {runs} runs")
+    print(f"replay p50 {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms")
+    print(f"score {state.score}, {len(state.critical_events)} critical events, "
+          f"{sum(sum(q.values()) for q in state.pool_time.values()):.0f} pool seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Match report counts at a break: full recount vs report_cache.ReportCache.
+- recount: the GROUP BY over every live event of the match (what each button press did)
+- hit:     unchanged match, one indexed version query
+- load:    not cached yet, read from match_player_event_counts (one row per player and type)
+- fold:    a few new events / an undo since the last report, only those rows are read
+Coaches flip between the report and breakdown of several matches, so presses cycle over
+`open` matches and the cache holds fewer entries than that when capacity < open.
+
+Run from the repo root:  python benchmarks/bench_report_cache.py [events_per_match] [open]
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from report_cache import ReportCache
+from synthetic import populate_season
+
+RECOUNT_SQL = """
+    SELECT player_id, event_type, COUNT(*) FROM events
+    WHERE match_id = ? AND voided = 0
+    GROUP BY player_id, event_type
+"""
+
+
+def timed(fn, samples):
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    open_matches = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = random.Random(5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "reports.db"))
+        schema.configure_connection(conn)
+        schema.migrate(conn)
+        ids = populate_season(conn, open_matches, events)
+        cache = ReportCache(capacity=open_matches)
+        cursor = [0]
+        fold_times = []
+
+        def next_match():
+            cursor[0] += 1
+            return ids[cursor[0] % len(ids)]
+
+        def add_rows():
+            # Five new events ...
+            match_id = next_match()
+            for _ in range(5):
+                conn.execute(
+                    "INSERT INTO events (match_id, player_id, event_type, quarter, time_remaining) "
+                    "VALUES (?, 'H-Player3', 'Shot', 4, 30.0)", (match_id,)
+                )
+            # ... and an undo of an older event
+            event_id = conn.execute(
+                "SELECT event_id FROM events WHERE match_id = ? AND voided = 0 LIMIT 1 OFFSET ?",
+                (match_id, rng.randint(0, 500))
+            ).fetchone()[0]
+            conn.execute("UPDATE events SET voided = 1 WHERE event_id = ?", (event_id,))
+            conn.execute(
+                "INSERT INTO event_journal (match_id, event_id, action) VALUES (?, ?, 'undo')",
+                (match_id, event_id)
+            )
+            conn.commit()
+            start = time.perf_counter()
+            cache.get(conn, match_id)
+            fold_times.append((time.perf_counter() - start) * 1000)
+
+        recount = timed(lambda: conn.execute(RECOUNT_SQL, (next_match(),)).fetchall(), 200)
+        load = timed(lambda: ReportCache().get(conn, next_match()), 200)
+        for match_id in ids:
+            cache.get(conn, match_id)
+        hit = timed(lambda: cache.get(conn, next_match()), 200)
+        for _ in range(100):
+            add_rows()
+        fold_times.sort()
+        fold = (statistics.median(fold_times), fold_times[int(len(fold_times) * 0.95) - 1])
+
+        # The folded counts must equal a recount
+        for match_id in ids:
+            expected = {(p, e): c for p, e, c in conn.execute(RECOUNT_SQL, (match_id,))}
+            assert cache.get(conn, match_id).counts == expected, match_id
+        conn.close()
+
+    print(f"{open_matches} open matches x {events} events")
+    print(f"{'':8s} {'p50 ms':>8s} {'p95 ms':>8s}")
+    for label, (p50, p95) in (("recount", recount), ("load", load), ("hit", hit), ("fold", fold)):
+        print(f"{label:8s} {p50:8.3f} {p95:8.3f}")
+    print(f"cache: {cache.hits} hits, {cache.folds} folds, {cache.loads} loads")
+
+
+if __name__ == "__main__":
+    main()
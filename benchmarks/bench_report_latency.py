@@ -0,0 +1,87 @@
+"""
+Report query latency on a synthetic season database (default 200 matches):
+- before: base tables only (schema version 1, no secondary indexes)
+- after:  fully migrated schema (covering indexes, WAL)
+
+Run from the repo root:  python benchmarks/bench_report_latency.py [matches] [events_per_match]
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schema
+from synthetic import populate_season
+
+REPORT_QUERIES = [
+    ("generate_report", """
+        SELECT player_id, event_type
+        FROM events
+        WHERE match_id=?
+    """),
+    ("show_player_breakdown", """
+        SELECT player_id, event_type, COUNT(*)
+        FROM events
+        WHERE match_id=? AND player_id NOT LIKE 'GAME'
+        GROUP BY player_id, event_type
+    """),
+    ("subs per player", """
+        SELECT player_id, quarter, COUNT(*)
+        FROM match_substitutions
+        WHERE match_id=?
+        GROUP BY player_id, quarter
+    """),
+]
+
+
+def time_reports(conn, matches, samples=200, seed=2):
+    rng = random.Random(seed)
+    results = {}
+    for label, sql in REPORT_QUERIES:
+        timings = []
+        for _ in range(samples):
+            match_id = rng.randint(1, matches)
+            start = time.perf_counter()
+            conn.execute(sql, (match_id,)).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[label] = (statistics.median(timings), timings[int(len(timings) * 0.95) - 1])
+    return results
+
+
+def main():
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    events_per_match = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "season.db")
+        conn = sqlite3.connect(path)
+        schema.migrate(conn, schema.MIGRATIONS[:1])
+        populate_season(conn, matches, events_per_match)
+        before = time_reports(conn, matches)
+
+        schema.configure_connection(conn)
+        schema.migrate(conn)
+        after = time_reports(conn, matches)
+
+        start = time.perf_counter()
+        applied = schema.migrate(conn)
+        startup_ms = (time.perf_counter() - start) * 1000
+        conn.close()
+
+    print(f"{matches} matches x {events_per_match} events")
+    print(f"{'query':24s} {'before p50':>11s} {'p95':>8s} {'after p50':>10s} {'p95':>8s}  (ms)")
+    for label, _ in REPORT_QUERIES:
+        b50, b95 = before[label]
+        a50, a95 = after[label]
+        print(f"{label:24s} {b50:11.3f} {b95:8.3f} {a50:10.3f} {a95:8.3f}")
+    print(f"startup migrate() on a current schema: {startup_ms:.3f} ms, applied {applied}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Several matches scored at once: N open sessions, every clock driven by the one scheduler.
+
+Stored synthetic matches are reloaded as sessions (load_match), all clocks are started on
+a simulated time source and the scheduler pass (_poll_clocks) is timed, with one player
+tap per match per game second and a switch of the match on screen every 10 s.
+
+Thread budget: however many matches are open, the app runs THREAD_BUDGET threads, the same
+as when scoring one match: the UI thread, the database writer (db.Database) and the shared
+match log worker (log_writer.LogWorker). The run fails if scoring starts any more.
+
+Run from the repo root (needs Kivy, no window required):
+    python benchmarks/bench_sessions.py [matches] [game_seconds]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_NO_FILELOG", "1")
+
+import schema  # noqa: E402
+from match_clock import ManualTimeSource  # noqa: E402
+from synthetic import populate_season  # noqa: E402
+
+THREAD_BUDGET = 3
+
+
+def main():
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, "db", "waterpolo.db")
+        os.makedirs(os.path.dirname(db_path))
+        conn = sqlite3.connect(db_path)
+        schema.migrate(conn)
+        ids = populate_season(conn, matches, 40)
+        conn.close()
+
+        import main as app
+        from kivy.clock import Clock
+
+        class BenchController(app.WaterPoloTrackerController):
+            def get_app_data_dir(self):
+                return Path(data_dir)
+
+        controller = BenchController(app.WaterPoloRoot())
+        threads_before = threading.active_count()
+        fake_time = ManualTimeSource()
+        for match_id in ids:
+            controller.load_match(match_id)
+            # The reload reaches the UI thread once the writer has caught up
+            controller.db.sync()
+            Clock.tick()
+            controller.match_clock.time_source = fake_time
+            controller.match_clock.reset()
+            controller.start_clock()
+
+        passes = []
+        for second in range(seconds):
+            if second % 10 == 0:
+                controller.switch_match(ids[(second // 10) % len(ids)])
+            for session in controller.sessions.values():
+                team = 'Home' if second % 2 else 'Away'
+                if session.in_pool[team]:
+                    session.ball_holder = sorted(session.in_pool[team])[0]
+            fake_time.advance(1.0)
+            start = time.perf_counter()
+            controller._poll_clocks()
+            passes.append((time.perf_counter() - start) * 1000)
+        threads = threading.active_count()
+        names = sorted(t.name for t in threading.enumerate())
+        controller.shutdown()
+
+    ordered = sorted(passes)
+    print(f"{matches} open matches, {seconds} game seconds, "
+          f"threads: {threads_before} idle / {threads} while scoring ({', '.join(names)})")
+    print(f"scheduler pass p50 {statistics.median(ordered):.3f} ms, "
+          f"p99 {ordered[int(len(ordered) * 0.99) - 1]:.3f} ms, max {ordered[-1]:.3f} ms")
+    if threads > THREAD_BUDGET:
+        print(f"FAIL {threads} threads while scoring, budget {THREAD_BUDGET}")
+        return 1
+    print(f"OK: {threads} threads for {matches} matches, budget {THREAD_BUDGET}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
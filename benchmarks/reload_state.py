@@ -0,0 +1,99 @@
+"""
+Regression check for reloading a match: pool time and the game position must survive.
+
+A headless controller plays one match on a simulated time source: a player is subbed in
+at Q1 8:00, scores at Q1 6:20, and play runs on through the end of Q1 to Q2 3:40 with no
+further rows. The match is then reloaded with load_match() and compared with the live
+state it replaced: every player's pool time per quarter, the quarter and the game clock.
+Exits non-zero on any mismatch.
+
+Run from the repo root (needs Kivy, no window required):
+    python benchmarks/reload_state.py
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_NO_FILELOG", "1")
+
+from match_clock import ManualTimeSource  # noqa: E402
+from players import TEAM_PLAYER_IDS  # noqa: E402
+
+TOLERANCE = 1e-6
+
+
+def play(controller, fake_time, seconds):
+    fake_time.advance(seconds)
+    controller.match_clock.poll()
+
+
+def snapshot(controller):
+    pool = {
+        pid: {q: round(secs, 6) for q, secs in quarters.items() if secs}
+        for pid, quarters in controller.pool_time.items()
+    }
+    return (
+        {pid: quarters for pid, quarters in pool.items() if quarters},
+        controller.current_quarter,
+        round(controller.match_clock.remaining, 6),
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as data_dir:
+        import main as app
+        from kivy.clock import Clock
+
+        class ReloadController(app.WaterPoloTrackerController):
+            def get_app_data_dir(self):
+                return Path(data_dir)
+
+        controller = ReloadController(app.WaterPoloRoot())
+        fake_time = ManualTimeSource()
+        controller.start_new_match('Home', 'Away')
+        match_id = controller.current_match_id
+        controller.match_clock.time_source = fake_time
+        player = TEAM_PLAYER_IDS['Home'][0]
+
+        controller.set_sub_mode("IN")
+        controller.handle_substitution(player, 'Home')     # Q1 8:00
+        controller.set_sub_mode(None)
+        controller.start_clock()
+        play(controller, fake_time, 100)                    # Q1 6:20
+        controller.log_event(player, 'Goal')
+        play(controller, fake_time, 380)                    # end of Q1, clock resets for Q2
+        controller.start_clock()
+        play(controller, fake_time, 260)                    # Q2 3:40
+        controller.pause_clock()
+        live = snapshot(controller)
+
+        controller.load_match(match_id)
+        # The reload reaches the UI thread once the writer has caught up
+        controller.db.sync()
+        Clock.tick()
+        reloaded = snapshot(controller)
+        controller.shutdown()
+
+    print(f"live:     pool {live[0]}, Q{live[1]} {live[2]:.1f} s left")
+    print(f"reloaded: pool {reloaded[0]}, Q{reloaded[1]} {reloaded[2]:.1f} s left")
+    failures = []
+    if live[0] != reloaded[0]:
+        failures.append("pool time differs after reload")
+    if live[1:] != reloaded[1:]:
+        failures.append("quarter / game clock differ after reload")
+    for f in failures:
+        print("FAIL " + f)
+    if failures:
+        return 1
+    print("OK: pool time, quarter and game clock survive a reload")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+Benchmark suite for the controller hot paths, driven headless through WaterPoloTrackerController.
+
+A synthetic season is written to a throwaway data dir, then one synthetic live match is
+played through the controller (taps, substitutions, clock ticks on a simulated time source,
+reports at every break). Each hot path is timed per call; percentiles and throughput are
+printed and written as JSON so runs can be compared over time.
+
+Run from the repo root (needs Kivy, no window required):
+    python benchmarks/run_suite.py [--season-matches 200] [--events 2000] [--out results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_NO_FILELOG", "1")
+
+from kivy.config import Config  # noqa: E402
+
+# Clock.tick() must not sleep to hold a frame rate while benchmarking
+Config.set('graphics', 'maxfps', '0')
+
+import schema  # noqa: E402
+from match_clock import ManualTimeSource  # noqa: E402
+from synthetic import generate_match, populate_season  # noqa: E402
+
+TIMED_OPS = [
+    'event_clicked', 'log_event', '_on_clock_tick', 'flush_pool_time',
+    'update_stats_display', 'update_possession_display', '_show_report', '_show_breakdown',
+]
+
+
+class Timings:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, name, fn):
+        samples = self.samples[name]
+        perf = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples.append(perf() - start)
+        return timed
+
+    def summary(self):
+        out = {}
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            n = len(ordered)
+            total = sum(ordered)
+            out[name] = {
+                'count': n,
+                'mean_ms': total / n * 1000,
+                'p50_ms': statistics.median(ordered) * 1000,
+                'p95_ms': ordered[min(n - 1, int(n * 0.95))] * 1000,
+                'p99_ms': ordered[min(n - 1, int(n * 0.99))] * 1000,
+                'max_ms': ordered[-1] * 1000,
+                'ops_per_sec': n / total if total else None,
+            }
+        return out
+
+
+def make_controller(data_dir):
+    import main
+    from kivy.clock import Clock
+    from kivy.uix.label import Label
+
+    class BenchController(main.WaterPoloTrackerController):
+        def get_app_data_dir(self):
+            return Path(data_dir)
+
+    controller = BenchController(main.WaterPoloRoot())
+    # The stats / pool time panes are optional in the UI; give them targets so rendering is measured
+    controller.stats_text = Label()
+    controller.possession_text = Label()
+    return controller, Clock
+
+
+def play_match(controller, clock, actions, timings, report_every):
+    fake_time = ManualTimeSource()
+    controller.match_clock.time_source = fake_time
+    for name in TIMED_OPS:
+        setattr(controller, name, timings.wrap(name, getattr(controller, name)))
+    controller.match_clock.on_tick = controller._on_clock_tick
+
+    def reports():
+        controller.generate_report()
+        controller.show_player_breakdown()
+
+    taps = 0
+    for action in actions:
+        kind = action[0]
+        if kind == 'clock':
+            if not controller.game_running:
+                controller.start_clock()
+            # The app's scheduler polls every 0.1 s; simulate one pass per game second
+            remaining = action[1]
+            while remaining > 0 and controller.game_running:
+                step = min(1.0, remaining)
+                fake_time.advance(step)
+                controller._poll_clocks()
+                remaining -= step
+        elif kind == 'quarter':
+            if action[1] > 1:
+                controller.pause_clock()
+                controller.current_quarter = action[1]
+                controller.match_clock.reset()
+                reports()
+        elif kind == 'ball':
+            controller.set_ball_holder(action[2], action[1])
+        elif kind == 'sub':
+            controller.set_sub_mode(action[3])
+            controller.set_ball_holder(action[2], action[1])
+        else:
+            name, team, idx = action[1], action[2], action[3]
+            controller.event_clicked(name)
+            if controller.pending_defensive_event:
+                controller.set_ball_holder(idx, team)
+            taps += 1
+            if taps % report_every == 0:
+                reports()
+        clock.tick()
+    controller.pause_clock()
+    reports()
+    # Reports open on the UI thread once the writer has caught up
+    controller.db.sync()
+    clock.tick()
+    controller.shutdown()
+    return taps
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controller hot-path benchmarks")
+    parser.add_argument("--season-matches", type=int, default=200)
+    parser.add_argument("--season-events", type=int, default=600)
+    parser.add_argument("--events", type=int, default=2000, help="events in the live match")
+    parser.add_argument("--report-every", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="JSON results path (default benchmarks/results/suite_<time>.json)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, "db", "waterpolo.db")
+        os.makedirs(os.path.dirname(db_path))
+        conn = sqlite3.connect(db_path)
+        schema.migrate(conn)
+        start = time.perf_counter()
+        populate_season(conn, args.season_matches, args.season_events, seed=args.seed)
+        season_s = time.perf_counter() - start
+        conn.close()
+
+        controller, clock = make_controller(data_dir)
+        controller.start_new_match("Synthetic Home", "Synthetic Away")
+        timings = Timings()
+        actions = list(generate_match(random.Random(args.seed), args.events))
+        start = time.perf_counter()
+        taps = play_match(controller, clock, actions, timings, args.report_every)
+        match_s = time.perf_counter() - start
+
+    results = {
+        'suite': 'controller_hot_paths',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': vars(args),
+        'season_populate_s': season_s,
+        'live_match': {'taps': taps, 'wall_s': match_s, 'taps_per_sec': taps / match_s},
+        'ops': timings.summary(),
+    }
+
+    out = args.out or os.path.join(
+        HERE, "results", f"suite_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"season: {args.season_matches} matches x {args.season_events} events, "
+          f"live match: {taps} taps in {match_s:.2f} s")
+    print(f"{'operation':26s} {'count':>6s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} "
+          f"{'max ms':>8s} {'ops/s':>9s}")
+    for name in TIMED_OPS:
+        r = results['ops'].get(name)
+        if r:
+            print(f"{name:26s} {r['count']:6d} {r['p50_ms']:8.3f} {r['p95_ms']:8.3f} "
+                  f"{r['p99_ms']:8.3f} {r['max_ms']:8.3f} {r['ops_per_sec'] or 0:9.0f}")
+    print(f"results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Stress test for the clock scheduler: hammers Go / Pause (and +2s / -2s) at random.
+
+A headless controller scores two open matches on a simulated time source while Kivy
+frames run in between. Any second ticker or stale loop would show up as game time or
+pool time counted twice, so the run checks, for each match:
+- game time consumed == simulated time that passed while its clock was running,
+- pool time of every player in the pool == that same running time,
+- Kivy never had more than one scheduler ticker queued, and stale calls never reached a clock.
+Exits non-zero on any mismatch.
+
+Run from the repo root (needs Kivy, no window required):
+    python benchmarks/stress_clock.py [operations] [seed]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_NO_FILELOG", "1")
+
+from kivy.config import Config  # noqa: E402
+
+Config.set('graphics', 'maxfps', '0')
+
+import schema  # noqa: E402
+from match_clock import ManualTimeSource  # noqa: E402
+from synthetic import populate_season  # noqa: E402
+
+TOLERANCE = 1e-6
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rng = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, "db", "waterpolo.db")
+        os.makedirs(os.path.dirname(db_path))
+        conn = sqlite3.connect(db_path)
+        schema.migrate(conn)
+        ids = populate_season(conn, 2, 20)
+        conn.close()
+
+        import main as app
+        from kivy.clock import Clock
+
+        class StressController(app.WaterPoloTrackerController):
+            def get_app_data_dir(self):
+                return Path(data_dir)
+
+        controller = StressController(app.WaterPoloRoot())
+        # Tick on every frame so the scheduler runs as often as the loop spins
+        controller.clock_scheduler.interval = 0
+        fake_time = ManualTimeSource()
+        played = {}         # simulated seconds each match's clock was running
+        adjusted = {}       # net +/-2 s corrections (clock moves, nobody plays)
+        pool_start = {}
+        for match_id in ids:
+            controller.load_match(match_id)
+            # The reload reaches the UI thread once the writer has caught up
+            controller.db.sync()
+            Clock.tick()
+            controller.match_clock.time_source = fake_time
+            # Very long quarters: the run measures accrual, not quarter changes
+            controller.match_clock.quarter_length = 1e5
+            controller.match_clock.reset()
+            played[match_id] = adjusted[match_id] = 0.0
+            pool_start[match_id] = {pid: sum(q.values()) for pid, q in controller.pool_time.items()}
+
+        max_live = live_tickers(Clock)
+        counts = {'go': 0, 'pause': 0, 'adjust': 0, 'switch': 0, 'frame': 0}
+        for _ in range(operations):
+            op = rng.random()
+            if op < 0.3:
+                controller.start_clock()
+                counts['go'] += 1
+            elif op < 0.55:
+                controller.pause_clock()
+                counts['pause'] += 1
+            elif op < 0.6:
+                # +/-2 s corrections change the clock, not the time consumed
+                seconds = rng.choice((2, -2))
+                controller.adjust_time(seconds)
+                adjusted[controller.current_match_id] += seconds
+                counts['adjust'] += 1
+            elif op < 0.65:
+                controller.switch_match(rng.choice(ids))
+                counts['switch'] += 1
+            else:
+                step = rng.uniform(0.0, 0.3)
+                for match_id, session in controller.sessions.items():
+                    if session.match_clock.running:
+                        played[match_id] += step
+                fake_time.advance(step)
+                Clock.tick()
+                counts['frame'] += 1
+            max_live = max(max_live, live_tickers(Clock))
+
+        for match_id in ids:
+            controller.switch_match(match_id)
+            controller.pause_clock()
+        scheduler = controller.clock_scheduler
+
+        failures = []
+        for match_id, session in controller.sessions.items():
+            consumed = session.match_clock.quarter_length - session.match_clock.remaining
+            expected = played[match_id] - adjusted[match_id]
+            if abs(consumed - expected) > TOLERANCE:
+                failures.append(f"match {match_id}: clock consumed {consumed:.6f} s, "
+                                f"expected {expected:.6f} s")
+            for pid in session.in_pool['Home'] | session.in_pool['Away']:
+                accrued = sum(session.pool_time[pid].values()) - pool_start[match_id].get(pid, 0.0)
+                if abs(accrued - played[match_id]) > TOLERANCE:
+                    failures.append(f"match {match_id} {pid}: pool {accrued:.6f} s, "
+                                    f"played {played[match_id]:.6f} s")
+        controller.shutdown()
+
+    print(f"{operations} operations: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+    print(f"scheduler runs {scheduler.runs}, stale calls {scheduler.stale_calls}, "
+          f"scheduled tickers at once <= {max_live}")
+    for f in failures:
+        print("FAIL " + f)
+    if max_live > 1:
+        print(f"FAIL {max_live} tickers were scheduled at the same time")
+        return 1
+    if failures:
+        return 1
+    print("OK: no double-counted game or pool time")
+    return 0
+
+
+def live_tickers(clock):
+    """Scheduled Kivy events that belong to a ClockScheduler run."""
+    return sum(
+        1 for event in clock.get_events()
+        if 'ClockScheduler' in getattr(event.get_callback(), '__qualname__', '')
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Synthetic matches and seasons for the benchmarks.
+
+generate_match() yields scorer actions in game order, with the event mix of the on-screen
+buttons (event_types.OFF_EVENTS / DEF_EVENTS / GAME_EVENTS), substitutions and quarter
+changes. It can drive the controller (run_suite.py) or be written straight to a database
+with populate_season(), which produces the same rows the app would have written.
+"""
+import os
+import random
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_types import DEF_EVENTS, DEFENSIVE, GAME_EVENTS, OFF_EVENTS, STOPPAGES
+from timeline import QUARTER_LENGTH
+
+# Relative frequency of each button over a match; anything not listed weighs 1
+EVENT_WEIGHTS = {
+    'Shot': 8, 'Goal': 4, 'Foul': 10, 'Drive': 5, 'Dump': 4, 'Excl.Win': 3, 'Reversal': 2,
+    'Block': 3, 'Save': 5, 'Intercept': 3, 'E.Lost': 3, 'Offside': 2,
+    'Red': 0.1, 'Yellow': 0.3, 'Wrap': 0.3, 'Pen.Win': 0.5, 'P.Lost': 0.5,
+    'Timeout': 0.5, 'Corner': 1, 'DropBall': 0.2, 'Ref_Chat': 0.2,
+}
+
+ALL_EVENTS = [name for _, name in OFF_EVENTS + DEF_EVENTS + GAME_EVENTS]
+EVENT_TYPES = sorted(set(ALL_EVENTS))
+_WEIGHTS = [EVENT_WEIGHTS.get(name, 1) for name in ALL_EVENTS]
+
+TEAMS = ('Home', 'Away')
+
+
+def player_id(team, idx):
+    return f"{'H' if team == 'Home' else 'A'}-Player{idx + 1}"
+
+
+def generate_match(rng, events=600, subs_per_quarter=6, quarter_length=QUARTER_LENGTH):
+    """
+    Yield actions in game order:
+        ('sub', team, idx, 'IN'|'OUT')   substitution (idx 0-13)
+        ('ball', team, idx)              ball to a player
+        ('event', name, team, idx)       button press; team/idx is the defender for DEFENSIVE
+                                         events and None for stoppages
+        ('clock', seconds)               game time running
+        ('quarter', q)                   quarter q starts
+    """
+    in_pool = {team: set(range(7)) for team in TEAMS}
+    for team in TEAMS:
+        for idx in sorted(in_pool[team]):
+            yield ('sub', team, idx, 'IN')
+
+    per_quarter = max(1, events // 4)
+    for quarter in range(1, 5):
+        yield ('quarter', quarter)
+        gap = quarter_length / (per_quarter + subs_per_quarter + 1)
+        sub_at = set(rng.sample(range(per_quarter), min(subs_per_quarter, per_quarter)))
+        attack = rng.choice(TEAMS)
+        yield ('ball', attack, rng.choice(sorted(in_pool[attack])))
+        for i in range(per_quarter):
+            yield ('clock', gap * rng.uniform(0.5, 1.5))
+            if i in sub_at:
+                team = rng.choice(TEAMS)
+                out_idx = rng.choice(sorted(in_pool[team]))
+                in_idx = rng.choice(sorted(set(range(14)) - in_pool[team]))
+                in_pool[team].discard(out_idx)
+                in_pool[team].add(in_idx)
+                yield ('sub', team, out_idx, 'OUT')
+                yield ('sub', team, in_idx, 'IN')
+
+            name = rng.choices(ALL_EVENTS, _WEIGHTS)[0]
+            if name in STOPPAGES:
+                yield ('event', name, None, None)
+            elif name in DEFENSIVE:
+                defender = 'Away' if attack == 'Home' else 'Home'
+                yield ('event', name, defender, rng.choice(sorted(in_pool[defender])))
+            else:
+                yield ('event', name, None, None)
+
+            # Possession changes hands after a score / turnover, otherwise a pass
+            if name in ('Goal', 'Save', 'Block', 'Intercept', 'Offside', 'Reversal') or rng.random() < 0.15:
+                attack = 'Away' if attack == 'Home' else 'Home'
+            yield ('ball', attack, rng.choice(sorted(in_pool[attack])))
+
+
+def match_rows(rng, match_id, match_code, events=600, start_ts=0.0):
+    """
+    Simulate one match; returns (event_rows, sub_rows, pool_rows, possession_rows,
+    transfer_rows) in table column order.
+    """
+    ev_rows, sub_rows, transfer_rows = [], [], []
+    pool = defaultdict(float)
+    possession = defaultdict(float)
+    in_pool = set()
+    quarter, remaining, ts = 1, QUARTER_LENGTH, start_ts
+    holder, holder_team = None, 'Home'
+
+    for action in generate_match(rng, events):
+        kind = action[0]
+        if kind == 'clock':
+            dt = min(action[1], remaining)
+            remaining -= dt
+            ts += dt
+            for pid in in_pool:
+                pool[(pid, quarter)] += dt
+            if holder:
+                possession[(holder, quarter)] += dt
+        elif kind == 'quarter':
+            quarter, remaining = action[1], QUARTER_LENGTH
+            ts += 120.0
+        elif kind == 'ball':
+            pid = player_id(action[1], action[2])
+            if pid != holder:
+                ts += 0.1
+                transfer_rows.append((match_id, quarter, remaining, pid, ts))
+            holder_team, holder = action[1], pid
+        elif kind == 'sub':
+            pid = player_id(action[1], action[2])
+            (in_pool.add if action[3] == 'IN' else in_pool.discard)(pid)
+            ts += 0.5
+            sub_rows.append((match_id, pid, quarter, remaining, action[3], ts))
+        else:
+            name, team, idx = action[1], action[2], action[3]
+            if name in STOPPAGES:
+                pid = 'GAME'
+            elif team is not None:
+                pid = player_id(team, idx)
+            else:
+                pid = holder
+            ts += 0.5
+            ev_rows.append((match_id, match_code, pid, name, quarter, remaining, ts,
+                            holder_team, holder))
+            if name == 'Goal' or name in STOPPAGES:
+                # As in the app: the ball is dead until the next player is picked
+                holder = None
+                transfer_rows.append((match_id, quarter, remaining, None, ts + 0.01))
+
+    pool_rows = [(match_id, pid, q, secs, 0) for (pid, q), secs in pool.items()]
+    possession_rows = [(match_id, pid, q, secs) for (pid, q), secs in possession.items()]
+    return ev_rows, sub_rows, pool_rows, possession_rows, transfer_rows
+
+
+def populate_season(conn, matches=200, events_per_match=600, seed=1, first_match_id=1,
+                    code_prefix="SYN", teams=("Loughborough", "Bath", "Bristol", "Cardiff", "Leeds")):
+    """Write a synthetic season; returns the match ids created."""
+    rng = random.Random(seed)
+    ids = []
+    # Databases at an older schema version (bench_report_latency's "before") have no transfers
+    has_transfers = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ball_transfers'"
+    ).fetchone() is not None
+    for n in range(matches):
+        match_id = first_match_id + n
+        code = f"{code_prefix}{match_id:05d}"
+        home, away = rng.sample(teams, 2)
+        date = f"2026-{1 + n * 12 // max(matches, 1):02d}-{1 + n % 28:02d} {10 + n % 8}:00"
+        conn.execute(
+            "INSERT INTO matches (match_id, match_code, date, home_team, away_team, final_score) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (match_id, code, date, home, away, "")
+        )
+        ev_rows, sub_rows, pool_rows, possession_rows, transfer_rows = match_rows(
+            rng, match_id, code, events_per_match, start_ts=1.7e9 + n * 86400.0
+        )
+        conn.executemany("""
+            INSERT INTO events
+            (match_id, match_code, player_id, event_type, quarter,
+             time_remaining, timestamp, possession_team, ball_holder)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, ev_rows)
+        conn.executemany("""
+            INSERT INTO match_substitutions
+            (match_id, player_id, quarter, time_remaining, action, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, sub_rows)
+        conn.executemany("""
+            INSERT INTO player_pool_time (match_id, player_id, quarter, pool_seconds, substitutions)
+            VALUES (?, ?, ?, ?, ?)
+        """, pool_rows)
+        conn.executemany("""
+            INSERT INTO player_possession (match_id, player_id, quarter, possession_seconds)
+            VALUES (?, ?, ?, ?)
+        """, possession_rows)
+        if has_transfers:
+            conn.executemany("""
+                INSERT INTO ball_transfers (match_id, quarter, time_remaining, player_id, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, transfer_rows)
+        ids.append(match_id)
+    conn.commit()
+    return ids
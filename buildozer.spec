@@ -4,6 +4,7 @@ package.name = waterpolo
 package.domain = org.waterpolo.tracker
 source.dir = .
 source.include_exts = py,png,jpg,kv
+source.exclude_dirs = benchmarks
 version = 0.1
 requirements = python3,kivy
 
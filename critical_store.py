@@ -0,0 +1,138 @@
+from array import array
+from collections import Counter
+
+from players import TEAM_OF, CriticalEvent
+
+
+class CriticalEventStore:
+    """
+    Columnar critical events log, grouped by quarter and kept in game order.
+    - One array per column (quarter, time remaining, player index, event code) plus the
+      display time strings; quarters are contiguous runs located by per-quarter offsets.
+    - add() appends in the common case; an event that arrives late for its quarter or game
+      time (clock corrections, replays) is inserted at its place, so readers never sort.
+    - rows(q) / counts(q) only touch quarter q's slice.
+    - ref is the events row id when known, so an undone event can be discard()ed.
+    """
+
+    def __init__(self, events=()):
+        self.clear()
+        for e in events:
+            self.add(e.quarter, e.time, e.player, e.event, e.time_str)
+
+    def clear(self):
+        self.quarter = array('i')
+        self.time = array('d')
+        self.player = array('i')
+        self.event = array('B')
+        self.ref = array('q')
+        self.time_str = []
+        self.event_names = []
+        self._event_codes = {}
+        self._quarters = []     # sorted quarter numbers present
+        self._offsets = []      # start index of each of those quarters
+
+    def __len__(self):
+        return len(self.time)
+
+    def __bool__(self):
+        return len(self.time) > 0
+
+    def _event_code(self, event_type):
+        code = self._event_codes.get(event_type)
+        if code is None:
+            code = self._event_codes[event_type] = len(self.event_names)
+            self.event_names.append(event_type)
+        return code
+
+    def bounds(self, quarter):
+        """(start, end) of quarter's slice; an empty range if it has no events."""
+        qs = self._quarters
+        for i, q in enumerate(qs):
+            if q == quarter:
+                end = self._offsets[i + 1] if i + 1 < len(qs) else len(self.time)
+                return self._offsets[i], end
+            if q > quarter:
+                return self._offsets[i], self._offsets[i]
+        return len(self.time), len(self.time)
+
+    def add(self, quarter, time_remaining, player, event_type, time_str, ref=0):
+        start, end = self.bounds(quarter)
+        if quarter not in self._quarters:
+            i = 0
+            while i < len(self._quarters) and self._quarters[i] < quarter:
+                i += 1
+            self._quarters.insert(i, quarter)
+            self._offsets.insert(i, start)
+
+        # Game order within the quarter = time remaining descending; equal times keep arrival order
+        pos = end
+        if end > start and self.time[end - 1] < time_remaining:
+            lo, hi = start, end - 1
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.time[mid] >= time_remaining:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            pos = lo
+
+        code = self._event_code(event_type)
+        if pos == len(self.time):
+            self.quarter.append(quarter)
+            self.time.append(time_remaining)
+            self.player.append(player)
+            self.event.append(code)
+            self.ref.append(ref)
+            self.time_str.append(time_str)
+        else:
+            self.quarter.insert(pos, quarter)
+            self.time.insert(pos, time_remaining)
+            self.player.insert(pos, player)
+            self.event.insert(pos, code)
+            self.ref.insert(pos, ref)
+            self.time_str.insert(pos, time_str)
+
+        self._shift_after(quarter, 1)
+        return pos
+
+    def discard(self, quarter, ref):
+        """Remove the event with row id ref from quarter's slice; returns whether it was there."""
+        start, end = self.bounds(quarter)
+        for pos in range(start, end):
+            if self.ref[pos] == ref:
+                break
+        else:
+            return False
+        for column in (self.quarter, self.time, self.player, self.event, self.ref, self.time_str):
+            del column[pos]
+        if end - start == 1:
+            i = self._quarters.index(quarter)
+            del self._quarters[i]
+            del self._offsets[i]
+        self._shift_after(quarter, -1)
+        return True
+
+    def _shift_after(self, quarter, delta):
+        for i, q in enumerate(self._quarters):
+            if q > quarter:
+                self._offsets[i] += delta
+
+    def record(self, i):
+        return CriticalEvent(
+            self.quarter[i], self.time[i], self.player[i],
+            self.event_names[self.event[i]], self.time_str[i]
+        )
+
+    def rows(self, quarter=None):
+        """CriticalEvent records in game order, for one quarter or the whole match."""
+        start, end = (0, len(self.time)) if quarter is None else self.bounds(quarter)
+        return [self.record(i) for i in range(start, end)]
+
+    def counts(self, quarter):
+        """(Counter of event types, Counter of teams) over one quarter."""
+        start, end = self.bounds(quarter)
+        names = self.event_names
+        events = Counter(names[c] for c in self.event[start:end])
+        teams = Counter(TEAM_OF[p] for p in self.player[start:end])
+        return events, teams
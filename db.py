@@ -0,0 +1,289 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import schema
+
+
+class WriteTicket:
+    """
+    Handle for one queued write: done once its batch is committed (or has failed).
+    on_done(ticket), if given, is called on the writer thread at that point.
+    Background reads (Database.read) use the same handle, done once the read has run.
+    """
+    __slots__ = ('fn', 'args', 'on_done', 'result', 'error', '_done')
+
+    def __init__(self, fn, args, on_done=None):
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until committed; returns the command's result or raises its error."""
+        if not self._done.wait(timeout):
+            raise TimeoutError("database write still queued")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class Database:
+    """
+    Single-writer access to waterpolo.db.
+    - One connection, owned by a dedicated writer thread, does every INSERT / UPDATE. It is
+      the app's one thread besides the UI and the match log worker, however many matches
+      are open (checked by benchmarks/bench_sessions.py); a reader thread joins them once
+      the first background read (read()) is queued.
+      Callers enqueue commands (execute / executemany / submit) and return at once; the
+      thread drains whatever is queued and commits the whole batch in one transaction.
+    - Each command runs inside its own SAVEPOINT, so one failing write is rolled back and
+      reported (on_error) without losing the rest of its batch.
+    - Reads use read-only connections, one per calling thread (reader()); WAL lets them
+      run while the writer commits. A read that must see queued writes runs after
+      after_writes(on_done), or for long reads (season sheets, exports) on the reader thread
+      via read(fn, on_done=...), so taps queued meanwhile still commit at once. The UI
+      thread never waits. sync() blocks until the queue is committed, for app pause /
+      shutdown and tools.
+    - on_batch(seconds, commands) is called after every batch, e.g. for commit latency.
+    - Row ids the UI needs straight away (events, matches) come from next_id(), counted in
+      memory from the table's MAX at startup, so logging an event never waits on the writer.
+    """
+
+    ID_COLUMNS = {'events': 'event_id', 'matches': 'match_id'}
+
+    def __init__(self, path, on_error=None, on_batch=None, name="db-writer"):
+        self.path = path
+        self.on_error = on_error
+        self.on_batch = on_batch
+
+        # Counters, read by benchmarks / diagnostics
+        self.commands = 0
+        self.batches = 0
+        self.failures = 0
+
+        # Schema first, on the caller's thread, so a broken database fails loudly at startup
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        schema.configure_connection(self.conn)
+        schema.migrate(self.conn)
+        self._ids = {
+            table: self.conn.execute(f"SELECT COALESCE(MAX({col}), 0) FROM {table}").fetchone()[0]
+            for table, col in self.ID_COLUMNS.items()
+        }
+        self._id_lock = threading.Lock()
+
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._reads = queue.Queue()
+        self._read_thread = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # ------------ Writes ------------
+
+    def submit(self, fn, *args, on_done=None):
+        """
+        Queue fn(conn, *args) to run on the writer thread. Returns its WriteTicket;
+        on_done(ticket) is called on the writer thread once the batch is committed.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("database is closed")
+        ticket = WriteTicket(fn, args, on_done)
+        self._queue.put(ticket)
+        return ticket
+
+    def execute(self, sql, params=()):
+        return self.submit(_execute, sql, params)
+
+    def executemany(self, sql, rows):
+        return self.submit(_executemany, sql, list(rows))
+
+    def call(self, fn, *args, timeout=None):
+        """Run fn(conn, *args) on the writer thread and wait for it (user actions, not taps)."""
+        return self.submit(fn, *args).wait(timeout)
+
+    def after_writes(self, on_done):
+        """Call on_done(ticket) on the writer thread once everything queued so far is committed."""
+        return self.submit(_noop, on_done=on_done)
+
+    def sync(self, timeout=None):
+        """Wait until everything queued so far is committed and every read queued so far has run."""
+        if not self._closed:
+            self.submit(_noop).wait(timeout)
+            if self._read_thread is not None:
+                # Reads released by that batch are already on the reader's queue
+                ticket = WriteTicket(_noop, ())
+                self._reads.put(ticket)
+                ticket.wait(timeout)
+
+    def next_id(self, table):
+        with self._id_lock:
+            self._ids[table] += 1
+            return self._ids[table]
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # ------------ Reads ------------
+
+    def reader(self):
+        """This thread's read-only connection (opened on first use)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = Path(os.path.abspath(self.path)).as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def read(self, fn, *args, on_done=None):
+        """
+        Run fn(reader, *args) on the reader thread once every write queued so far is
+        committed; reader is that thread's read-only connection, held in one read
+        transaction so fn sees a single snapshot. Returns its WriteTicket; on_done(ticket)
+        is called on the reader thread after fn.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("database is closed")
+        with self._readers_lock:
+            if self._read_thread is None:
+                self._read_thread = threading.Thread(
+                    target=self._run_reads, name="db-reader", daemon=True
+                )
+                self._read_thread.start()
+        ticket = WriteTicket(fn, args, on_done)
+        self.after_writes(lambda _: self._reads.put(ticket))
+        return ticket
+
+    def _run_reads(self):
+        conn = self.reader()
+        while True:
+            ticket = self._reads.get()
+            if ticket is None:
+                break
+            try:
+                conn.execute("BEGIN")
+                try:
+                    ticket.result = ticket.fn(conn, *ticket.args)
+                finally:
+                    conn.commit()
+            except Exception as e:
+                ticket.error = e
+                self._report(e, ticket)
+            if ticket.on_done:
+                try:
+                    ticket.on_done(ticket)
+                except Exception as e:
+                    self._report(e, ticket)
+            ticket._done.set()
+
+    # ------------ Lifecycle ------------
+
+    def close(self, timeout=10.0):
+        """Commit whatever is queued, stop the writer and close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        # After the writer: reads it released while draining still run
+        if self._read_thread is not None:
+            self._reads.put(None)
+            self._read_thread.join(timeout)
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            del self._readers[:]
+        if not self._thread.is_alive():
+            self.conn.close()
+
+    def _run(self):
+        conn = self.conn
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            batch = [t for t in batch if t is not None]
+            if batch:
+                self._write_batch(conn, batch)
+
+    def _write_batch(self, conn, batch):
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN")
+            for ticket in batch:
+                # A command may commit by itself (e.g. merge_database); start again
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                conn.execute("SAVEPOINT cmd")
+                try:
+                    ticket.result = ticket.fn(conn, *ticket.args)
+                except Exception as e:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK TO cmd")
+                        conn.execute("RELEASE cmd")
+                    ticket.error = e
+                    self._report(e, ticket)
+                else:
+                    if conn.in_transaction:
+                        conn.execute("RELEASE cmd")
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+        except Exception as e:
+            # The commit itself failed (disk full, I/O error): nothing in the batch landed
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for ticket in batch:
+                if ticket.error is None:
+                    ticket.error = e
+            self._report(e, batch[0])
+        self.commands += len(batch)
+        self.batches += 1
+        for ticket in batch:
+            # In queue order, so a later ticket's waiter sees every earlier callback done
+            if ticket.on_done:
+                try:
+                    ticket.on_done(ticket)
+                except Exception as e:
+                    self._report(e, ticket)
+            ticket._done.set()
+        if self.on_batch:
+            self.on_batch(time.perf_counter() - start, len(batch))
+
+    def _report(self, error, ticket):
+        self.failures += 1
+        if self.on_error:
+            try:
+                self.on_error(error, ticket)
+            except Exception:
+                pass
+
+
+def _execute(conn, sql, params):
+    return conn.execute(sql, params).lastrowid
+
+
+def _executemany(conn, sql, rows):
+    return conn.executemany(sql, rows).rowcount
+
+
+def _noop(conn):
+    return None
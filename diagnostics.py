@@ -0,0 +1,114 @@
+import functools
+import json
+import time
+from bisect import bisect_left
+
+# Upper bucket edges in milliseconds; the last bucket catches everything slower
+BUCKET_EDGES_MS = [
+    0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000
+]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram: O(log buckets) record(), percentiles are bucket upper bounds."""
+
+    def __init__(self, edges_ms=BUCKET_EDGES_MS):
+        self.edges = [e / 1000.0 for e in edges_ms]
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_left(self.edges, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        target = p / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self.edges[i], self.max) if i < len(self.edges) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={e * 1000:g}" for e in self.edges] + [f">{self.edges[-1] * 1000:g}"]
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': self.max * 1000,
+            'buckets_ms': {label: c for label, c in zip(labels, self.counts) if c},
+        }
+
+
+class Diagnostics:
+    """
+    Opt-in hot-path latency recording.
+    - record() is a no-op while disabled; the timed() decorator costs one attribute check then.
+    - Metrics: tap_to_log, log_event, db_commit, pool_flush, clock_tick, ui_refresh.
+      db_commit is one writer-thread batch (see db.Database), not time spent on the UI thread.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.started = time.time()
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = LatencyHistogram()
+        hist.record(seconds)
+
+    def reset(self):
+        self.histograms = {}
+        self.started = time.time()
+
+    def report_lines(self):
+        if not self.histograms:
+            return ["No samples yet." if self.enabled else "Diagnostics are off."]
+        lines = [f"{'metric':12s} {'count':>6s} {'p50':>7s} {'p95':>7s} {'p99':>7s} {'max':>8s}  (ms)"]
+        for name in sorted(self.histograms):
+            d = self.histograms[name].to_dict()
+            lines.append(
+                f"{name:12s} {d['count']:6d} {d['p50_ms']:7.2f} {d['p95_ms']:7.2f} "
+                f"{d['p99_ms']:7.2f} {d['max_ms']:8.2f}"
+            )
+        return lines
+
+    def write(self, path, **meta):
+        data = dict(meta)
+        data['started'] = self.started
+        data['written'] = time.time()
+        data['metrics'] = {name: h.to_dict() for name, h in self.histograms.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+def timed(metric):
+    """Method decorator: record the call's latency in self.diagnostics under metric."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            diag = self.diagnostics
+            if not diag.enabled:
+                return fn(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                diag.record(metric, time.perf_counter() - start)
+        return wrapper
+    return decorator
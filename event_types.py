@@ -0,0 +1,34 @@
+# Event buttons as (label, event name), in on-screen order
+OFF_EVENTS = [
+    ('Goal', 'Goal'), ('Shot', 'Shot'), ('Pen', 'Pen.Win'), ('Excl', 'Excl.Win'),
+    ('Dump', 'Dump'), ('Foul', 'Foul'), ('Reversal', 'Reversal'), ('Drive', 'Drive')
+]
+DEF_EVENTS = [
+    ('Block', 'Block'), ('Save', 'Save'), ('P.Lost', 'P.Lost'), ('E.Lost', 'E.Lost'),
+    ('Steal', 'Intercept'), ('Red C', 'Red'), ('Yel C', 'Yellow'), ('Wrap', 'Wrap'),
+    ('2 Metres', 'Offside')
+]
+GAME_EVENTS = [
+    ('Timeout', 'Timeout'), ('Corner', 'Corner'), ('Drop Ball', 'DropBall'), ('Referee Chat', 'Ref_Chat')
+]
+
+# Events credited to a defender picked after the button press
+DEFENSIVE = frozenset({
+    'Block', 'Save', 'P.Lost', 'E.Lost',
+    'Intercept', 'Red', 'Yellow', 'Wrap', 'Offside', 'Drive'
+})
+
+# Stoppages logged against "GAME" rather than a player
+STOPPAGES = frozenset({'Corner', 'DropBall', 'Ref_Chat'})
+
+AUTO_PAUSE = frozenset({
+    'Goal', 'Foul', 'Pen.Win', 'P.Lost', 'E.Lost', 'Red',
+    'Yellow', 'Wrap', 'Excl.Win', 'Reversal', 'Timeout', 'Offside'
+})
+
+CRITICAL_EVENTS = frozenset({
+    'Goal', 'P.Lost', 'E.Lost', 'Yellow', 'Red', 'Wrap', 'Timeout'
+})
+
+# Events by the team in possession that end its possession (a change of team ends it too)
+POSSESSION_ENDS = frozenset({'Goal', 'Shot', 'Foul', 'Reversal'})
@@ -0,0 +1,187 @@
+"""
+Streaming bulk export of match data to CSV / JSONL.
+
+Rows are pulled from SQLite with fetchmany() and written as they arrive, so memory use
+does not depend on how many matches are exported. Filters (team, date range, match ids,
+event types) become WHERE clauses rather than Python-side checks. The database is only
+read, never migrated: columns added by later migrations are checked before they are used,
+and tables it predates (e.g. ball_transfers) are skipped and reported.
+Each file is written under a temporary name and renamed once complete.
+
+    python export.py waterpolo.db out_dir --format jsonl --team Loughborough --from 2026-01-01
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+
+# table -> (columns, ORDER BY); every table is joined to matches for match-level filters
+TABLES = {
+    'events': (
+        ["event_id", "match_id", "match_code", "player_id", "event_type", "quarter",
+         "time_remaining", "timestamp", "possession_team", "ball_holder"],
+        "t.match_id, t.event_id",
+    ),
+    'match_substitutions': (
+        ["match_id", "player_id", "quarter", "time_remaining", "action", "timestamp"],
+        "t.match_id, t.rowid",
+    ),
+    'player_pool_time': (
+        ["match_id", "player_id", "quarter", "pool_seconds", "substitutions"],
+        "t.match_id, t.player_id, t.quarter",
+    ),
+    'player_possession': (
+        ["match_id", "player_id", "quarter", "possession_seconds"],
+        "t.match_id, t.player_id, t.quarter",
+    ),
+    'ball_transfers': (
+        ["match_id", "quarter", "time_remaining", "player_id", "timestamp"],
+        "t.match_id, t.transfer_id",
+    ),
+}
+
+FORMATS = ('csv', 'jsonl')
+
+
+def table_columns(conn, table):
+    """Column names of table in conn (empty if the database predates the table)."""
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def build_query(table, team=None, date_from=None, date_to=None, match_ids=None, event_types=None,
+                voided=True):
+    """
+    SELECT for one table with all filters in the WHERE clause. Returns (sql, params, columns).
+    voided: the events table has the tombstone column (databases from before the undo
+    journal do not, and have no undone events either).
+    """
+    columns, order_by = TABLES[table]
+    select_cols = [f"t.{c}" for c in columns]
+    if 'match_code' not in columns:
+        columns = columns + ["match_code"]
+        select_cols.append("m.match_code")
+
+    where, params = [], []
+    if team:
+        where.append("(m.home_team = ? OR m.away_team = ?)")
+        params += [team, team]
+    if date_from:
+        where.append("m.date >= ?")
+        params.append(date_from)
+    if date_to:
+        # Dates are 'YYYY-MM-DD HH:MM'; a bare date includes the whole day
+        if len(date_to) == 10:
+            where.append("m.date < date(?, '+1 day')")
+        else:
+            where.append("m.date <= ?")
+        params.append(date_to)
+    if match_ids:
+        where.append(f"t.match_id IN ({','.join('?' * len(match_ids))})")
+        params += list(match_ids)
+    if table == 'events' and voided:
+        # Undone events stay in the table as tombstones
+        where.append("t.voided = 0")
+    if event_types and table == 'events':
+        where.append(f"t.event_type IN ({','.join('?' * len(event_types))})")
+        params += list(event_types)
+
+    sql = (
+        f"SELECT {', '.join(select_cols)} FROM {table} t "
+        f"JOIN matches m ON m.match_id = t.match_id"
+    )
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order_by}"
+    return sql, params, columns
+
+
+def iter_rows(conn, table, batch_size=1000, **filters):
+    """Yield result tuples for table in batches of batch_size."""
+    voided = table == 'events' and 'voided' in table_columns(conn, table)
+    sql, params, _ = build_query(table, voided=voided, **filters)
+    cur = conn.execute(sql, params)
+    while True:
+        batch = cur.fetchmany(batch_size)
+        if not batch:
+            return
+        yield from batch
+
+
+def write_table(conn, table, fileobj, fmt='csv', batch_size=1000, **filters):
+    """Stream one table to an open text file. Returns the number of rows written."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    _, _, columns = build_query(table, **filters)
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(fileobj)
+        writer.writerow(columns)
+        for row in iter_rows(conn, table, batch_size, **filters):
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in iter_rows(conn, table, batch_size, **filters):
+            fileobj.write(json.dumps(dict(zip(columns, row))) + "\n")
+            count += 1
+    return count
+
+
+def export_matches(conn, out_dir, fmt='csv', tables=None, prefix="export", batch_size=1000, **filters):
+    """
+    Write one <prefix>_<table>.<fmt> file per table. Returns {path: rows}; tables missing
+    from the database get no file (see missing_tables()).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    skip = set(missing_tables(conn, tables))
+    for table in tables or TABLES:
+        if table in skip:
+            continue
+        path = os.path.join(out_dir, f"{prefix}_{table}.{fmt}")
+        # A failed export leaves no truncated file behind
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                rows = write_table(conn, table, f, fmt, batch_size, **filters)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        written[path] = rows
+    return written
+
+
+def missing_tables(conn, tables=None):
+    """The export tables (all, or tables) that the database predates."""
+    return [table for table in tables or TABLES if not table_columns(conn, table)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export waterpolo.db match data")
+    parser.add_argument("db")
+    parser.add_argument("out_dir")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--table", action="append", choices=list(TABLES), dest="tables")
+    parser.add_argument("--team")
+    parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+    parser.add_argument("--match", action="append", type=int, dest="match_ids")
+    parser.add_argument("--event", action="append", dest="event_types")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    written = export_matches(
+        conn, args.out_dir, args.format, args.tables,
+        team=args.team, date_from=args.date_from, date_to=args.date_to,
+        match_ids=args.match_ids, event_types=args.event_types,
+    )
+    for path, rows in written.items():
+        print(f"{rows:8d}  {path}")
+    for table in missing_tables(conn, args.tables):
+        print(f"skipped   {table} (not in this database)")
+
+
+if __name__ == "__main__":
+    main()
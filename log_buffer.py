@@ -0,0 +1,46 @@
+from collections import deque
+
+
+class LogRing:
+    """
+    Fixed-capacity log model for the on-screen log pane.
+    - append() is O(1) however long the match runs; the oldest line is evicted when full.
+    - Evicted lines are handed to on_spill(lines) in batches of spill_batch (and on flush_spill()),
+      so the pane stays small while nothing is lost from the on-disk log.
+    """
+
+    def __init__(self, capacity=200, on_spill=None, spill_batch=50):
+        self.capacity = capacity
+        self.on_spill = on_spill
+        self.spill_batch = spill_batch
+        self._lines = deque(maxlen=capacity)
+        self._spilled = []
+        self.total = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    def append(self, line):
+        """Add a line; returns the evicted line, or None while below capacity."""
+        evicted = None
+        if len(self._lines) == self.capacity:
+            evicted = self._lines[0]
+            self._spilled.append(evicted)
+            if len(self._spilled) >= self.spill_batch:
+                self.flush_spill()
+        self._lines.append(line)
+        self.total += 1
+        return evicted
+
+    def flush_spill(self):
+        spilled, self._spilled = self._spilled, []
+        if spilled and self.on_spill:
+            self.on_spill(spilled)
+        return len(spilled)
+
+    def clear(self):
+        self.flush_spill()
+        self._lines.clear()
@@ -0,0 +1,155 @@
+import os
+import queue
+import time
+from threading import Event, Lock, Thread
+
+
+class MatchLogWriter:
+    """
+    Background writer for the per-match text log.
+    - Owns one open file handle; write() only enqueues, so the UI thread never touches storage.
+    - Writers share one LogWorker thread (however many matches are being scored), which
+      drains the queue in batches and flushes each file according to its policy:
+        'event'     flush (and fsync) after every drained batch
+        'interval'  flush at most every interval_ms while there is unflushed data
+        'quarter'   flush only on flush() / close(), e.g. at the end of each quarter
+    """
+
+    PER_EVENT = 'event'
+    INTERVAL = 'interval'
+    PER_QUARTER = 'quarter'
+
+    def __init__(self, path, mode="a", header=None, policy=INTERVAL, interval_ms=500, fsync=True,
+                 worker=None):
+        if policy not in (self.PER_EVENT, self.INTERVAL, self.PER_QUARTER):
+            raise ValueError(f"Unknown flush policy: {policy}")
+        self.path = path
+        self.policy = policy
+        self.interval = interval_ms / 1000.0
+        self.fsync = fsync
+        self.lines_written = 0
+        self.syncs = 0
+
+        # Opened here so a bad path fails loudly on the caller's thread
+        self._file = open(path, mode, encoding="utf-8")
+        if header:
+            self._file.write(header)
+        self._worker = worker or shared_worker()
+        self._closed = False
+        self._done = Event()
+
+    def write(self, text):
+        if not self._closed:
+            self._worker.submit(self, text)
+
+    def flush(self, wait=False):
+        """Flush (and fsync) everything queued so far; wait=True blocks until it is on disk."""
+        if self._closed:
+            return
+        done = Event()
+        self._worker.submit(self, done)
+        if wait:
+            done.wait()
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._worker.submit(self, LogWorker.CLOSE)
+        self._done.wait(timeout)
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.syncs += 1
+
+
+class LogWorker:
+    """One daemon thread serving any number of MatchLogWriters; started on first use."""
+
+    CLOSE = object()
+
+    def __init__(self, name="match-log-writer"):
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self._thread = None
+
+    def submit(self, writer, item):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+        self._queue.put((writer, item))
+
+    def _next_deadline(self, dirty):
+        deadlines = [since + w.interval for w, since in dirty.items()
+                     if w.policy == MatchLogWriter.INTERVAL]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _run(self):
+        dirty = {}      # writer -> monotonic time of its first unflushed line
+        while True:
+            try:
+                item = self._queue.get(timeout=self._next_deadline(dirty))
+            except queue.Empty:
+                now = time.monotonic()
+                for writer, since in list(dirty.items()):
+                    if writer.policy == MatchLogWriter.INTERVAL and now - since >= writer.interval:
+                        writer._sync()
+                        del dirty[writer]
+                continue
+
+            # Drain whatever else is already queued into the same batch
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            closing = []
+            waiters = []
+            for writer, entry in batch:
+                if entry is self.CLOSE:
+                    closing.append(writer)
+                elif isinstance(entry, Event):
+                    waiters.append((writer, entry))
+                else:
+                    writer._file.write(entry)
+                    writer.lines_written += 1
+                    if writer not in dirty:
+                        dirty[writer] = time.monotonic()
+
+            now = time.monotonic()
+            flush_now = set(closing)
+            flush_now.update(w for w, _ in waiters)
+            for writer, since in list(dirty.items()):
+                due = writer.policy == MatchLogWriter.PER_EVENT or (
+                    writer.policy == MatchLogWriter.INTERVAL and now - since >= writer.interval
+                )
+                if due or writer in flush_now:
+                    writer._sync()
+                    del dirty[writer]
+            for _, done in waiters:
+                done.set()
+            for writer in closing:
+                writer._file.close()
+                writer._done.set()
+
+
+_shared = None
+_shared_lock = Lock()
+
+
+def shared_worker():
+    """The process-wide LogWorker used by writers created without one."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LogWorker()
+        return _shared
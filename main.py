@@ -1,1190 +1,1729 @@
-import sqlite3
-from collections import defaultdict, Counter
-import time
-from datetime import datetime
-from threading import Thread
-import os
-from pathlib import Path
-
-from kivy.app import App
-from kivy.clock import Clock
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.label import Label
-from kivy.uix.button import Button
-from kivy.uix.textinput import TextInput
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.popup import Popup
-from kivy.properties import ObjectProperty
-
-
-
-class WaterPoloRoot(BoxLayout):
-    controller = ObjectProperty(None)
-
-    def __init__(self, **kwargs):
-        super().__init__(orientation='vertical', **kwargs)
-
-
-class WaterPoloTrackerController:
-    def __init__(self, root_widget):
-        self.root_widget = root_widget
-
-        # Data dir
-        self.data_dir = self.get_app_data_dir()
-        self.db_path = os.path.join(self.data_dir, "db", "waterpolo.db")
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-
-        # DB & state
-        self.db_conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.setup_database()
-
-        self.stats = defaultdict(lambda: defaultdict(int))
-        self.current_match_id = None
-        self.current_match_code = None
-        self.game_running = False
-        self.auto_paused = False
-        self.time_remaining = 480.0
-        self.current_quarter = 1
-        self.possession_team = "Home"
-        self.ball_holder = None
-        self.pending_defensive_event = None
-        self.player_names = self.load_player_names()
-
-        self.home_score = 0
-        self.away_score = 0
-        self.critical_events = []
-        self.CRITICAL_EVENTS = {
-            'Goal', 'P.Lost', 'E.Lost', 'Yellow', 'Red', 'Wrap', 'Timeout'
-        }
-
-        self.clock_thread = None
-        self.play_btn = None
-        self.pause_btn = None
-        self.stats_text = None
-        self.log_text = None
-        self.ball_label = None
-        self.clock_display = None
-        self.score_display = None
-        self.possession_text = None
-        self.match_log_path = None
-        self.possession_time = defaultdict(lambda: defaultdict(float))
-        self.last_possession_tick = None
-
-        # Names control
-        self.names_required = True          # enforce before match
-        self.player_names_complete = False  # becomes True after saving 26
-
-        # Substitution / pool time
-        self.in_pool = {'Home': set(), 'Away': set()}
-        self.starting_lineup = {'Home': [], 'Away': []}
-        self.sub_events = []
-        self.pool_time = defaultdict(lambda: defaultdict(float))
-
-        # Player buttons
-        self.home_players = []
-        self.away_players = []
-
-        self.create_widgets()
-        self.update_clock_display()
-
-    # ---------------- DB / FS ----------------
-
-    def get_app_data_dir(self):
-        app_name = "WaterPoloTracker"
-        if os.name == 'nt':
-            appdata = os.getenv('APPDATA')
-            if appdata:
-                return Path(appdata) / app_name
-        if os.name == 'posix':
-            return Path.home() / ".local" / "share" / app_name
-        return Path.cwd() / app_name
-
-    def setup_database(self):
-        self.db_conn.executescript('''
-            CREATE TABLE IF NOT EXISTS matches (
-                match_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                match_code TEXT UNIQUE,
-                date TEXT, home_team TEXT, away_team TEXT, final_score TEXT
-            );
-            CREATE TABLE IF NOT EXISTS players (
-                player_id TEXT PRIMARY KEY,
-                number INTEGER,
-                name TEXT,
-                team TEXT
-            );
-            CREATE TABLE IF NOT EXISTS events (
-                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                match_id INTEGER, match_code TEXT,
-                player_id TEXT, event_type TEXT,
-                quarter INTEGER, time_remaining REAL,
-                timestamp REAL, possession_team TEXT, ball_holder TEXT
-            );
-            CREATE TABLE IF NOT EXISTS player_possession (
-                match_id INTEGER,
-                player_id TEXT,
-                quarter INTEGER,
-                possession_seconds REAL,
-                PRIMARY KEY (match_id, player_id, quarter)
-            );
-            CREATE TABLE IF NOT EXISTS player_pool_time (
-                match_id INTEGER,
-                player_id TEXT,
-                quarter INTEGER,
-                pool_seconds REAL,
-                substitutions INTEGER DEFAULT 0,
-                PRIMARY KEY (match_id, player_id, quarter)
-            );
-            CREATE TABLE IF NOT EXISTS match_substitutions (
-                match_id INTEGER,
-                player_id TEXT,
-                quarter INTEGER,
-                time_remaining REAL,
-                action TEXT,
-                timestamp REAL
-            );
-        ''')
-        self.db_conn.commit()
-
-    def load_player_names(self):
-        try:
-            cur = self.db_conn.cursor()
-            cur.execute("SELECT player_id, name FROM players")
-            rows = cur.fetchall()
-            return {pid: name for pid, name in rows}
-        except Exception:
-            return {}
-
-    # -------------- UI BUILD ----------------
-
-    def create_widgets(self):
-        root = self.root_widget
-        root.clear_widgets()
-
-        # Title
-        title_label = Label(
-            text="Water Polo Tracker v3.1",
-            size_hint_y=None,
-            height='40dp'
-        )
-        root.add_widget(title_label)
-
-        # Top bar - FIXED button sizes (total = 1.0)
-        top_bar = BoxLayout(orientation='horizontal', size_hint_y=None, height='60dp')
-        self.clock_display = Label(text="8:00 [] Q1", size_hint_x=0.18)  # was 0.20
-        self.score_display = Label(text="0-0", size_hint_x=0.10)
-
-        self.play_btn = Button(text="Go", size_hint_x=0.06,      # was 0.07
-                               on_press=lambda *_: self.start_clock())
-        self.pause_btn = Button(text="Pause", size_hint_x=0.06,     # was 0.07
-                                on_press=lambda *_: self.pause_clock(),
-                                disabled=True)
-        reset_btn = Button(text="Reset", size_hint_x=0.06,          # was 0.07
-                           on_press=lambda *_: self.reset_quarter())
-        plus_btn = Button(text="+2s", size_hint_x=0.06,          # was 0.07
-                          on_press=lambda *_: self.adjust_time(2))
-        minus_btn = Button(text="-2s", size_hint_x=0.06,         # was 0.07
-                           on_press=lambda *_: self.adjust_time(-2))
-        q_btn = Button(text="Q ^", size_hint_x=0.06,              # was 0.07
-                       on_press=lambda *_: self.next_quarter())
-        sub_in_btn = Button(text="Sub IN", size_hint_x=0.10,       # was 0.12, shortened text
-                            on_press=lambda *_: self.set_sub_mode("IN"))
-        sub_out_btn = Button(text="Sub OUT", size_hint_x=0.10,     # was 0.12, shortened text
-                             on_press=lambda *_: self.set_sub_mode("OUT"))
-
-        # ADD ALL BUTTONS IN ORDER
-        top_bar.add_widget(self.clock_display)
-        top_bar.add_widget(self.score_display)
-        top_bar.add_widget(self.play_btn)
-        top_bar.add_widget(self.pause_btn)
-        top_bar.add_widget(reset_btn)
-        top_bar.add_widget(plus_btn)
-        top_bar.add_widget(minus_btn)
-        top_bar.add_widget(q_btn)
-        top_bar.add_widget(sub_in_btn)
-        top_bar.add_widget(sub_out_btn)
-        root.add_widget(top_bar)
-
-                # Ball label - smaller
-        self.ball_label = Label(text=" No ball", size_hint_y=None, height='24dp')  # was 30dp
-        root.add_widget(self.ball_label)
-
-        # Players row - SMALLER buttons
-        players_row = BoxLayout(orientation='horizontal', size_hint_y=0.35)  # was 0.50
-
-        home_box = BoxLayout(orientation='vertical')
-        home_box.add_widget(Label(text=" Home", size_hint_y=None, height='20dp'))  # shorter label
-        home_grid = GridLayout(cols=7, size_hint_y=None, height='140dp')  # was 200dp
-        self.home_players = []
-        for i in range(14):
-            btn = Button(
-                text=f"P{i+1}",
-                background_color=(0.12, 0.53, 0.90, 1),
-                font_size='12sp',  # smaller font
-                on_press=lambda inst, idx=i: self.set_ball_holder(idx, "Home")
-            )
-            self.home_players.append(btn)
-            home_grid.add_widget(btn)
-        home_box.add_widget(home_grid)
-
-        away_box = BoxLayout(orientation='vertical')
-        away_box.add_widget(Label(text="Away", size_hint_y=None, height='20dp'))  # shorter label
-        away_grid = GridLayout(cols=7, size_hint_y=None, height='140dp')  # was 200dp
-        self.away_players = []
-        for i in range(14):
-            btn = Button(
-                text=f"O{i+1}",
-                background_color=(0.96, 0.49, 0.0, 1),
-                font_size='12sp',  # smaller font
-                on_press=lambda inst, idx=i: self.set_ball_holder(idx, "Away")
-            )
-            self.away_players.append(btn)
-            away_grid.add_widget(btn)
-        away_box.add_widget(away_grid)
-
-        players_row.add_widget(home_box)
-        players_row.add_widget(away_box)
-        root.add_widget(players_row)
-
-        # Events - normal size
-        events_box = BoxLayout(orientation='vertical', size_hint_y=0.22)  # was 0.18
-        events_box.add_widget(Label(text="Events", size_hint_y=None, height='20dp'))
-
-
-        off_grid = GridLayout(cols=8, size_hint_y=None, height='36dp')  # was 40dp
-        off_events = [
-            ('Goal', 'Goal'), ('Shot', 'Shot'), ('Pen', 'Pen.Win'), ('Excl', 'Excl.Win'),
-            ('Dump', 'Dump'), ('Foul', 'Foul'), ('Reversal', 'Reversal'), ('Drive', 'Drive')
-        ]
-        for label, name in off_events:
-            off_grid.add_widget(Button(
-                text=label,
-                background_color=(1, 0.8, 0.5, 1),
-                font_size=11,  # was 12
-                on_press=lambda inst, e=name: self.event_clicked(e)
-            ))
-        events_box.add_widget(off_grid)
-
-        def_grid = GridLayout(cols=9, size_hint_y=None, height='36dp')  # was 40dp
-        def_events = [
-            ('Block', 'Block'), ('Save', 'Save'), ('P.Lost', 'P.Lost'), ('E.Lost', 'E.Lost'),
-            ('Steal', 'Intercept'), ('Red C', 'Red'), ('Yel C', 'Yellow'), ('Wrap', 'Wrap'),
-            ('2 Metres', 'Offside')
-        ]
-        for label, name in def_events:
-            def_grid.add_widget(Button(
-                text=label,
-                background_color=(0.73, 0.86, 0.98, 1),
-                font_size=11,  # was 12
-                on_press=lambda inst, e=name: self.event_clicked(e)
-            ))
-        events_box.add_widget(def_grid)
-
-        game_grid = GridLayout(cols=4, size_hint_y=None, height='36dp')  # was 40dp
-        game_events = [
-            ('Timeout', 'Timeout'), ('Corner', 'Corner'), ('Drop Ball', 'DropBall'), ('Referee Chat', 'Ref_Chat')
-        ]
-        for label, name in game_events:
-            game_grid.add_widget(Button(
-                text=label,
-                background_color=(0.88, 0.75, 0.91, 1),
-                font_size=11,  # was 12
-                on_press=lambda inst, e=name: self.event_clicked(e)
-            ))
-        events_box.add_widget(game_grid)
-        root.add_widget(events_box)
-
-
-        # Actions row
-        action_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
-        crit_btn = Button(text="Critical Log", size_hint_x=0.2,
-                          on_press=lambda *_: self.show_critical_popup())
-        new_match_btn = Button(text="New Match", size_hint_x=0.2,
-                               on_press=lambda *_: self.new_match_dialog())
-        names_btn = Button(text="Names", size_hint_x=0.2,
-                           on_press=lambda *_: self.edit_names())
-        report_btn = Button(text="Report", size_hint_x=0.2,
-                            on_press=lambda *_: self.generate_report())
-        breakdown_btn = Button(text="Player Breakdown", size_hint_x=0.2,
-                               on_press=lambda *_: self.show_player_breakdown())
-        action_row.add_widget(crit_btn)
-        action_row.add_widget(new_match_btn)
-        action_row.add_widget(names_btn)
-        action_row.add_widget(report_btn)
-        action_row.add_widget(breakdown_btn)
-        root.add_widget(action_row)
-
-                # SMALLER LOG area
-        logs_box = BoxLayout(orientation='vertical', size_hint_y=0.12)  # explicit limit
-        logs_box.add_widget(Label(text="Logs", size_hint_y=None, height='20dp'))
-        
-        log_scroll = ScrollView()
-        self.log_text = TextInput(
-            readonly=True, 
-            multiline=True,
-            size_hint=(1, None),
-            height=400  # smaller initial height
-        )
-        log_scroll.add_widget(self.log_text)
-        logs_box.add_widget(log_scroll)
-        root.add_widget(logs_box)
-
-
-
-
-        # Sub mode state
-        self.sub_mode = None
-
-
-
-    # ------------ Utility ------------
-
-    def get_player_name(self, player_id):
-        if player_id is None:
-            return "No player"
-        if player_id in self.player_names:
-            return self.player_names[player_id]
-        if isinstance(player_id, str) and player_id.startswith('H-'):
-            num = player_id.replace('H-Player', '')
-            return f"Home #{num}"
-        if isinstance(player_id, str) and player_id.startswith('A-'):
-            num = player_id.replace('A-Player', '')
-            return f"Away #{num}"
-        return str(player_id)
-
-    def log_message(self, message):
-        if not self.log_text:
-            return
-        ts = datetime.now().strftime("%H:%M:%S")
-        self.log_text.text += f"[{ts}] {message}\n"
-        
-        # Auto-scroll to bottom - schedule after layout
-        def scroll_to_bottom(dt):
-            self.log_text.cursor_end = True
-        Clock.schedule_once(scroll_to_bottom, 0.1)
-
-    
-
-    # ------------ Clock / score ------------
-
-    def update_clock_display(self, *_):
-        mins = int(self.time_remaining // 60)
-        secs = int(self.time_remaining % 60)
-        if self.game_running:
-            status = ">"
-        elif self.auto_paused:
-            status = "||(auto)"
-        else:
-            status = "[]"
-        if self.clock_display:
-            self.clock_display.text = f"{mins}:{secs:02d} {status} Q{self.current_quarter}"
-
-    def reset_scores(self):
-        self.home_score = 0
-        self.away_score = 0
-        self.update_score_display()
-
-    def update_score_display(self):
-        if self.score_display:
-            self.score_display.text = f"{self.home_score}-{self.away_score}"
-
-    def start_clock(self):
-        if not self.current_match_id:
-            self.log_message("Create match first!")
-            return
-
-        self.auto_paused = False
-        self.game_running = True
-        if self.pause_btn:
-            self.pause_btn.disabled = False
-        if self.play_btn:
-            self.play_btn.disabled = True
-        self.log_message("Clock started/resumed")
-
-        def loop():
-            self.last_possession_tick = time.time()
-            while self.game_running and self.time_remaining > 0:
-                time.sleep(1)
-                if not self.game_running:
-                    break
-
-                now = time.time()
-                dt = now - self.last_possession_tick
-                self.last_possession_tick = now
-
-                cur = self.db_conn.cursor()
-                # Pool time
-                for team in ['Home', 'Away']:
-                    for pid in self.in_pool[team]:
-                        self.pool_time[pid][self.current_quarter] += dt
-                        cur.execute("""
-                            INSERT OR REPLACE INTO player_pool_time
-                            (match_id, player_id, quarter, pool_seconds, substitutions)
-                            VALUES (
-                                ?, ?, ?,
-                                COALESCE(
-                                    (SELECT pool_seconds FROM player_pool_time
-                                     WHERE match_id=? AND player_id=? AND quarter=?),
-                                    0
-                                ) + ?,
-                                COALESCE(
-                                    (SELECT substitutions FROM player_pool_time
-                                     WHERE match_id=? AND player_id=? AND quarter=?),
-                                    0
-                                )
-                            )
-                        """, (
-                            self.current_match_id, pid, self.current_quarter,
-                            self.current_match_id, pid, self.current_quarter, dt,
-                            self.current_match_id, pid, self.current_quarter
-                        ))
-
-                # Possession time
-                if self.ball_holder:
-                    self.possession_time[self.ball_holder][self.current_quarter] += dt
-                    cur.execute("""
-                        INSERT OR REPLACE INTO player_possession
-                        (match_id, player_id, quarter, possession_seconds)
-                        VALUES (
-                            ?, ?, ?,
-                            COALESCE(
-                                (SELECT possession_seconds FROM player_possession
-                                 WHERE match_id=? AND player_id=? AND quarter=?),
-                                0
-                            ) + ?
-                        )
-                    """, (
-                        self.current_match_id, self.ball_holder, self.current_quarter,
-                        self.current_match_id, self.ball_holder, self.current_quarter, dt
-                    ))
-
-                self.db_conn.commit()
-
-                self.time_remaining -= 1
-                Clock.schedule_once(self.update_clock_display)
-                Clock.schedule_once(self.update_possession_display)
-
-            if self.time_remaining <= 0:
-                self.time_remaining = 0
-                self.game_running = False
-                self.auto_paused = True
-                Clock.schedule_once(self.update_clock_display)
-                Clock.schedule_once(lambda dt: self.generate_quarter_report())
-                Clock.schedule_once(self._end_of_quarter_actions)
-
-        self.clock_thread = Thread(target=loop, daemon=True)
-        self.clock_thread.start()
-
-    def _end_of_quarter_actions(self, *_):
-        if self.pause_btn:
-            self.pause_btn.disabled = True
-        if self.play_btn:
-            self.play_btn.disabled = False
-        self.log_message(f" End of Q{self.current_quarter}")
-
-        if self.current_quarter < 4:
-            self.current_quarter += 1
-            self.time_remaining = 480
-            self.update_clock_display()
-            self.log_message(f"Ready for Q{self.current_quarter} (press play)")
-            for pid in self.pool_time:
-                if self.current_quarter not in self.pool_time[pid]:
-                    self.pool_time[pid][self.current_quarter] = 0.0
-        else:
-            if self.clock_display:
-                self.clock_display.text = "MATCH FINISHED"
-            self.log_message("Match finished")
-
-    def pause_clock(self):
-        self.game_running = False
-        self.auto_paused = False
-        if self.pause_btn:
-            self.pause_btn.disabled = True
-        if self.play_btn:
-            self.play_btn.disabled = False
-        self.update_clock_display()
-        self.log_message(" || Manual pause")
-
-    def reset_quarter(self):
-        self.game_running = False
-        self.auto_paused = False
-        self.time_remaining = 480
-        self.current_quarter = 1
-        if self.pause_btn:
-            self.pause_btn.disabled = True
-        if self.play_btn:
-            self.play_btn.disabled = False
-        self.update_clock_display()
-
-    def adjust_time(self, seconds):
-        self.time_remaining = max(0, self.time_remaining + seconds)
-        self.game_running = False
-        self.auto_paused = False
-        if self.pause_btn:
-            self.pause_btn.disabled = True
-        if self.play_btn:
-            self.play_btn.disabled = False
-        self.update_clock_display()
-        self.log_message(
-            f"Time adjusted: {seconds:+d}s → "
-            f"{int(self.time_remaining//60)}:{int(self.time_remaining%60):02d}"
-        )
-
-    def next_quarter(self):
-        if self.current_quarter < 4:
-            self.current_quarter += 1
-        else:
-            self.current_quarter = 1
-
-        cur = self.db_conn.cursor()
-        all_players = set(self.starting_lineup['Home'] + self.starting_lineup['Away'])
-        for pid in all_players:
-            cur.execute(
-                "INSERT OR IGNORE INTO player_pool_time "
-                "(match_id, player_id, quarter, pool_seconds, substitutions) "
-                "VALUES (?, ?, ?, ?, ?)",
-                (self.current_match_id, pid, self.current_quarter, 0.0, 0)
-            )
-            cur.execute(
-                "INSERT OR IGNORE INTO player_possession "
-                "(match_id, player_id, quarter, possession_seconds) "
-                "VALUES (?, ?, ?, ?)",
-                (self.current_match_id, pid, self.current_quarter, 0.0)
-            )
-        self.db_conn.commit()
-
-        self.game_running = False
-        self.auto_paused = False
-        if self.pause_btn:
-            self.pause_btn.disabled = True
-        if self.play_btn:
-            self.play_btn.disabled = False
-        self.update_clock_display()
-        self.log_message(f"Quarter → Q{self.current_quarter}")
-
-    # ------------ Ball, subs, possession ------------
-
-    def set_ball_holder(self, idx, team):
-        player_id = f"{'H' if team == 'Home' else 'A'}-Player{idx+1}"
-
-        if self.sub_mode:
-            self.handle_substitution(player_id, team)
-            return
-
-        if self.pending_defensive_event:
-            self.log_event(player_id, self.pending_defensive_event)
-            self.log_message(
-                f"DEF {self.get_player_name(player_id)} - "
-                f"{self.pending_defensive_event} (Def) Q{self.current_quarter}"
-            )
-            self.update_stats_display()
-            self.pending_defensive_event = None
-            if self.ball_label:
-                self.ball_label.text = "No ball"
-            return
-
-        self.ball_holder = player_id
-        self.possession_team = team
-        if self.ball_label:
-            self.ball_label.text = f"{self.get_player_name(player_id)}"
-        self.log_message(f"Ball → {self.get_player_name(player_id)}")
-
-    def set_sub_mode(self, mode):
-        self.sub_mode = mode
-        if not self.ball_label:
-            return
-        if mode == "IN":
-            self.ball_label.text = "Click player to SUB IN"
-        else:
-            self.ball_label.text = "Click player to SUB OUT"
-
-    def log_sub_event(self, player_id, action):
-        data = {
-            'player': player_id,
-            'quarter': self.current_quarter,
-            'time_remaining': self.time_remaining,
-            'action': action,
-            'timestamp': time.time()
-        }
-        self.sub_events.append(data)
-        self.db_conn.execute("""
-            INSERT INTO match_substitutions
-            (match_id, player_id, quarter, time_remaining, action, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            self.current_match_id, player_id, self.current_quarter,
-            self.time_remaining, action, data['timestamp']
-        ))
-        self.db_conn.execute("""
-            UPDATE player_pool_time
-            SET substitutions = substitutions + 1
-            WHERE match_id = ? AND player_id = ? AND quarter = ?
-        """, (self.current_match_id, player_id, self.current_quarter))
-        self.db_conn.commit()
-
-    def handle_substitution(self, player_id, team):
-        if self.sub_mode == "IN":
-            if player_id in self.in_pool[team]:
-                self.log_message(f" {self.get_player_name(player_id)} already in pool")
-            else:
-                self.log_sub_event(player_id, "IN")
-                self.in_pool[team].add(player_id)
-                self.log_message(
-                    f" {self.get_player_name(player_id)} SUB IN (Q{self.current_quarter})"
-                )
-
-        elif self.sub_mode == "OUT":
-            if player_id not in self.in_pool[team]:
-                self.log_message(f" {self.get_player_name(player_id)} not in pool")
-            else:
-                self.log_sub_event(player_id, "OUT")
-                self.in_pool[team].remove(player_id)
-                if self.ball_holder == player_id:
-                    others = [p for p in self.in_pool[team] if p != player_id]
-                    if others:
-                        self.ball_holder = others[0]
-                        if self.ball_label:
-                            self.ball_label.text = f"Ball {self.get_player_name(self.ball_holder)}"
-                        self.log_message(
-                            f"> Ball auto-passed to {self.get_player_name(self.ball_holder)}"
-                        )
-                    else:
-                        self.ball_holder = None
-                        if self.ball_label:
-                            self.ball_label.text = "No ball"
-                        self.log_message("→ Ball cleared (no teammates)")
-
-        self.sub_mode = None
-        if self.ball_label:
-            if not self.ball_holder:
-                self.ball_label.text = "No ball"
-            else:
-                self.ball_label.text = f" {self.get_player_name(self.ball_holder)}"
-        self.update_player_visuals()
-        self.log_message(" Sub complete")
-
-    def update_player_visuals(self):
-        for i, btn in enumerate(self.home_players):
-            pid = f"H-Player{i+1}"
-            btn.background_color = (0.10, 0.46, 0.82, 1) if pid in self.in_pool['Home'] \
-                                   else (0.12, 0.53, 0.90, 1)
-        for i, btn in enumerate(self.away_players):
-            pid = f"A-Player{i+1}"
-            btn.background_color = (0.94, 0.42, 0.0, 1) if pid in self.in_pool['Away'] \
-                                   else (0.96, 0.49, 0.0, 1)
-
-    def update_possession_display(self, *_):
-        if not self.possession_text:
-            return
-        lines = [f"Pool Time Q{self.current_quarter}:"]
-        current = []
-        for pid, quarters in self.pool_time.items():
-            if self.current_quarter in quarters:
-                subs = sum(
-                    1 for s in self.sub_events
-                    if s['player'] == pid and s['quarter'] == self.current_quarter
-                )
-                current.append((pid, quarters[self.current_quarter], subs))
-        for pid, secs, subs in sorted(current, key=lambda x: x[1], reverse=True)[:8]:
-            mins, rem = divmod(int(secs), 60)
-            t = f"{mins}:{rem:02d}"
-            name = self.get_player_name(pid)[:10]
-            lines.append(f"{name:10s} {t:6s} ({subs} subs)")
-        self.possession_text.text = "\n".join(lines)
-
-    # ------------ Events & stats ------------
-
-    def log_critical_event(self, player_id, event_type):
-        mins, secs = divmod(int(self.time_remaining), 60)
-        time_str = f"{mins}:{secs:02d}"
-        self.critical_events.append({
-            'quarter': self.current_quarter,
-            'time': self.time_remaining,
-            'player': player_id,
-            'event': event_type,
-            'time_str': time_str
-        })
-
-    def show_critical_popup(self):
-        content = BoxLayout(orientation='vertical')
-        content.add_widget(Label(
-            text="Critical Events (Goals/P.Lost/E.Lost/Yellow/Red/Wrap/Timeout)",
-            size_hint_y=None, height='30dp'
-        ))
-        text = TextInput(readonly=True, multiline=True)
-        if self.critical_events:
-            evs = sorted(self.critical_events, key=lambda x: x['time'], reverse=True)
-            lines = [
-                f"Q{e['quarter']} {e['time_str']}\t| {self.get_player_name(e['player'])}\t| {e['event']}"
-                for e in evs
-            ]
-            text.text = "\n".join(lines)
-        else:
-            text.text = "No critical events recorded yet.\n"
-        content.add_widget(text)
-        btn = Button(text="Close", size_hint_y=None, height='40dp')
-        content.add_widget(btn)
-        popup = Popup(title=" Critical Events Log", content=content, size_hint=(0.9, 0.8))
-        btn.bind(on_press=popup.dismiss)
-        popup.open()
-
-    def event_clicked(self, event_name):
-        defensive = [
-            'Block', 'Save', 'P.Lost', 'E.Lost',
-            'Intercept', 'Red', 'Yellow', 'Wrap', 'Offside', 'Drive'
-        ]
-        if event_name in defensive:
-            self.pending_defensive_event = event_name
-            if self.ball_label:
-                self.ball_label.text = f" Select defender for {event_name}"
-            self.log_message(f" Waiting for defender... ({event_name})")
-            return
-
-        game_events = ['Corner', 'DropBall', 'Ref_Chat']
-        if event_name in game_events:
-            self.log_event("GAME", event_name)
-            self.game_running = False
-            self.auto_paused = True
-            if self.pause_btn:
-                self.pause_btn.disabled = True
-            if self.play_btn:
-                self.play_btn.disabled = False
-            self.ball_holder = None
-            if self.ball_label:
-                self.ball_label.text = " No ball"
-            self.update_clock_display()
-            self.log_message(f" || Auto-paused: {event_name}")
-            self.update_stats_display()
-            return
-
-        if not self.ball_holder:
-            self.log_message("X Select player first!")
-            return
-
-        pid = self.ball_holder
-        self.log_event(pid, event_name)
-
-        auto_pause = [
-            'Goal', 'Foul', 'Pen.Win', 'P.Lost', 'E.Lost', 'Red',
-            'Yellow', 'Wrap', 'Excl.Win', 'Reversal', 'Timeout', 'Offside'
-        ]
-        if event_name in auto_pause and self.game_running:
-            self.game_running = False
-            self.auto_paused = True
-            if self.pause_btn:
-                self.pause_btn.disabled = True
-            if self.play_btn:
-                self.play_btn.disabled = False
-            self.update_clock_display()
-            self.log_message(f" || Auto-pause: {event_name}")
-
-        if event_name == 'Goal':
-            self.ball_holder = None
-            if self.ball_label:
-                self.ball_label.text = " No ball"
-
-        self.log_message(
-            f" {self.get_player_name(pid)} - {event_name} (Q{self.current_quarter})"
-        )
-        self.update_stats_display()
-
-    def log_event(self, player_id, event_type):
-        self.stats[player_id][event_type] += 1
-
-        if event_type == 'Goal':
-            if isinstance(player_id, str) and player_id.startswith('H-'):
-                self.home_score += 1
-            elif isinstance(player_id, str):
-                self.away_score += 1
-            Clock.schedule_once(lambda dt: self.update_score_display())
-
-        if event_type in self.CRITICAL_EVENTS:
-            Clock.schedule_once(lambda dt: self.log_critical_event(player_id, event_type))
-
-        match_code = getattr(self, 'current_match_code', '')
-        self.db_conn.execute("""
-            INSERT INTO events
-            (match_id, match_code, player_id, event_type, quarter,
-             time_remaining, timestamp, possession_team, ball_holder)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            self.current_match_id, match_code, player_id, event_type,
-            self.current_quarter, self.time_remaining, time.time(),
-            getattr(self, 'possession_team', ''), self.ball_holder
-        ))
-        self.db_conn.commit()
-
-        if self.match_log_path:
-            mins = int(self.time_remaining // 60)
-            secs = int(self.time_remaining % 60)
-            time_str = f"{mins}:{secs:02d}"
-            q = f"Q{self.current_quarter}"
-            team = getattr(self, 'possession_team', '')
-            name = self.get_player_name(player_id)
-            line = f"{time_str}\t{q}\t{team}\t\t{name}\t\t{event_type}\n"
-            with open(self.match_log_path, "a", encoding="utf-8") as f:
-                f.write(line)
-
-    def update_stats_display(self):
-        if not self.stats_text:
-            return
-        if not self.stats:
-            self.stats_text.text = ""
-            return
-
-        event_types = set()
-        for ev in self.stats.values():
-            event_types.update(ev.keys())
-        event_types = sorted(event_types)
-
-        header = "Player".ljust(12) + " " + " ".join(et[:4].ljust(5) for et in event_types) + " Total"
-        lines = [header, "-" * len(header)]
-
-        rows = []
-        for pid, ev in self.stats.items():
-            total = sum(ev.values())
-            name = self.get_player_name(pid)
-            row = [name.ljust(12)]
-            for et in event_types:
-                row.append(str(ev.get(et, 0)).ljust(5))
-            row.append(str(total))
-            rows.append((total, " ".join(row)))
-
-        for _, line in sorted(rows, key=lambda x: x[0], reverse=True)[:10]:
-            lines.append(line)
-
-        self.stats_text.text = "\n".join(lines)
-
-    def generate_quarter_report(self):
-        q = self.current_quarter
-        evs = [e for e in self.critical_events if e['quarter'] == q]
-        if not evs:
-            self.log_message(f" Q{q} Report: No critical events")
-            return
-
-        counts = Counter(e['event'] for e in evs)
-        home_c = sum(1 for e in evs if isinstance(e['player'], str) and e['player'].startswith('H-'))
-        away_c = sum(1 for e in evs if isinstance(e['player'], str) and e['player'].startswith('A-'))
-
-        report = f" Q{q} Report: {len(evs)} critical events (H:{home_c} A:{away_c})"
-        top = counts.most_common(3)
-        if top:
-            report += " | " + ", ".join(f"{t[0]}:{t[1]}" for t in top)
-        self.log_message(report)
-
-        if self.match_log_path:
-            with open(self.match_log_path, "a", encoding="utf-8") as f:
-                f.write(f"\n--- Q{q} SUMMARY: {report} ---\n")
-                for e in sorted(evs, key=lambda x: x['time'], reverse=True):
-                    f.write(f"  {e['time_str']} {self.get_player_name(e['player'])} {e['event']}\n")
-
-    # ------------ Popups: names, reports ------------
-
-    def _simple_popup(self, title, message):
-        content = BoxLayout(orientation='vertical')
-        content.add_widget(Label(text=message))
-        btn = Button(text="OK", size_hint_y=None, height='40dp')
-        content.add_widget(btn)
-        popup = Popup(title=title, content=content, size_hint=(0.8, 0.4), auto_dismiss=False)
-        btn.bind(on_press=popup.dismiss)
-        popup.open()
-
-    def new_match_dialog(self):
-        if self.names_required and not self.player_names_complete:
-            self._simple_popup(
-                " Names Required",
-                "Please enter and save all 26 player names first ( Names)."
-            )
-            return
-
-        content = BoxLayout(orientation='vertical', spacing=5, padding=5)
-        content.add_widget(Label(text="New Match", size_hint_y=None, height='30dp'))
-        content.add_widget(Label(text="Home Team:", size_hint_y=None, height='24dp'))
-        home_entry = TextInput(text="Loughborough", multiline=False)
-        content.add_widget(home_entry)
-        content.add_widget(Label(text="Away Team:", size_hint_y=None, height='24dp'))
-        away_entry = TextInput(text="", multiline=False)
-        content.add_widget(away_entry)
-
-        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
-        ok_btn = Button(text="OK")
-        cancel_btn = Button(text="Cancel")
-        btn_row.add_widget(ok_btn)
-        btn_row.add_widget(cancel_btn)
-        content.add_widget(btn_row)
-
-        popup = Popup(title=" New Match", content=content,
-                      size_hint=(0.8, 0.5), auto_dismiss=False)
-
-        def on_ok(*_):
-            home = home_entry.text.strip() or "Home"
-            away = away_entry.text.strip() or "Away"
-            self.start_new_match(home, away)
-            popup.dismiss()
-
-        ok_btn.bind(on_press=on_ok)
-        cancel_btn.bind(on_press=lambda *_: popup.dismiss())
-        popup.open()
-
-    def start_new_match(self, home_team, away_team):
-        now = datetime.now()
-        match_code = now.strftime("%Y%m%d_%H%M%S")
-        date_str = now.strftime("%Y-%m-%d %H:%M")
-        final_score = ""
-        self.db_conn.execute("""
-            INSERT INTO matches (match_code, date, home_team, away_team, final_score)
-            VALUES (?, ?, ?, ?, ?)
-        """, (match_code, date_str, home_team, away_team, final_score))
-        self.db_conn.commit()
-
-        cur = self.db_conn.cursor()
-        cur.execute("SELECT match_id FROM matches WHERE match_code=?", (match_code,))
-        row = cur.fetchone()
-        self.current_match_id = row[0] if row else None
-        self.current_match_code = match_code
-
-        self.match_log_path = os.path.join(self.data_dir, f"match_{match_code}.log")
-        with open(self.match_log_path, "w", encoding="utf-8") as f:
-            f.write(f"Match: {home_team} vs {away_team} ({date_str})\n")
-
-        self.reset_quarter()
-        self.reset_scores()
-        self.log_message(f" New match started: {home_team} vs {away_team} (code {match_code})")
-
-    def edit_names(self):
-        """
-        Kivy replacement for the tkinter 'Names' dialog:
-        - 2 columns of 13 for Home (H-Player1..14) and Away (A-Player1..14)
-        - Number + Name fields, saved to players table.
-        """
-        content = BoxLayout(orientation='vertical', spacing=5, padding=5)
-        content.add_widget(Label(text="Edit Player Names", size_hint_y=None, height='30dp'))
-
-        grids_row = BoxLayout(orientation='horizontal')
-
-        # Home grid
-        home_box = BoxLayout(orientation='vertical')
-        home_box.add_widget(Label(text="Home", size_hint_y=None, height='24dp'))
-        home_grid = GridLayout(cols=3, size_hint_y=None)
-        home_grid.bind(minimum_height=home_grid.setter('height'))
-        self._name_inputs_home = []
-        for i in range(14):
-            num = i + 1
-            pid = f"H-Player{num}"
-            home_grid.add_widget(Label(text=str(num), size_hint_y=None, height='28dp'))
-            num_input = TextInput(text=str(num), multiline=False, size_hint_y=None, height='28dp')
-            name_text = self.player_names.get(pid, "")
-            name_input = TextInput(text=name_text, multiline=False, size_hint_y=None, height='28dp')
-            self._name_inputs_home.append((pid, num_input, name_input))
-            home_grid.add_widget(num_input)
-            home_grid.add_widget(name_input)
-        home_box.add_widget(home_grid)
-
-        # Away grid
-        away_box = BoxLayout(orientation='vertical')
-        away_box.add_widget(Label(text="Away", size_hint_y=None, height='24dp'))
-        away_grid = GridLayout(cols=3, size_hint_y=None)
-        away_grid.bind(minimum_height=away_grid.setter('height'))
-        self._name_inputs_away = []
-        for i in range(14):
-            num = i + 1
-            pid = f"A-Player{num}"
-            away_grid.add_widget(Label(text=str(num), size_hint_y=None, height='28dp'))
-            num_input = TextInput(text=str(num), multiline=False, size_hint_y=None, height='28dp')
-            name_text = self.player_names.get(pid, "")
-            name_input = TextInput(text=name_text, multiline=False, size_hint_y=None, height='28dp')
-            self._name_inputs_away.append((pid, num_input, name_input))
-            away_grid.add_widget(num_input)
-            away_grid.add_widget(name_input)
-        away_box.add_widget(away_grid)
-
-        grids_row.add_widget(home_box)
-        grids_row.add_widget(away_box)
-        content.add_widget(grids_row)
-
-        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
-        save_btn = Button(text="Save All")
-        cancel_btn = Button(text="Cancel")
-        btn_row.add_widget(save_btn)
-        btn_row.add_widget(cancel_btn)
-        content.add_widget(btn_row)
-
-        popup = Popup(title=" Player Names", content=content,
-                      size_hint=(0.95, 0.9), auto_dismiss=False)
-
-        def on_save(*_):
-            cur = self.db_conn.cursor()
-            # Clear existing players to avoid duplicates
-            cur.execute("DELETE FROM players")
-
-            # Insert home
-            for pid, num_in, name_in in self._name_inputs_home:
-                name = name_in.text.strip()
-                num = int(num_in.text.strip() or "0")
-                if name:
-                    cur.execute(
-                        "INSERT OR REPLACE INTO players (player_id, number, name, team) "
-                        "VALUES (?, ?, ?, ?)",
-                        (pid, num, name, "Home")
-                    )
-
-            # Insert away
-            for pid, num_in, name_in in self._name_inputs_away:
-                name = name_in.text.strip()
-                num = int(num_in.text.strip() or "0")
-                if name:
-                    cur.execute(
-                        "INSERT OR REPLACE INTO players (player_id, number, name, team) "
-                        "VALUES (?, ?, ?, ?)",
-                        (pid, num, name, "Away")
-                    )
-
-            self.db_conn.commit()
-            self.player_names = self.load_player_names()
-
-            # Check completeness
-            home_ok = all(f"H-Player{i+1}" in self.player_names for i in range(14))
-            away_ok = all(f"A-Player{i+1}" in self.player_names for i in range(14))
-            self.player_names_complete = home_ok and away_ok
-            popup.dismiss()
-
-            msg = " All 26 names saved." if self.player_names_complete \
-                  else "Names saved, but some players are still missing."
-            self._simple_popup("Names Saved", msg)
-
-        save_btn.bind(on_press=on_save)
-        cancel_btn.bind(on_press=lambda *_: popup.dismiss())
-        popup.open()
-
-    def generate_report(self):
-        """
-        Simple match report popup:
-        - For current match: total events, goals per team.
-        - Top 10 players by goals.
-        """
-        if not self.current_match_id:
-            self._simple_popup("Report", "Start a match first.")
-            return
-
-        cur = self.db_conn.cursor()
-        cur.execute("SELECT home_team, away_team, final_score FROM matches WHERE match_id=?",
-                    (self.current_match_id,))
-        m = cur.fetchone()
-        if m:
-            home_team, away_team, final_score = m
-        else:
-            home_team = "Home"
-            away_team = "Away"
-            final_score = ""
-
-        # Count events by type and team
-        cur.execute("""
-            SELECT player_id, event_type
-            FROM events
-            WHERE match_id=?
-        """, (self.current_match_id,))
-        rows = cur.fetchall()
-
-        goals_home = goals_away = 0
-        player_goals = defaultdict(int)
-        event_counts = Counter()
-
-        for pid, ev in rows:
-            event_counts[ev] += 1
-            if ev == 'Goal':
-                player_goals[pid] += 1
-                if isinstance(pid, str) and pid.startswith('H-'):
-                    goals_home += 1
-                elif isinstance(pid, str) and pid.startswith('A-'):
-                    goals_away += 1
-
-        lines = []
-        lines.append(f"Match: {home_team} vs {away_team}")
-        if final_score:
-            lines.append(f"Final score: {final_score}")
-        else:
-            lines.append(f"Current score: {goals_home}-{goals_away}")
-
-        lines.append("")
-        lines.append("Event counts:")
-        for ev, c in event_counts.most_common():
-            lines.append(f"  {ev}: {c}")
-        lines.append("")
-        lines.append("Top scorers:")
-        if player_goals:
-            for pid, g in sorted(player_goals.items(), key=lambda x: x[1], reverse=True)[:10]:
-                lines.append(f"  {self.get_player_name(pid)}: {g}")
-        else:
-            lines.append("  No goals yet.")
-
-        content = BoxLayout(orientation='vertical')
-        text = TextInput(text="\n".join(lines), readonly=True, multiline=True)
-        content.add_widget(text)
-        btn = Button(text="Close", size_hint_y=None, height='40dp')
-        content.add_widget(btn)
-        popup = Popup(title=" Match Report", content=content, size_hint=(0.9, 0.9))
-        btn.bind(on_press=popup.dismiss)
-        popup.open()
-
-    def show_player_breakdown(self):
-        """
-        Player breakdown popup:
-        - For current match: per-player summary of Goals, Shots, Foul, Excl.Win, etc.
-        """
-        if not self.current_match_id:
-            self._simple_popup("Player Breakdown", "Start a match first.")
-            return
-
-        cur = self.db_conn.cursor()
-        cur.execute("""
-            SELECT player_id, event_type, COUNT(*)
-            FROM events
-            WHERE match_id=? AND player_id NOT LIKE 'GAME'
-            GROUP BY player_id, event_type
-        """, (self.current_match_id,))
-        rows = cur.fetchall()
-
-        per_player = defaultdict(lambda: defaultdict(int))
-        for pid, ev, c in rows:
-            per_player[pid][ev] = c
-
-        metric_order = ['Goal', 'Shot', 'Pen.Win', 'Excl.Win', 'Foul', 'P.Lost', 'E.Lost', 'Block', 'Save']
-
-        lines = []
-        for pid, evs in sorted(per_player.items(), key=lambda x: self.get_player_name(x[0])):
-            name = self.get_player_name(pid)
-            team = "Home" if isinstance(pid, str) and pid.startswith('H-') else "Away"
-            lines.append(f"{name} ({team})")
-            totals = []
-            for m in metric_order:
-                if m in evs:
-                    totals.append(f"{m}:{evs[m]}")
-            if totals:
-                lines.append("  " + ", ".join(totals))
-            else:
-                lines.append("  (no events)")
-            lines.append("")
-
-        if not lines:
-            lines = ["No player events recorded yet."]
-
-        content = BoxLayout(orientation='vertical')
-        text = TextInput(text="\n".join(lines), readonly=True, multiline=True)
-        content.add_widget(text)
-        btn = Button(text="Close", size_hint_y=None, height='40dp')
-        content.add_widget(btn)
-        popup = Popup(title=" Player Breakdown", content=content, size_hint=(0.9, 0.9))
-        btn.bind(on_press=popup.dismiss)
-        popup.open()
-
-
-class WaterPoloKivyApp(App):
-    def build(self):
-        root = WaterPoloRoot()
-        controller = WaterPoloTrackerController(root)
-        root.controller = controller
-        return root
-
-
-if __name__ == "__main__":
-    WaterPoloKivyApp().run()
+from collections import defaultdict, Counter
+import time
+from datetime import datetime
+import os
+from pathlib import Path
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.label import Label
+from kivy.uix.button import Button
+from kivy.uix.textinput import TextInput
+from kivy.uix.popup import Popup
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.properties import ObjectProperty
+from kivy.metrics import dp
+
+from db import Database
+from log_writer import MatchLogWriter
+from metrics import team_sheet
+from export import export_matches
+from scheduler import ClockScheduler
+from season import SeasonAnalytics
+from diagnostics import Diagnostics, timed
+from event_types import (
+    AUTO_PAUSE, CRITICAL_EVENTS, DEF_EVENTS, DEFENSIVE, GAME_EVENTS, OFF_EVENTS, STOPPAGES
+)
+from players import SubEvent, NUMBER_OF, TEAM_OF_ID, TEAM_PLAYER_IDS, intern_player
+from possession import PossessionSummary, SegmentBuilder, build_segments, stream_possession_rows
+from replay import diff_live_state, replay_match
+from report_cache import ReportCache
+from session import MatchSession
+from timeline import Timeline, parse_clock
+from undo import JournalEntry
+from write_behind import PoolTimeWriteBehind
+
+
+
+class WaterPoloRoot(BoxLayout):
+    controller = ObjectProperty(None)
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation='vertical', **kwargs)
+
+
+class LogLine(Label):
+    def __init__(self, **kwargs):
+        super().__init__(halign='left', valign='middle', **kwargs)
+        self.bind(size=self.setter('text_size'))
+
+
+class LogView(RecycleView):
+    """Virtualized log pane: only the visible LogLine widgets exist, whatever the line count."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = LogLine
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(20)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self._scroll_trigger = Clock.create_trigger(self._scroll_to_bottom)
+
+    def set_lines(self, lines):
+        self.data = [{'text': line} for line in lines]
+        self._scroll_trigger()
+
+    def append_line(self, line, evicted=False):
+        if evicted:
+            self.data.pop(0)
+        self.data.append({'text': line})
+        self._scroll_trigger()
+
+    def _scroll_to_bottom(self, *_):
+        self.scroll_y = 0
+
+
+def session_field(name):
+    """Controller attribute backed by the active MatchSession's field of that name."""
+    return property(
+        lambda self: getattr(self.session, name),
+        lambda self, value: setattr(self.session, name, value),
+    )
+
+
+class WaterPoloTrackerController:
+    # Per-match state lives on the active session (see MatchSession)
+    current_match_id = session_field('match_id')
+    current_match_code = session_field('match_code')
+    match_clock = session_field('match_clock')
+    stats = session_field('stats')
+    stats_table = session_field('stats_table')
+    home_score = session_field('home_score')
+    away_score = session_field('away_score')
+    critical_events = session_field('critical_events')
+    timeline = session_field('timeline')
+    undo_journal = session_field('undo_journal')
+    current_quarter = session_field('current_quarter')
+    auto_paused = session_field('auto_paused')
+    possession_team = session_field('possession_team')
+    ball_holder = session_field('ball_holder')
+    pending_defensive_event = session_field('pending_defensive_event')
+    possession_time = session_field('possession_time')
+    in_pool = session_field('in_pool')
+    starting_lineup = session_field('starting_lineup')
+    sub_events = session_field('sub_events')
+    sub_index = session_field('sub_index')
+    pool_time = session_field('pool_time')
+    match_log = session_field('match_log')
+    match_log_path = session_field('match_log_path')
+    log_ring = session_field('log_ring')
+    _last_display_second = session_field('last_display_second')
+
+    def __init__(self, root_widget):
+        self.root_widget = root_widget
+
+        # Data dir
+        self.data_dir = self.get_app_data_dir()
+        self.db_path = os.path.join(self.data_dir, "db", "waterpolo.db")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        # Opt-in latency histograms (Diag button)
+        self.diagnostics = Diagnostics(enabled=False)
+
+        # DB & state: every write goes through the one writer thread, reads use read-only
+        # connections. The season summaries are refreshed on the writer (SeasonAnalytics.refresh)
+        # and read, like every season-wide query, on the reader thread (db.read).
+        self.db = Database(
+            self.db_path, on_error=self._on_db_error,
+            on_batch=lambda secs, n: self.diagnostics.record('db_commit', secs)
+        )
+        self.season = SeasonAnalytics(self.db.conn)
+        # Match report / breakdown counts, refreshed from new rows only
+        self.report_cache = ReportCache()
+
+        # Pool time / possession are written behind the clock, in batches
+        self.pool_flush_interval = 15.0
+        self.pool_writer = PoolTimeWriteBehind(self.db, self.pool_flush_interval)
+
+        # Open matches by match_id; the active one is shown and takes the taps.
+        # One ticker (clock_scheduler) polls every running match clock.
+        self.sessions = {}
+        self.log_capacity = 200
+        self.session = self._new_session()
+        self.player_names = self.load_player_names()
+        self.CRITICAL_EVENTS = set(CRITICAL_EVENTS)
+
+        self.clock_scheduler = ClockScheduler(self._poll_clocks, self.match_clock.resolution)
+        self.play_btn = None
+        self.pause_btn = None
+        self.undo_btn = None
+        self.redo_btn = None
+        self.stats_text = None
+        self.log_view = None
+        self.ball_label = None
+        self.clock_display = None
+        self.score_display = None
+        self.possession_text = None
+        self.match_log_policy = MatchLogWriter.INTERVAL
+        self.match_log_interval_ms = 500
+
+        # Names control
+        self.names_required = True          # enforce before match
+        self.player_names_complete = False  # becomes True after saving 26
+
+        # Player buttons
+        self.home_players = []
+        self.away_players = []
+
+        # Dialogs are built once (first use or idle after startup) and only rebound afterwards
+        self._popups = {}
+        self._name_inputs_home = []
+        self._name_inputs_away = []
+
+        self.create_widgets()
+        self.update_clock_display()
+        Clock.schedule_once(self._prebuild_popups, 2)
+
+    # ---------------- DB / FS ----------------
+
+    def get_app_data_dir(self):
+        app_name = "WaterPoloTracker"
+        if os.name == 'nt':
+            appdata = os.getenv('APPDATA')
+            if appdata:
+                return Path(appdata) / app_name
+        if os.name == 'posix':
+            return Path.home() / ".local" / "share" / app_name
+        return Path.cwd() / app_name
+
+    def _on_db_error(self, error, ticket):
+        # Called on the writer / reader thread; the message is shown from the UI thread
+        Clock.schedule_once(lambda dt: self.log_message(f"X Database error: {error}"))
+
+    def _on_ui(self, callback, *args):
+        """
+        on_done for db.submit() / db.read(): callback(*args, result) runs on the UI thread
+        (Kivy clock) once the command is done. Failures are already logged by _on_db_error.
+        """
+        def deliver(ticket):
+            if ticket.error is None:
+                Clock.schedule_once(lambda dt: callback(*args, ticket.result))
+        return deliver
+
+    def _when_written(self, callback, *args):
+        """callback(*args) on the UI thread once every write queued so far is committed."""
+        self.db.after_writes(self._on_ui(lambda *a: callback(*a[:-1]), *args))
+
+    def load_player_names(self):
+        try:
+            cur = self.db.reader().cursor()
+            cur.execute("SELECT player_id, name FROM players")
+            rows = cur.fetchall()
+            return {pid: name for pid, name in rows}
+        except Exception:
+            return {}
+
+    # -------------- UI BUILD ----------------
+
+    def create_widgets(self):
+        root = self.root_widget
+        root.clear_widgets()
+
+        # Title + open matches (several pools can be scored at once)
+        title_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        title_label = Label(text="Water Polo Tracker v3.1", size_hint_x=0.8)
+        matches_btn = Button(text="Matches", size_hint_x=0.2,
+                             on_press=lambda *_: self.show_matches_popup())
+        title_row.add_widget(title_label)
+        title_row.add_widget(matches_btn)
+        root.add_widget(title_row)
+
+        # Top bar - FIXED button sizes (total = 1.0)
+        top_bar = BoxLayout(orientation='horizontal', size_hint_y=None, height='60dp')
+        self.clock_display = Label(text="8:00 [] Q1", size_hint_x=0.18)  # was 0.20
+        self.score_display = Label(text="0-0", size_hint_x=0.10)
+
+        self.play_btn = Button(text="Go", size_hint_x=0.06,      # was 0.07
+                               on_press=lambda *_: self.start_clock())
+        self.pause_btn = Button(text="Pause", size_hint_x=0.06,     # was 0.07
+                                on_press=lambda *_: self.pause_clock(),
+                                disabled=True)
+        reset_btn = Button(text="Reset", size_hint_x=0.06,          # was 0.07
+                           on_press=lambda *_: self.reset_quarter())
+        plus_btn = Button(text="+2s", size_hint_x=0.06,          # was 0.07
+                          on_press=lambda *_: self.adjust_time(2))
+        minus_btn = Button(text="-2s", size_hint_x=0.06,         # was 0.07
+                           on_press=lambda *_: self.adjust_time(-2))
+        q_btn = Button(text="Q ^", size_hint_x=0.06,              # was 0.07
+                       on_press=lambda *_: self.next_quarter())
+        sub_in_btn = Button(text="Sub IN", size_hint_x=0.10,       # was 0.12, shortened text
+                            on_press=lambda *_: self.set_sub_mode("IN"))
+        sub_out_btn = Button(text="Sub OUT", size_hint_x=0.10,     # was 0.12, shortened text
+                             on_press=lambda *_: self.set_sub_mode("OUT"))
+        self.undo_btn = Button(text="Undo", size_hint_x=0.08, disabled=True,
+                               on_press=lambda *_: self.undo_last_event())
+        self.redo_btn = Button(text="Redo", size_hint_x=0.08, disabled=True,
+                               on_press=lambda *_: self.redo_event())
+
+        # ADD ALL BUTTONS IN ORDER
+        top_bar.add_widget(self.clock_display)
+        top_bar.add_widget(self.score_display)
+        top_bar.add_widget(self.play_btn)
+        top_bar.add_widget(self.pause_btn)
+        top_bar.add_widget(reset_btn)
+        top_bar.add_widget(plus_btn)
+        top_bar.add_widget(minus_btn)
+        top_bar.add_widget(q_btn)
+        top_bar.add_widget(sub_in_btn)
+        top_bar.add_widget(sub_out_btn)
+        top_bar.add_widget(self.undo_btn)
+        top_bar.add_widget(self.redo_btn)
+        root.add_widget(top_bar)
+
+                # Ball label - smaller
+        self.ball_label = Label(text=" No ball", size_hint_y=None, height='24dp')  # was 30dp
+        root.add_widget(self.ball_label)
+
+        # Players row - SMALLER buttons
+        players_row = BoxLayout(orientation='horizontal', size_hint_y=0.35)  # was 0.50
+
+        home_box = BoxLayout(orientation='vertical')
+        home_box.add_widget(Label(text=" Home", size_hint_y=None, height='20dp'))  # shorter label
+        home_grid = GridLayout(cols=7, size_hint_y=None, height='140dp')  # was 200dp
+        self.home_players = []
+        for i in range(14):
+            btn = Button(
+                text=f"P{i+1}",
+                background_color=(0.12, 0.53, 0.90, 1),
+                font_size='12sp',  # smaller font
+                on_press=lambda inst, idx=i: self.set_ball_holder(idx, "Home")
+            )
+            self.home_players.append(btn)
+            home_grid.add_widget(btn)
+        home_box.add_widget(home_grid)
+
+        away_box = BoxLayout(orientation='vertical')
+        away_box.add_widget(Label(text="Away", size_hint_y=None, height='20dp'))  # shorter label
+        away_grid = GridLayout(cols=7, size_hint_y=None, height='140dp')  # was 200dp
+        self.away_players = []
+        for i in range(14):
+            btn = Button(
+                text=f"O{i+1}",
+                background_color=(0.96, 0.49, 0.0, 1),
+                font_size='12sp',  # smaller font
+                on_press=lambda inst, idx=i: self.set_ball_holder(idx, "Away")
+            )
+            self.away_players.append(btn)
+            away_grid.add_widget(btn)
+        away_box.add_widget(away_grid)
+
+        players_row.add_widget(home_box)
+        players_row.add_widget(away_box)
+        root.add_widget(players_row)
+
+        # Events - normal size
+        events_box = BoxLayout(orientation='vertical', size_hint_y=0.22)  # was 0.18
+        events_box.add_widget(Label(text="Events", size_hint_y=None, height='20dp'))
+
+
+        off_grid = GridLayout(cols=8, size_hint_y=None, height='36dp')  # was 40dp
+        for label, name in OFF_EVENTS:
+            off_grid.add_widget(Button(
+                text=label,
+                background_color=(1, 0.8, 0.5, 1),
+                font_size=11,  # was 12
+                on_press=lambda inst, e=name: self.event_clicked(e)
+            ))
+        events_box.add_widget(off_grid)
+
+        def_grid = GridLayout(cols=9, size_hint_y=None, height='36dp')  # was 40dp
+        for label, name in DEF_EVENTS:
+            def_grid.add_widget(Button(
+                text=label,
+                background_color=(0.73, 0.86, 0.98, 1),
+                font_size=11,  # was 12
+                on_press=lambda inst, e=name: self.event_clicked(e)
+            ))
+        events_box.add_widget(def_grid)
+
+        game_grid = GridLayout(cols=4, size_hint_y=None, height='36dp')  # was 40dp
+        for label, name in GAME_EVENTS:
+            game_grid.add_widget(Button(
+                text=label,
+                background_color=(0.88, 0.75, 0.91, 1),
+                font_size=11,  # was 12
+                on_press=lambda inst, e=name: self.event_clicked(e)
+            ))
+        events_box.add_widget(game_grid)
+        root.add_widget(events_box)
+
+
+        # Actions row
+        action_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        crit_btn = Button(text="Critical Log", size_hint_x=0.13,
+                          on_press=lambda *_: self.show_critical_popup())
+        diag_btn = Button(text="Diag", size_hint_x=0.08,
+                          on_press=lambda *_: self.show_diagnostics_popup())
+        new_match_btn = Button(text="New Match", size_hint_x=0.13,
+                               on_press=lambda *_: self.new_match_dialog())
+        names_btn = Button(text="Names", size_hint_x=0.10,
+                           on_press=lambda *_: self.edit_names())
+        report_btn = Button(text="Report", size_hint_x=0.11,
+                            on_press=lambda *_: self.generate_report())
+        breakdown_btn = Button(text="Player Breakdown", size_hint_x=0.19,
+                               on_press=lambda *_: self.show_player_breakdown())
+        season_btn = Button(text="Season", size_hint_x=0.12,
+                            on_press=lambda *_: self.show_season_report())
+        timeline_btn = Button(text="Timeline", size_hint_x=0.14,
+                              on_press=lambda *_: self.show_timeline())
+        action_row.add_widget(crit_btn)
+        action_row.add_widget(diag_btn)
+        action_row.add_widget(new_match_btn)
+        action_row.add_widget(names_btn)
+        action_row.add_widget(report_btn)
+        action_row.add_widget(breakdown_btn)
+        action_row.add_widget(season_btn)
+        action_row.add_widget(timeline_btn)
+        root.add_widget(action_row)
+
+                # SMALLER LOG area
+        logs_box = BoxLayout(orientation='vertical', size_hint_y=0.12)  # explicit limit
+        logs_box.add_widget(Label(text="Logs", size_hint_y=None, height='20dp'))
+
+        self.log_view = LogView()
+        logs_box.add_widget(self.log_view)
+        root.add_widget(logs_box)
+
+
+
+
+        # Sub mode state
+        self.sub_mode = None
+
+
+
+    # ------------ Utility ------------
+
+    def get_player_name(self, player_id):
+        if player_id is None:
+            return "No player"
+        if player_id in self.player_names:
+            return self.player_names[player_id]
+        team = TEAM_OF_ID.get(player_id)
+        if team:
+            return f"{team} #{NUMBER_OF[intern_player(player_id)]}"
+        return str(player_id)
+
+    def log_message(self, message, session=None):
+        """Log a line to a match's log (the one on screen by default); only it is shown."""
+        s = session or self.session
+        ts = datetime.now().strftime("%H:%M:%S")
+        line = f"[{ts}] {message}"
+        evicted = s.log_ring.append(line)
+        if self.log_view and s is self.session:
+            self.log_view.append_line(line, evicted is not None)
+
+    def _open_match_log(self, path, mode="a", header=None):
+        """The match's event log at path and, beside it, the log of pane lines scrolled out."""
+        self.session.close_log()
+        self.match_log_path = path
+        self.match_log = MatchLogWriter(
+            path, mode=mode, header=header,
+            policy=self.match_log_policy, interval_ms=self.match_log_interval_ms
+        )
+        self.session.message_log = MatchLogWriter(
+            os.path.splitext(path)[0] + "_messages.log", mode=mode,
+            policy=self.match_log_policy, interval_ms=self.match_log_interval_ms
+        )
+
+    
+
+    # ------------ Clock / score ------------
+
+    @property
+    def game_running(self):
+        return self.match_clock.running
+
+    @property
+    def time_remaining(self):
+        return self.match_clock.remaining
+
+    def update_clock_display(self, *_):
+        if self.game_running:
+            status = ">"
+        elif self.auto_paused:
+            status = "||(auto)"
+        else:
+            status = "[]"
+        if self.clock_display:
+            self.clock_display.text = f"{self.match_clock.display()} {status} Q{self.current_quarter}"
+
+    def reset_scores(self):
+        self.home_score = 0
+        self.away_score = 0
+        self.update_score_display()
+
+    def update_score_display(self):
+        if self.score_display:
+            self.score_display.text = f"{self.home_score}-{self.away_score}"
+
+    def start_clock(self):
+        if not self.current_match_id:
+            self.log_message("Create match first!")
+            return
+
+        self.auto_paused = False
+        if not self.match_clock.start():
+            return
+        self._last_display_second = None
+        self.clock_scheduler.start()
+        if self.pause_btn:
+            self.pause_btn.disabled = False
+        if self.play_btn:
+            self.play_btn.disabled = True
+        self.update_clock_display()
+        self.log_message("Clock started/resumed")
+
+    def _poll_clocks(self, *_):
+        """Scheduler callback: polls every running match clock, then the shared write-behind."""
+        running = False
+        for session in list(self.sessions.values()):
+            clock = session.match_clock
+            if clock.running:
+                clock.poll()
+                running = running or clock.running
+                self.pool_writer.set_clock(session.match_id, session.current_quarter, clock.remaining)
+        self.pool_writer.maybe_flush()
+        if not running:
+            # Nothing left to drive: returning False ends the scheduler's run
+            return False
+
+    def _halt_clock(self):
+        self.match_clock.pause()
+        if not any(s.match_clock.running for s in self.sessions.values()):
+            self.clock_scheduler.stop()
+        self.flush_pool_time()
+
+    @timed('clock_tick')
+    def _on_clock_tick(self, clock, dt, session=None):
+        s = session or self.session
+        quarter = s.current_quarter
+        # Pool time / possession: buffered, flushed in batches by the scheduler
+        for team in ['Home', 'Away']:
+            for pid in s.in_pool[team]:
+                s.pool_time[pid][quarter] += dt
+                self.pool_writer.add_pool_time(s.match_id, pid, quarter, dt)
+
+        if s.ball_holder:
+            s.possession_time[s.ball_holder][quarter] += dt
+            self.pool_writer.add_possession_time(s.match_id, s.ball_holder, quarter, dt)
+
+        # Displays only change once per displayed second, and only for the match on screen
+        if s is self.session and clock.display_seconds != s.last_display_second:
+            s.last_display_second = clock.display_seconds
+            self.update_clock_display()
+            self.update_possession_display()
+
+    def _on_quarter_end(self, clock, session=None):
+        s = session or self.session
+        s.auto_paused = True
+        if s is self.session:
+            self.update_clock_display()
+        self.generate_quarter_report(s)
+        self._end_of_quarter_actions(s)
+
+    def _on_shot_clock(self, clock, session=None):
+        self.log_message(" Shot clock expired", session)
+
+    @timed('pool_flush')
+    def flush_pool_time(self):
+        # With every open match's game position, so a reload resumes where play stopped
+        for session in self._all_sessions():
+            if session.match_id:
+                self.pool_writer.set_clock(
+                    session.match_id, session.current_quarter, session.match_clock.remaining
+                )
+        self.pool_writer.flush()
+
+    def flush_pending(self):
+        self.flush_pool_time()
+        # Called when the app may be killed (pause / stop): let the writer commit everything
+        self.db.sync()
+        for session in self._all_sessions():
+            session.flush_logs()
+
+    def shutdown(self):
+        for session in self._all_sessions():
+            session.match_clock.pause()
+        self.clock_scheduler.stop()
+        self.flush_pending()
+        self.write_diagnostics()
+        for session in self._all_sessions():
+            session.close_log()
+        self.db.close()
+
+    def _end_of_quarter_actions(self, session=None):
+        s = session or self.session
+        active = s is self.session
+        # 'quarter' policy logs reach the disk here
+        s.flush_logs()
+        if active and self.pause_btn:
+            self.pause_btn.disabled = True
+        if active and self.play_btn:
+            self.play_btn.disabled = False
+        self.log_message(f" End of Q{s.current_quarter}", s)
+
+        if s.current_quarter < 4:
+            s.current_quarter += 1
+            s.match_clock.reset()
+            if active:
+                self.update_clock_display()
+            self.log_message(f"Ready for Q{s.current_quarter} (press play)", s)
+            for pid in s.pool_time:
+                if s.current_quarter not in s.pool_time[pid]:
+                    s.pool_time[pid][s.current_quarter] = 0.0
+        else:
+            if active and self.clock_display:
+                self.clock_display.text = "MATCH FINISHED"
+            self.log_message("Match finished", s)
+            self.write_diagnostics(s)
+        # After the quarter change, so the stored clock is the next quarter's
+        self.flush_pool_time()
+
+    def pause_clock(self):
+        self._halt_clock()
+        self.auto_paused = False
+        if self.pause_btn:
+            self.pause_btn.disabled = True
+        if self.play_btn:
+            self.play_btn.disabled = False
+        self.update_clock_display()
+        self.log_message(" || Manual pause")
+
+    def reset_quarter(self):
+        self._halt_clock()
+        self.auto_paused = False
+        self.match_clock.reset()
+        self.current_quarter = 1
+        self.flush_pool_time()
+        if self.pause_btn:
+            self.pause_btn.disabled = True
+        if self.play_btn:
+            self.play_btn.disabled = False
+        self.update_clock_display()
+
+    def adjust_time(self, seconds):
+        self._halt_clock()
+        self.match_clock.adjust(seconds)
+        self.flush_pool_time()
+        self.auto_paused = False
+        if self.pause_btn:
+            self.pause_btn.disabled = True
+        if self.play_btn:
+            self.play_btn.disabled = False
+        self.update_clock_display()
+        self.log_message(
+            f"Time adjusted: {seconds:+d}s → {self.match_clock.display()}"
+        )
+
+    def next_quarter(self):
+        self._halt_clock()
+        if self.current_quarter < 4:
+            self.current_quarter += 1
+        else:
+            self.current_quarter = 1
+        self.flush_pool_time()
+
+        all_players = set(self.starting_lineup['Home'] + self.starting_lineup['Away'])
+        rows = [(self.current_match_id, pid, self.current_quarter) for pid in all_players]
+        self.db.executemany(
+            "INSERT OR IGNORE INTO player_pool_time "
+            "(match_id, player_id, quarter, pool_seconds, substitutions) "
+            "VALUES (?, ?, ?, 0.0, 0)", rows
+        )
+        self.db.executemany(
+            "INSERT OR IGNORE INTO player_possession "
+            "(match_id, player_id, quarter, possession_seconds) "
+            "VALUES (?, ?, ?, 0.0)", rows
+        )
+
+        self.auto_paused = False
+        if self.pause_btn:
+            self.pause_btn.disabled = True
+        if self.play_btn:
+            self.play_btn.disabled = False
+        self.update_clock_display()
+        self.log_message(f"Quarter → Q{self.current_quarter}")
+
+    # ------------ Ball, subs, possession ------------
+
+    @timed('tap_player')
+    def set_ball_holder(self, idx, team):
+        player_id = TEAM_PLAYER_IDS[team][idx]
+
+        if self.sub_mode:
+            self.handle_substitution(player_id, team)
+            return
+
+        if self.pending_defensive_event:
+            self.log_event(player_id, self.pending_defensive_event)
+            self.log_message(
+                f"DEF {self.get_player_name(player_id)} - "
+                f"{self.pending_defensive_event} (Def) Q{self.current_quarter}"
+            )
+            self.update_stats_display()
+            self.pending_defensive_event = None
+            if self.ball_label:
+                self.ball_label.text = "No ball"
+            return
+
+        if team != self.possession_team:
+            self.match_clock.reset_shot_clock()
+        self._move_ball(player_id)
+        self.possession_team = team
+        if self.ball_label:
+            self.ball_label.text = f"{self.get_player_name(player_id)}"
+        self.log_message(f"Ball → {self.get_player_name(player_id)}")
+
+    def _move_ball(self, player_id):
+        """Change the ball holder and record the transfer (None: the ball is dead)."""
+        if player_id == self.ball_holder:
+            return
+        self.ball_holder = player_id
+        if not self.current_match_id:
+            return
+        self.db.execute(
+            "INSERT INTO ball_transfers (match_id, quarter, time_remaining, player_id, timestamp) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.current_match_id, self.current_quarter, self.time_remaining, player_id, time.time())
+        )
+        self._add_segment(self.session.possession_builder.transfer(
+            self.current_match_id, self.current_quarter, self.time_remaining, player_id
+        ))
+
+    def _add_segment(self, segment):
+        if segment is not None:
+            self.session.possession_segments.append(segment)
+
+    def set_sub_mode(self, mode):
+        self.sub_mode = mode
+        if not self.ball_label:
+            return
+        if mode == "IN":
+            self.ball_label.text = "Click player to SUB IN"
+        else:
+            self.ball_label.text = "Click player to SUB OUT"
+
+    def log_sub_event(self, player_id, action):
+        # Pending pool time must land before the substitution count is bumped
+        self.flush_pool_time()
+        data = SubEvent(
+            intern_player(player_id), self.current_quarter, self.time_remaining, action, time.time()
+        )
+        self.sub_events.append(data)
+        self.sub_index.record(player_id, self.current_quarter)
+        self.db.execute("""
+            INSERT INTO match_substitutions
+            (match_id, player_id, quarter, time_remaining, action, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            self.current_match_id, player_id, self.current_quarter,
+            self.time_remaining, action, data.timestamp
+        ))
+        self.db.execute("""
+            UPDATE player_pool_time
+            SET substitutions = substitutions + 1
+            WHERE match_id = ? AND player_id = ? AND quarter = ?
+        """, (self.current_match_id, player_id, self.current_quarter))
+
+    def handle_substitution(self, player_id, team):
+        if self.sub_mode == "IN":
+            if player_id in self.in_pool[team]:
+                self.log_message(f" {self.get_player_name(player_id)} already in pool")
+            else:
+                self.log_sub_event(player_id, "IN")
+                self.in_pool[team].add(player_id)
+                self.log_message(
+                    f" {self.get_player_name(player_id)} SUB IN (Q{self.current_quarter})"
+                )
+
+        elif self.sub_mode == "OUT":
+            if player_id not in self.in_pool[team]:
+                self.log_message(f" {self.get_player_name(player_id)} not in pool")
+            else:
+                self.log_sub_event(player_id, "OUT")
+                self.in_pool[team].remove(player_id)
+                if self.ball_holder == player_id:
+                    others = [p for p in self.in_pool[team] if p != player_id]
+                    if others:
+                        self._move_ball(others[0])
+                        if self.ball_label:
+                            self.ball_label.text = f"Ball {self.get_player_name(self.ball_holder)}"
+                        self.log_message(
+                            f"> Ball auto-passed to {self.get_player_name(self.ball_holder)}"
+                        )
+                    else:
+                        self._move_ball(None)
+                        if self.ball_label:
+                            self.ball_label.text = "No ball"
+                        self.log_message("→ Ball cleared (no teammates)")
+
+        self.sub_mode = None
+        if self.ball_label:
+            if not self.ball_holder:
+                self.ball_label.text = "No ball"
+            else:
+                self.ball_label.text = f" {self.get_player_name(self.ball_holder)}"
+        self.update_player_visuals()
+        self.log_message(" Sub complete")
+
+    def update_player_visuals(self):
+        for pid, btn in zip(TEAM_PLAYER_IDS['Home'], self.home_players):
+            btn.background_color = (0.10, 0.46, 0.82, 1) if pid in self.in_pool['Home'] \
+                                   else (0.12, 0.53, 0.90, 1)
+        for pid, btn in zip(TEAM_PLAYER_IDS['Away'], self.away_players):
+            btn.background_color = (0.94, 0.42, 0.0, 1) if pid in self.in_pool['Away'] \
+                                   else (0.96, 0.49, 0.0, 1)
+
+    @timed('ui_refresh')
+    def update_possession_display(self, *_):
+        if not self.possession_text:
+            return
+        lines = [f"Pool Time Q{self.current_quarter}:"]
+        top = self.sub_index.top_pool_time(self.pool_time, self.current_quarter, 8)
+        for pid, secs, subs in top:
+            mins, rem = divmod(int(secs), 60)
+            t = f"{mins}:{rem:02d}"
+            name = self.get_player_name(pid)[:10]
+            lines.append(f"{name:10s} {t:6s} ({subs} subs)")
+        self.possession_text.text = "\n".join(lines)
+
+    # ------------ Match sessions ------------
+
+    def _new_session(self, match_id=None, match_code=None, home_team=None, away_team=None):
+        session = MatchSession(
+            self.db, self.get_player_name, match_id, match_code, self.log_capacity
+        )
+        session.home_team = home_team or "Home"
+        session.away_team = away_team or "Away"
+        # Clock callbacks are bound to their own session, so background matches keep scoring
+        clock = session.match_clock
+        clock.on_tick = lambda c, dt: self._on_clock_tick(c, dt, session)
+        clock.on_quarter_end = lambda c: self._on_quarter_end(c, session)
+        clock.on_shot_clock = lambda c: self._on_shot_clock(c, session)
+        if match_id is not None:
+            self.sessions[match_id] = session
+        return session
+
+    def _all_sessions(self):
+        sessions = list(self.sessions.values())
+        if self.session not in sessions:
+            sessions.append(self.session)
+        return sessions
+
+    def switch_match(self, match_id):
+        """Put another open match on screen; its clock and the others keep running."""
+        session = self.sessions.get(match_id)
+        if session is None:
+            return None
+        if session is not self.session:
+            self.session = session
+            self.sub_mode = None
+            self.refresh_displays()
+            self.log_message(f" Scoring {session.label} ({session.match_code})")
+        return session
+
+    def close_match(self, match_id):
+        """Stop scoring an open match: pause its clock, flush its data and close its log."""
+        session = self.sessions.pop(match_id, None)
+        if session is None:
+            return None
+        session.match_clock.pause()
+        self.flush_pool_time()
+        session.close_log()
+        if session is self.session:
+            others = list(self.sessions)
+            if others:
+                self.switch_match(others[-1])
+            else:
+                self.session = self._new_session()
+                self.refresh_displays()
+        self.log_message(f" Closed {session.label} ({session.match_code})")
+        return session
+
+    def refresh_displays(self):
+        running = self.game_running
+        if self.pause_btn:
+            self.pause_btn.disabled = not running
+        if self.play_btn:
+            self.play_btn.disabled = running
+        self.update_undo_buttons()
+        if self.ball_label:
+            self.ball_label.text = (
+                self.get_player_name(self.ball_holder) if self.ball_holder else " No ball"
+            )
+        self.update_clock_display()
+        self.update_score_display()
+        self.update_stats_display()
+        self.update_player_visuals()
+        self.update_possession_display()
+        if self.log_view:
+            self.log_view.set_lines(self.log_ring)
+
+    def show_matches_popup(self):
+        content = BoxLayout(orientation='vertical', spacing=5, padding=5)
+        popup = Popup(title=" Open Matches", content=content, size_hint=(0.8, 0.8))
+        if not self.sessions:
+            content.add_widget(Label(text="No open matches. Use New Match."))
+        for match_id, session in self.sessions.items():
+            clock = session.match_clock
+            state = ">" if clock.running else "[]"
+            text = (f"{session.label}  {session.home_score}-{session.away_score}  "
+                    f"Q{session.current_quarter} {clock.display()} {state}")
+            if session is self.session:
+                text = "* " + text
+            btn = Button(text=text, size_hint_y=None, height='44dp')
+            btn.bind(on_press=lambda inst, m=match_id: (self.switch_match(m), popup.dismiss()))
+            content.add_widget(btn)
+
+        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        close_match_btn = Button(text="Close current match", disabled=not self.current_match_id)
+        close_btn = Button(text="Close")
+        btn_row.add_widget(close_match_btn)
+        btn_row.add_widget(close_btn)
+        content.add_widget(btn_row)
+        close_match_btn.bind(
+            on_press=lambda *_: (self.close_match(self.current_match_id), popup.dismiss())
+        )
+        close_btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    # ------------ Replay ------------
+
+    def load_match(self, match_id, on_loaded=None):
+        """
+        Make a stored match current again, rebuilding its live state from the database.
+        The replay runs once queued writes (this match's last pool time, a just-started
+        match) are committed; on_loaded(state) is called after it, on the UI thread.
+        """
+        old = self.sessions.get(match_id)
+        if old is not None:
+            old.match_clock.pause()
+            self.flush_pool_time()
+            old.close_log()
+        self._when_written(self._load_match, match_id, on_loaded)
+
+    def _load_match(self, match_id, on_loaded=None):
+        reader = self.db.reader()
+        row = reader.execute(
+            "SELECT match_code, home_team, away_team FROM matches WHERE match_id=?", (match_id,)
+        ).fetchone()
+        if not row:
+            self.log_message(f"X No match with id {match_id}")
+            return None
+
+        state = replay_match(reader, match_id)
+
+        self.session = self._new_session(match_id, row[0], row[1], row[2])
+        self._open_match_log(os.path.join(self.data_dir, f"match_{row[0]}.log"))
+        self.stats = state.stats
+        self.stats_table.reset(state.stats)
+        self.home_score = state.home_score
+        self.away_score = state.away_score
+        self.critical_events = state.critical_events
+        self.sub_events = state.sub_events
+        self.sub_index.reset(state.sub_events)
+        self.timeline = Timeline.load(reader, match_id)
+        self._rebuild_possessions(reader)
+        self.pool_time = state.pool_time
+        self.in_pool = state.in_pool
+        self.current_quarter = state.quarter
+        self.match_clock.reset(state.last_time)
+
+        self.refresh_displays()
+        self.log_message(f" Reloaded match {row[0]} ({state.event_count} events)")
+        if on_loaded:
+            on_loaded(state)
+        return state
+
+    def verify_live_state(self, on_done=None):
+        """
+        Replay the current match once its queued writes are committed and log any drift
+        from the live counters; on_done(problems) is called on the UI thread.
+        """
+        if self.current_match_id:
+            self._when_written(self._verify_live_state, self.session, on_done)
+
+    def _verify_live_state(self, session, on_done=None):
+        state = replay_match(self.db.reader(), session.match_id)
+        problems = diff_live_state(state, session.stats, session.home_score, session.away_score)
+        for p in problems:
+            self.log_message(f" Replay mismatch: {p}", session)
+        if on_done:
+            on_done(problems)
+        return problems
+
+    def _rebuild_possessions(self, reader):
+        """Possession chains of the current match from its stored transfers and live events."""
+        s = self.session
+        s.possession_builder = SegmentBuilder()
+        s.possession_segments = list(build_segments(
+            stream_possession_rows(reader, [s.match_id]), builder=s.possession_builder, finish=False
+        ))
+        s.possessions_stale = False
+
+    def possession_lines(self):
+        # Called once queued writes are committed (see generate_report)
+        s = self.session
+        if s.possessions_stale and s.match_id:
+            self._rebuild_possessions(self.db.reader())
+        names = {'Home': s.home_team, 'Away': s.away_team}
+        summary = PossessionSummary()
+        open_segment = s.possession_builder.current
+        for seg in s.possession_segments + ([open_segment] if open_segment else []):
+            summary.add(seg, names.get(seg.team, seg.team))
+        return summary.lines(self.get_player_name) or ["No ball transfers recorded yet."]
+
+    # ------------ Events & stats ------------
+
+    def log_critical_event(self, player_id, event_type, entry=None):
+        if entry is None:
+            self.critical_events.add(
+                self.current_quarter, self.time_remaining, intern_player(player_id), event_type,
+                self.match_clock.display()
+            )
+        else:
+            self.critical_events.add(
+                entry.quarter, entry.time_remaining, intern_player(player_id), event_type,
+                entry.time_str, entry.event_id
+            )
+
+    def update_undo_buttons(self):
+        if self.undo_btn:
+            self.undo_btn.disabled = not self.undo_journal.can_undo()
+        if self.redo_btn:
+            self.redo_btn.disabled = not self.undo_journal.can_redo()
+
+    def undo_last_event(self):
+        """Tombstone the last logged event and take it back out of every live counter."""
+        entry = self.undo_journal.undo()
+        self.update_undo_buttons()
+        if entry is None:
+            self.log_message("Nothing to undo")
+            return None
+        self._apply_journal_entry(entry, -1)
+        self.log_message(
+            f" Undone: {self.get_player_name(entry.player_id)} - {entry.event_type} "
+            f"(Q{entry.quarter} {entry.time_str})"
+        )
+        return entry
+
+    def redo_event(self):
+        entry = self.undo_journal.redo()
+        self.update_undo_buttons()
+        if entry is None:
+            self.log_message("Nothing to redo")
+            return None
+        self._apply_journal_entry(entry, 1)
+        self.log_message(
+            f" Redone: {self.get_player_name(entry.player_id)} - {entry.event_type} "
+            f"(Q{entry.quarter} {entry.time_str})"
+        )
+        return entry
+
+    def _apply_journal_entry(self, entry, delta):
+        self._apply_event_delta(entry.player_id, entry.event_type, delta)
+        # An undone event may have ended a possession; chains are rebuilt from the DB when shown
+        self.session.possessions_stale = True
+        if delta < 0:
+            self.timeline.discard(entry.event_id, entry.quarter, entry.time_remaining)
+        else:
+            self.timeline.add(
+                entry.event_id, entry.quarter, entry.time_remaining, entry.player_id, entry.event_type
+            )
+        if entry.event_type in self.CRITICAL_EVENTS:
+            if delta < 0:
+                self.critical_events.discard(entry.quarter, entry.event_id)
+            else:
+                self.critical_events.add(
+                    entry.quarter, entry.time_remaining, intern_player(entry.player_id),
+                    entry.event_type, entry.time_str, entry.event_id
+                )
+        self.db.submit(
+            lambda conn: self.season.apply_event_delta(
+                entry.match_id, entry.event_id, entry.player_id, entry.event_type, delta
+            )
+        )
+        if self.match_log:
+            action = "UNDO" if delta < 0 else "REDO"
+            self.match_log.write(
+                f"{entry.time_str}\tQ{entry.quarter}\t{action}\t\t"
+                f"{self.get_player_name(entry.player_id)}\t\t{entry.event_type}\n"
+            )
+        self.update_stats_display()
+
+    def show_critical_popup(self):
+        if self.critical_events:
+            evs = self.critical_events.rows()
+            lines = [
+                f"Q{e.quarter} {e.time_str}\t| {self.get_player_name(e.player_id)}\t| {e.event}"
+                for e in evs
+            ]
+        else:
+            lines = ["No critical events recorded yet.", ""]
+        self._show_text_popup('critical', lines)
+
+    def show_diagnostics_popup(self):
+        content = BoxLayout(orientation='vertical')
+        text = TextInput(text="\n".join(self.diagnostics.report_lines()),
+                         readonly=True, multiline=True)
+        content.add_widget(text)
+
+        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        toggle_btn = Button(text="Disable" if self.diagnostics.enabled else "Enable")
+        reset_btn = Button(text="Reset")
+        save_btn = Button(text="Save")
+        close_btn = Button(text="Close")
+        for b in (toggle_btn, reset_btn, save_btn, close_btn):
+            btn_row.add_widget(b)
+        content.add_widget(btn_row)
+        popup = Popup(title=" Diagnostics", content=content, size_hint=(0.9, 0.8))
+
+        def refresh():
+            toggle_btn.text = "Disable" if self.diagnostics.enabled else "Enable"
+            text.text = "\n".join(self.diagnostics.report_lines())
+
+        def on_toggle(*_):
+            self.diagnostics.enabled = not self.diagnostics.enabled
+            refresh()
+
+        def on_reset(*_):
+            self.diagnostics.reset()
+            refresh()
+
+        def on_save(*_):
+            path = self.write_diagnostics()
+            text.text = "\n".join(self.diagnostics.report_lines() + ["", f"Saved: {path}"])
+
+        toggle_btn.bind(on_press=on_toggle)
+        reset_btn.bind(on_press=on_reset)
+        save_btn.bind(on_press=on_save)
+        close_btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    def write_diagnostics(self, session=None):
+        """Write the latency histograms to data_dir/diagnostics_<match code>.json."""
+        if not self.diagnostics.histograms:
+            return None
+        s = session or self.session
+        code = s.match_code or datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.data_dir, f"diagnostics_{code}.json")
+        return self.diagnostics.write(path, match_code=s.match_code, match_id=s.match_id)
+
+    @timed('tap_to_log')
+    def event_clicked(self, event_name):
+        if event_name in DEFENSIVE:
+            self.pending_defensive_event = event_name
+            if self.ball_label:
+                self.ball_label.text = f" Select defender for {event_name}"
+            self.log_message(f" Waiting for defender... ({event_name})")
+            return
+
+        if event_name in STOPPAGES:
+            self.log_event("GAME", event_name)
+            self._halt_clock()
+            self.auto_paused = True
+            if self.pause_btn:
+                self.pause_btn.disabled = True
+            if self.play_btn:
+                self.play_btn.disabled = False
+            self._move_ball(None)
+            if self.ball_label:
+                self.ball_label.text = " No ball"
+            self.update_clock_display()
+            self.log_message(f" || Auto-paused: {event_name}")
+            self.update_stats_display()
+            return
+
+        if not self.ball_holder:
+            self.log_message("X Select player first!")
+            return
+
+        pid = self.ball_holder
+        self.log_event(pid, event_name)
+
+        if event_name in AUTO_PAUSE and self.game_running:
+            self._halt_clock()
+            self.auto_paused = True
+            if self.pause_btn:
+                self.pause_btn.disabled = True
+            if self.play_btn:
+                self.play_btn.disabled = False
+            self.update_clock_display()
+            self.log_message(f" || Auto-pause: {event_name}")
+
+        if event_name == 'Goal':
+            self.match_clock.reset_shot_clock()
+            self._move_ball(None)
+            if self.ball_label:
+                self.ball_label.text = " No ball"
+
+        self.log_message(
+            f" {self.get_player_name(pid)} - {event_name} (Q{self.current_quarter})"
+        )
+        self.update_stats_display()
+
+    def _apply_event_delta(self, player_id, event_type, delta):
+        """Live counters for one event: +1 when logged / redone, -1 when undone."""
+        self.stats[player_id][event_type] += delta
+        self.stats_table.add(player_id, event_type, delta)
+
+        if event_type == 'Goal':
+            team = TEAM_OF_ID.get(player_id)
+            if team == 'Home':
+                self.home_score += delta
+            elif team == 'Away':
+                self.away_score += delta
+            Clock.schedule_once(lambda dt: self.update_score_display())
+
+    @timed('log_event')
+    def log_event(self, player_id, event_type):
+        self._apply_event_delta(player_id, event_type, 1)
+
+        match_code = getattr(self, 'current_match_code', '')
+        # The id is allocated here, so the writer thread never has to be waited on for it
+        event_id = self.db.next_id('events')
+        self.db.execute("""
+            INSERT INTO events
+            (event_id, match_id, match_code, player_id, event_type, quarter,
+             time_remaining, timestamp, possession_team, ball_holder)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            event_id, self.current_match_id, match_code, player_id, event_type,
+            self.current_quarter, self.time_remaining, time.time(),
+            getattr(self, 'possession_team', ''), self.ball_holder
+        ))
+
+        time_str = self.match_clock.display()
+        entry = JournalEntry(
+            self.current_match_id, event_id, player_id, event_type,
+            self.current_quarter, self.time_remaining, time_str
+        )
+        self.undo_journal.record(entry)
+        self.update_undo_buttons()
+        self._add_segment(self.session.possession_builder.event(
+            self.current_match_id, self.current_quarter, self.time_remaining, player_id, event_type
+        ))
+        self.timeline.add(event_id, self.current_quarter, self.time_remaining, player_id, event_type)
+        if event_type in self.CRITICAL_EVENTS:
+            # Now, not deferred: undo / redo discard and re-add it synchronously
+            self.log_critical_event(player_id, event_type, entry)
+
+        if self.match_log:
+            q = f"Q{self.current_quarter}"
+            team = getattr(self, 'possession_team', '')
+            name = self.get_player_name(player_id)
+            self.match_log.write(f"{time_str}\t{q}\t{team}\t\t{name}\t\t{event_type}\n")
+
+    @timed('ui_refresh')
+    def update_stats_display(self):
+        if not self.stats_text:
+            return
+        self.stats_text.text = self.stats_table.render()
+
+    def generate_quarter_report(self, session=None):
+        s = session or self.session
+        q = s.current_quarter
+        evs = s.critical_events.rows(q)
+        if not evs:
+            self.log_message(f" Q{q} Report: No critical events", s)
+            return
+
+        counts, teams = s.critical_events.counts(q)
+        home_c, away_c = teams['Home'], teams['Away']
+
+        report = f" Q{q} Report: {len(evs)} critical events (H:{home_c} A:{away_c})"
+        top = counts.most_common(3)
+        if top:
+            report += " | " + ", ".join(f"{t[0]}:{t[1]}" for t in top)
+        self.log_message(f" {report.lstrip()}", s)
+
+        if s.match_log:
+            lines = [f"\n--- Q{q} SUMMARY: {report} ---\n"]
+            for e in evs:
+                lines.append(f"  {e.time_str} {self.get_player_name(e.player_id)} {e.event}\n")
+            s.match_log.write("".join(lines))
+
+    # ------------ Popups: names, reports ------------
+
+    def _simple_popup(self, title, message):
+        content = BoxLayout(orientation='vertical')
+        content.add_widget(Label(text=message))
+        btn = Button(text="OK", size_hint_y=None, height='40dp')
+        content.add_widget(btn)
+        popup = Popup(title=title, content=content, size_hint=(0.8, 0.4), auto_dismiss=False)
+        btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    # -------------- POPUP CACHE ----------------
+
+    # key -> (title, size_hint, header) for the read-only text dialogs
+    TEXT_POPUPS = {
+        'critical': (" Critical Events Log", (0.9, 0.8),
+                     "Critical Events (Goals/P.Lost/E.Lost/Yellow/Red/Wrap/Timeout)"),
+        'report': (" Match Report", (0.9, 0.9), None),
+        'breakdown': (" Player Breakdown", (0.9, 0.9), None),
+    }
+
+    def _get_popup(self, key):
+        """Return the cached dialog for key, building it on first use."""
+        popup = self._popups.get(key)
+        if popup is None:
+            if key == 'names':
+                popup = self._build_names_popup()
+            elif key == 'timeline':
+                popup = self._build_timeline_popup()
+            else:
+                popup = self._build_text_popup(*self.TEXT_POPUPS[key])
+            self._popups[key] = popup
+        return popup
+
+    def _prebuild_popups(self, *_):
+        # Idle time after startup: pay the widget construction before the first tap
+        for key in ['names', 'timeline'] + list(self.TEXT_POPUPS):
+            self._get_popup(key)
+
+    def _build_text_popup(self, title, size_hint, header=None):
+        content = BoxLayout(orientation='vertical')
+        if header:
+            content.add_widget(Label(text=header, size_hint_y=None, height='30dp'))
+        text = TextInput(readonly=True, multiline=True)
+        content.add_widget(text)
+        btn = Button(text="Close", size_hint_y=None, height='40dp')
+        content.add_widget(btn)
+        popup = Popup(title=title, content=content, size_hint=size_hint)
+        btn.bind(on_press=popup.dismiss)
+        popup.text_input = text
+        return popup
+
+    def _show_text_popup(self, key, lines):
+        popup = self._get_popup(key)
+        popup.text_input.text = "\n".join(lines)
+        popup.text_input.cursor = (0, 0)
+        popup.open()
+
+    def new_match_dialog(self):
+        if self.names_required and not self.player_names_complete:
+            self._simple_popup(
+                " Names Required",
+                "Please enter and save all 26 player names first ( Names)."
+            )
+            return
+
+        content = BoxLayout(orientation='vertical', spacing=5, padding=5)
+        content.add_widget(Label(text="New Match", size_hint_y=None, height='30dp'))
+        content.add_widget(Label(text="Home Team:", size_hint_y=None, height='24dp'))
+        home_entry = TextInput(text="Loughborough", multiline=False)
+        content.add_widget(home_entry)
+        content.add_widget(Label(text="Away Team:", size_hint_y=None, height='24dp'))
+        away_entry = TextInput(text="", multiline=False)
+        content.add_widget(away_entry)
+
+        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        ok_btn = Button(text="OK")
+        cancel_btn = Button(text="Cancel")
+        btn_row.add_widget(ok_btn)
+        btn_row.add_widget(cancel_btn)
+        content.add_widget(btn_row)
+
+        popup = Popup(title=" New Match", content=content,
+                      size_hint=(0.8, 0.5), auto_dismiss=False)
+
+        def on_ok(*_):
+            home = home_entry.text.strip() or "Home"
+            away = away_entry.text.strip() or "Away"
+            self.start_new_match(home, away)
+            popup.dismiss()
+
+        ok_btn.bind(on_press=on_ok)
+        cancel_btn.bind(on_press=lambda *_: popup.dismiss())
+        popup.open()
+
+    def start_new_match(self, home_team, away_team):
+        now = datetime.now()
+        match_code = self._unique_match_code(now)
+        date_str = now.strftime("%Y-%m-%d %H:%M")
+        final_score = ""
+        self.flush_pool_time()
+        match_id = self.db.next_id('matches')
+        self.db.execute("""
+            INSERT INTO matches (match_id, match_code, date, home_team, away_team, final_score)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (match_id, match_code, date_str, home_team, away_team, final_score))
+        if self.current_match_id is None:
+            # The first match takes over the blank session (a lineup may already be set)
+            self.session.match_id = match_id
+            self.session.match_code = match_code
+            self.session.home_team, self.session.away_team = home_team, away_team
+            self.sessions[match_id] = self.session
+        else:
+            # Any other open match keeps running in the background
+            self.session = self._new_session(match_id, match_code, home_team, away_team)
+
+        self._open_match_log(
+            os.path.join(self.data_dir, f"match_{match_code}.log"), mode="w",
+            header=f"Match: {home_team} vs {away_team} ({date_str})\n"
+        )
+
+        self.reset_quarter()
+        self.reset_scores()
+        self.refresh_displays()
+        self.log_message(f" New match started: {home_team} vs {away_team} (code {match_code})")
+
+    def _unique_match_code(self, now):
+        """
+        Timestamp code for a new match. Matches started in the same second get _2, _3...:
+        the code is UNIQUE in matches and names the match's .log file.
+        """
+        base = now.strftime("%Y%m%d_%H%M%S")
+        # Open sessions cover matches whose INSERT is still queued for the writer
+        taken = {s.match_code for s in self._all_sessions()}
+        reader = self.db.reader()
+        code, n = base, 1
+        while (code in taken
+               or os.path.exists(os.path.join(self.data_dir, f"match_{code}.log"))
+               or reader.execute("SELECT 1 FROM matches WHERE match_code = ?", (code,)).fetchone()):
+            n += 1
+            code = f"{base}_{n}"
+        return code
+
+    def edit_names(self):
+        """
+        Kivy replacement for the tkinter 'Names' dialog:
+        - 2 columns of 14 for Home (H-Player1..14) and Away (A-Player1..14)
+        - Number + Name fields, saved to players table.
+        - The dialog is built once; opening it only refreshes the fields.
+        """
+        popup = self._get_popup('names')
+        for pid, num_input, name_input in self._name_inputs_home + self._name_inputs_away:
+            num_input.text = str(NUMBER_OF[intern_player(pid)])
+            name_input.text = self.player_names.get(pid, "")
+        popup.open()
+
+    def _build_names_popup(self):
+        content = BoxLayout(orientation='vertical', spacing=5, padding=5)
+        content.add_widget(Label(text="Edit Player Names", size_hint_y=None, height='30dp'))
+
+        grids_row = BoxLayout(orientation='horizontal')
+        for team, inputs in (("Home", self._name_inputs_home), ("Away", self._name_inputs_away)):
+            box = BoxLayout(orientation='vertical')
+            box.add_widget(Label(text=team, size_hint_y=None, height='24dp'))
+            grid = GridLayout(cols=3, size_hint_y=None)
+            grid.bind(minimum_height=grid.setter('height'))
+            del inputs[:]
+            for i, pid in enumerate(TEAM_PLAYER_IDS[team]):
+                num = i + 1
+                grid.add_widget(Label(text=str(num), size_hint_y=None, height='28dp'))
+                num_input = TextInput(text=str(num), multiline=False, size_hint_y=None, height='28dp')
+                name_input = TextInput(multiline=False, size_hint_y=None, height='28dp')
+                inputs.append((pid, num_input, name_input))
+                grid.add_widget(num_input)
+                grid.add_widget(name_input)
+            box.add_widget(grid)
+            grids_row.add_widget(box)
+        content.add_widget(grids_row)
+
+        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        save_btn = Button(text="Save All")
+        cancel_btn = Button(text="Cancel")
+        btn_row.add_widget(save_btn)
+        btn_row.add_widget(cancel_btn)
+        content.add_widget(btn_row)
+
+        popup = Popup(title=" Player Names", content=content,
+                      size_hint=(0.95, 0.9), auto_dismiss=False)
+        save_btn.bind(on_press=lambda *_: self._save_names(popup))
+        cancel_btn.bind(on_press=lambda *_: popup.dismiss())
+        return popup
+
+    def _save_names(self, popup):
+        rows = []
+        for team, inputs in (("Home", self._name_inputs_home), ("Away", self._name_inputs_away)):
+            for pid, num_in, name_in in inputs:
+                name = name_in.text.strip()
+                num = int(num_in.text.strip() or "0")
+                if name:
+                    rows.append((pid, num, name, team))
+
+        def replace_players(conn):
+            # Clear existing players to avoid duplicates
+            conn.execute("DELETE FROM players")
+            conn.executemany(
+                "INSERT OR REPLACE INTO players (player_id, number, name, team) "
+                "VALUES (?, ?, ?, ?)", rows
+            )
+
+        self.db.submit(replace_players)
+        self.player_names = {pid: name for pid, _, name, _ in rows}
+        # Every open match renders names; background tables re-render when switched to
+        for session in self._all_sessions():
+            session.stats_table.invalidate()
+
+        # Check completeness
+        home_ok = all(pid in self.player_names for pid in TEAM_PLAYER_IDS['Home'])
+        away_ok = all(pid in self.player_names for pid in TEAM_PLAYER_IDS['Away'])
+        self.player_names_complete = home_ok and away_ok
+        popup.dismiss()
+
+        msg = " All 26 names saved." if self.player_names_complete \
+              else "Names saved, but some players are still missing."
+        self._simple_popup("Names Saved", msg)
+
+    def generate_report(self):
+        """
+        Simple match report popup:
+        - For current match: total events, goals per team.
+        - Top 10 players by goals.
+        """
+        if not self.current_match_id:
+            self._simple_popup("Report", "Start a match first.")
+            return
+        # Shown once this match's queued events are committed; the UI thread does not wait
+        self._when_written(self._show_report, self.session)
+
+    def _show_report(self, session):
+        if session is not self.session:
+            return
+        cur = self.db.reader().cursor()
+        cur.execute("SELECT home_team, away_team, final_score FROM matches WHERE match_id=?",
+                    (self.current_match_id,))
+        m = cur.fetchone()
+        if m:
+            home_team, away_team, final_score = m
+        else:
+            home_team = "Home"
+            away_team = "Away"
+            final_score = ""
+
+        # Count events by type and team (cached; only rows added since the last report are read)
+        counts = self.report_cache.get(self.db.reader(), self.current_match_id).counts
+
+        goals_home = goals_away = 0
+        player_goals = defaultdict(int)
+        event_counts = Counter()
+
+        for (pid, ev), c in counts.items():
+            event_counts[ev] += c
+            if ev == 'Goal':
+                player_goals[pid] += c
+                team = TEAM_OF_ID.get(pid)
+                if team == 'Home':
+                    goals_home += c
+                elif team == 'Away':
+                    goals_away += c
+
+        lines = []
+        lines.append(f"Match: {home_team} vs {away_team}")
+        if final_score:
+            lines.append(f"Final score: {final_score}")
+        else:
+            lines.append(f"Current score: {goals_home}-{goals_away}")
+
+        lines.append("")
+        lines.append("Event counts:")
+        for ev, c in event_counts.most_common():
+            lines.append(f"  {ev}: {c}")
+        lines.append("")
+        lines.append("Top scorers:")
+        if player_goals:
+            for pid, g in sorted(player_goals.items(), key=lambda x: x[1], reverse=True)[:10]:
+                lines.append(f"  {self.get_player_name(pid)}: {g}")
+        else:
+            lines.append("  No goals yet.")
+        lines.append("")
+        lines.append("Possession:")
+        lines.extend("  " + line for line in self.possession_lines())
+
+        self._show_text_popup('report', lines)
+
+    def show_player_breakdown(self):
+        """
+        Player breakdown popup:
+        - For current match: per-player summary of Goals, Shots, Foul, Excl.Win, etc.
+        """
+        if not self.current_match_id:
+            self._simple_popup("Player Breakdown", "Start a match first.")
+            return
+        self._when_written(self._show_breakdown, self.session)
+
+    def _show_breakdown(self, session):
+        if session is not self.session:
+            return
+        match = self.report_cache.get(self.db.reader(), self.current_match_id)
+        per_player = match.by_player()
+
+        metric_order = ['Goal', 'Shot', 'Pen.Win', 'Excl.Win', 'Foul', 'P.Lost', 'E.Lost', 'Block', 'Save']
+
+        lines = []
+        for pid, evs in sorted(per_player.items(), key=lambda x: self.get_player_name(x[0])):
+            name = self.get_player_name(pid)
+            team = TEAM_OF_ID.get(pid, "Away")
+            lines.append(f"{name} ({team})")
+            totals = []
+            for m in metric_order:
+                if m in evs:
+                    totals.append(f"{m}:{evs[m]}")
+            if totals:
+                lines.append("  " + ", ".join(totals))
+            else:
+                lines.append("  (no events)")
+            lines.append("")
+
+        if not lines:
+            lines = ["No player events recorded yet."]
+
+        self._show_text_popup('breakdown', lines)
+
+
+    def show_timeline(self):
+        """
+        Timeline popup over the current match:
+        - Range: everything in quarter Q between two clock readings (e.g. 5:00 to 3:00).
+        - Before: the N seconds leading up to each event of a type (e.g. E.Lost).
+        """
+        popup = self._get_popup('timeline')
+        if not popup.q_input.text:
+            popup.q_input.text = str(self.current_quarter)
+        self._run_timeline_query(popup, 'range')
+        popup.open()
+
+    def _build_timeline_popup(self):
+        content = BoxLayout(orientation='vertical', spacing=5, padding=5)
+        fields = BoxLayout(orientation='horizontal', size_hint_y=None, height='36dp')
+        inputs = {}
+        for key, label, default in (('q', "Q", ""), ('from', "From", "8:00"), ('to', "To", "0:00"),
+                                    ('event', "Event", "E.Lost"), ('before', "Secs", "20")):
+            fields.add_widget(Label(text=label, size_hint_x=0.08))
+            inputs[key] = TextInput(text=default, multiline=False)
+            fields.add_widget(inputs[key])
+        content.add_widget(fields)
+
+        text = TextInput(readonly=True, multiline=True)
+        content.add_widget(text)
+
+        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        range_btn = Button(text="Range")
+        before_btn = Button(text="Before event")
+        close_btn = Button(text="Close")
+        for b in (range_btn, before_btn, close_btn):
+            btn_row.add_widget(b)
+        content.add_widget(btn_row)
+
+        popup = Popup(title=" Timeline", content=content, size_hint=(0.95, 0.9))
+        popup.text_input = text
+        popup.q_input = inputs['q']
+        popup.inputs = inputs
+        range_btn.bind(on_press=lambda *_: self._run_timeline_query(popup, 'range'))
+        before_btn.bind(on_press=lambda *_: self._run_timeline_query(popup, 'before'))
+        close_btn.bind(on_press=popup.dismiss)
+        return popup
+
+    def _timeline_line(self, e):
+        return f"Q{e.quarter} {e.clock()}\t| {self.get_player_name(e.player_id)}\t| {e.event_type}"
+
+    def _run_timeline_query(self, popup, mode):
+        inputs = popup.inputs
+        try:
+            if mode == 'range':
+                quarter = int(inputs['q'].text or self.current_quarter)
+                rows = self.timeline.quarter_range(
+                    quarter, parse_clock(inputs['from'].text or "8:00"),
+                    parse_clock(inputs['to'].text or "0:00")
+                )
+                lines = [self._timeline_line(e) for e in rows] or ["No events in that range."]
+            else:
+                event_type = inputs['event'].text.strip()
+                before = float(inputs['before'].text or 20)
+                lines = []
+                for anchor, rows in self.timeline.windows(event_type, before):
+                    lines.append(f"--- {self._timeline_line(anchor)}")
+                    lines.extend("    " + self._timeline_line(e) for e in rows if e is not anchor)
+                if not lines:
+                    lines = [f"No {event_type} events."]
+        except ValueError:
+            lines = ["Quarter must be a number, times m:ss or seconds."]
+        popup.text_input.text = "\n".join(lines)
+        popup.text_input.cursor = (0, 0)
+
+    def show_season_report(self):
+        """
+        Season report popup:
+        - Team table (played, W/D/L, goals, conversion, exclusion differential).
+        - Top players across every match (goals, conversion, exclusions won, minutes).
+        - Per-quarter team conversion, saves per shot faced and exclusion differential.
+        """
+        self.flush_pool_time()
+        # Only the summary refresh writes; the report is read on the reader thread once it is
+        # committed, and the popup opens when it is ready
+        self.db.submit(lambda conn: self.season.refresh())
+        self.db.read(self._season_report_lines, on_done=self._on_ui(self._show_season_popup))
+
+    def _season_report_lines(self, conn):
+        # Runs on the reader thread, in one snapshot
+        teams = team_sheet(conn)
+        return SeasonAnalytics(conn).report_lines(self.get_player_name) + [""] + teams.lines()
+
+    def _show_season_popup(self, lines):
+        content = BoxLayout(orientation='vertical')
+        text = TextInput(text="\n".join(lines), readonly=True, multiline=True)
+        content.add_widget(text)
+        btn_row = BoxLayout(orientation='horizontal', size_hint_y=None, height='40dp')
+        csv_btn = Button(text="Export CSV")
+        jsonl_btn = Button(text="Export JSONL")
+        btn = Button(text="Close")
+        btn_row.add_widget(csv_btn)
+        btn_row.add_widget(jsonl_btn)
+        btn_row.add_widget(btn)
+        content.add_widget(btn_row)
+        popup = Popup(title=" Season Report", content=content, size_hint=(0.9, 0.9))
+        csv_btn.bind(on_press=lambda *_: self.export_season('csv'))
+        jsonl_btn.bind(on_press=lambda *_: self.export_season('jsonl'))
+        btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    def export_season(self, fmt='csv', **filters):
+        """
+        Export every match (or a filtered subset) to data_dir/exports. The export streams
+        on the reader thread, after the queued writes; returns its ticket.
+        """
+        self.flush_pool_time()
+        out_dir = os.path.join(self.data_dir, "exports")
+        prefix = datetime.now().strftime("export_%Y%m%d_%H%M%S")
+
+        def exported(written):
+            total = sum(written.values())
+            self.log_message(f" Exported {total} rows ({fmt}) to {out_dir}")
+
+        return self.db.read(
+            lambda conn: export_matches(conn, out_dir, fmt, prefix=prefix, **filters),
+            on_done=self._on_ui(exported)
+        )
+
+class WaterPoloKivyApp(App):
+    def build(self):
+        root = WaterPoloRoot()
+        controller = WaterPoloTrackerController(root)
+        root.controller = controller
+        return root
+
+    def on_pause(self):
+        # Android may kill a paused app without calling on_stop
+        if self.root and self.root.controller:
+            self.root.controller.flush_pending()
+        return True
+
+    def on_stop(self):
+        if self.root and self.root.controller:
+            self.root.controller.shutdown()
+
+
+if __name__ == "__main__":
+    WaterPoloKivyApp().run()
@@ -0,0 +1,134 @@
+import math
+import time
+
+
+class ManualTimeSource:
+    """
+    Settable time source for driving a MatchClock headless / faster than real time:
+        t = ManualTimeSource(); clock = MatchClock(time_source=t)
+        clock.start(); t.advance(12.5); clock.poll()
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+
+class MatchClock:
+    """
+    Game clock / shot clock engine with no Kivy dependency.
+    - Time is read from a monotonic time source, so the game clock never drifts from
+      the wall clock and pause/resume keeps fractional seconds.
+    - The clock is passive: whoever drives it calls poll() (ideally every resolution seconds).
+    - Callbacks:
+        on_tick(clock, dt)      game time consumed since the last poll / pause
+        on_quarter_end(clock)   remaining reached 0 (the clock stops itself)
+        on_shot_clock(clock)    shot clock reached 0 (fires once per reset)
+    """
+
+    def __init__(self, quarter_length=480.0, shot_clock_length=30.0, resolution=0.1,
+                 time_source=time.monotonic,
+                 on_tick=None, on_quarter_end=None, on_shot_clock=None):
+        self.quarter_length = float(quarter_length)
+        self.shot_clock_length = float(shot_clock_length)
+        self.resolution = resolution
+        self.time_source = time_source
+
+        self.on_tick = on_tick
+        self.on_quarter_end = on_quarter_end
+        self.on_shot_clock = on_shot_clock
+
+        self.remaining = self.quarter_length
+        self.shot_remaining = self.shot_clock_length
+        self.running = False
+        self._anchor = None
+
+    # ------------ Control ------------
+
+    def start(self):
+        if self.running or self.remaining <= 0:
+            return False
+        self.running = True
+        self._anchor = self.time_source()
+        return True
+
+    def pause(self):
+        if not self.running:
+            return 0.0
+        dt = self.poll()
+        self.running = False
+        self._anchor = None
+        return dt
+
+    def set_remaining(self, seconds):
+        """Set the game clock (adjustments, new quarter). Accrued time is accounted first."""
+        if self.running:
+            self.poll()
+        self.remaining = max(0.0, float(seconds))
+
+    def adjust(self, seconds):
+        self.set_remaining(self.remaining + seconds)
+
+    def reset(self, remaining=None):
+        self.pause()
+        self.remaining = self.quarter_length if remaining is None else max(0.0, float(remaining))
+        self.reset_shot_clock()
+
+    def reset_shot_clock(self, seconds=None):
+        self.shot_remaining = self.shot_clock_length if seconds is None else float(seconds)
+
+    # ------------ Driving ------------
+
+    def poll(self):
+        """Consume the time elapsed since the last poll; returns the game seconds consumed."""
+        if not self.running:
+            return 0.0
+        now = self.time_source()
+        dt = now - self._anchor
+        if dt <= 0:
+            return 0.0
+        self._anchor = now
+
+        # Never count past the end of the quarter
+        dt = min(dt, self.remaining)
+        self.remaining -= dt
+
+        shot_expired = False
+        if self.shot_remaining > 0:
+            self.shot_remaining = max(0.0, self.shot_remaining - dt)
+            shot_expired = self.shot_remaining == 0
+
+        if self.on_tick:
+            self.on_tick(self, dt)
+        if shot_expired and self.on_shot_clock:
+            self.on_shot_clock(self)
+
+        if self.remaining <= 0:
+            self.remaining = 0.0
+            self.running = False
+            self._anchor = None
+            if self.on_quarter_end:
+                self.on_quarter_end(self)
+        return dt
+
+    # ------------ Readout ------------
+
+    @property
+    def tenths(self):
+        """Remaining game time in whole tenths, rounded up (what a scoreboard shows)."""
+        return int(math.ceil(round(self.remaining * 10, 6)))
+
+    @property
+    def display_seconds(self):
+        """Remaining game time in whole seconds, rounded up: 8:00 shows until a full second has run."""
+        return int(math.ceil(self.tenths / 10))
+
+    def display(self):
+        mins, secs = divmod(self.display_seconds, 60)
+        return f"{mins}:{secs:02d}"
@@ -0,0 +1,140 @@
+"""
+Offline merge of waterpolo.db files from several scoring devices.
+
+The other database is ATTACHed and its matches copied with set-based INSERT ... SELECT,
+all inside one transaction. Matches are de-duplicated by match_code (already present
+means already merged) and every imported row gets its match_id remapped.
+
+    python merge.py waterpolo.db tablet2.db tablet3.db ...
+"""
+import sqlite3
+import sys
+
+import schema
+
+MERGE_STEPS = [
+    ('matches', """
+        INSERT INTO main.matches
+        (match_code, date, home_team, away_team, final_score, clock_quarter, clock_remaining)
+        SELECT s.match_code, s.date, s.home_team, s.away_team, s.final_score, {src_clock}
+        FROM src.matches s JOIN temp.merge_map mm ON mm.src_id = s.match_id
+        ORDER BY s.match_id
+    """),
+    ('map', """
+        UPDATE temp.merge_map SET dst_id = (
+            SELECT d.match_id FROM main.matches d WHERE d.match_code = temp.merge_map.match_code
+        )
+    """),
+    ('events', """
+        INSERT INTO main.events
+        (match_id, match_code, player_id, event_type, quarter,
+         time_remaining, timestamp, possession_team, ball_holder, voided)
+        SELECT mm.dst_id, e.match_code, e.player_id, e.event_type, e.quarter,
+               e.time_remaining, e.timestamp, e.possession_team, e.ball_holder, {src_voided}
+        FROM src.events e JOIN temp.merge_map mm ON mm.src_id = e.match_id
+        ORDER BY e.event_id
+    """),
+    ('match_substitutions', """
+        INSERT INTO main.match_substitutions
+        (match_id, player_id, quarter, time_remaining, action, timestamp)
+        SELECT mm.dst_id, s.player_id, s.quarter, s.time_remaining, s.action, s.timestamp
+        FROM src.match_substitutions s JOIN temp.merge_map mm ON mm.src_id = s.match_id
+        ORDER BY s.rowid
+    """),
+    ('player_pool_time', """
+        INSERT OR IGNORE INTO main.player_pool_time
+        (match_id, player_id, quarter, pool_seconds, substitutions)
+        SELECT mm.dst_id, p.player_id, p.quarter, p.pool_seconds, p.substitutions
+        FROM src.player_pool_time p JOIN temp.merge_map mm ON mm.src_id = p.match_id
+    """),
+    ('player_possession', """
+        INSERT OR IGNORE INTO main.player_possession
+        (match_id, player_id, quarter, possession_seconds)
+        SELECT mm.dst_id, p.player_id, p.quarter, p.possession_seconds
+        FROM src.player_possession p JOIN temp.merge_map mm ON mm.src_id = p.match_id
+    """),
+    ('ball_transfers', """
+        INSERT INTO main.ball_transfers (match_id, quarter, time_remaining, player_id, timestamp)
+        SELECT mm.dst_id, b.quarter, b.time_remaining, b.player_id, b.timestamp
+        FROM src.ball_transfers b JOIN temp.merge_map mm ON mm.src_id = b.match_id
+        ORDER BY b.transfer_id
+    """),
+]
+
+
+def merge_database(conn, other_path):
+    """
+    Import every match of other_path whose match_code is not already in conn.
+    Returns {'matches': n, 'events': n, ..., 'skipped': n} (skipped = already present or no code).
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("ATTACH DATABASE ? AS src", (other_path,))
+    try:
+        counts = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DROP TABLE IF EXISTS temp.merge_map")
+            conn.execute(
+                "CREATE TEMP TABLE merge_map ("
+                "src_id INTEGER PRIMARY KEY, match_code TEXT UNIQUE, dst_id INTEGER)"
+            )
+            conn.execute("""
+                INSERT INTO temp.merge_map (src_id, match_code)
+                SELECT s.match_id, s.match_code FROM src.matches s
+                WHERE s.match_code IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM main.matches d WHERE d.match_code = s.match_code)
+                GROUP BY s.match_code
+            """)
+            # Databases from before the undo journal have no tombstone column
+            src_columns = [r[1] for r in conn.execute("PRAGMA src.table_info(events)")]
+            src_voided = "e.voided" if "voided" in src_columns else "0"
+            # ... nor a stored game clock
+            src_match_columns = [r[1] for r in conn.execute("PRAGMA src.table_info(matches)")]
+            src_clock = (
+                "s.clock_quarter, s.clock_remaining" if "clock_quarter" in src_match_columns
+                else "NULL, NULL"
+            )
+            # ... and databases from before ball transfers were recorded have no such table
+            src_tables = {r[0] for r in conn.execute(
+                "SELECT name FROM src.sqlite_master WHERE type = 'table'"
+            )}
+            for name, sql in MERGE_STEPS:
+                if name == 'ball_transfers' and name not in src_tables:
+                    counts[name] = 0
+                    continue
+                cur = conn.execute(sql.format(src_voided=src_voided, src_clock=src_clock))
+                if name != 'map':
+                    counts[name] = cur.rowcount
+            total = conn.execute("SELECT COUNT(*) FROM src.matches").fetchone()[0]
+            counts['skipped'] = total - counts['matches']
+            conn.execute("DROP TABLE temp.merge_map")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute("DETACH DATABASE src")
+    return counts
+
+
+def merge_databases(conn, paths):
+    return [(path, merge_database(conn, path)) for path in paths]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("usage: python merge.py target.db source.db [source.db ...]")
+        return 2
+    conn = sqlite3.connect(argv[0])
+    schema.configure_connection(conn)
+    schema.migrate(conn)
+    for path, counts in merge_databases(conn, argv[1:]):
+        print(path + ": " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+Season metric sheets computed over dense count arrays.
+
+Live event counts (match_player_quarter_counts, kept by triggers on events) are loaded once
+into arrays of event type x row x column. A row is a player (the roster index from
+players.py) or a team, and the columns are the four quarters plus the season total. Each
+metric is then a few whole-array operations covering every row and quarter at once:
+- conversion: goals / (goals + shots), as a goal is logged instead of a shot
+- excl_diff: exclusions won - exclusions conceded (Excl.Win - E.Lost)
+- save_rate: saves per shot faced, the opponents' goals + shots in the matches the row
+  played (one matrix product of a row x match-side membership matrix and the counts)
+NumPy is used when it is installed. The Android build ships without it and uses
+ArrayBackend instead: flat array('d') planes combined element-wise with map().
+"""
+from array import array
+from collections import defaultdict
+from operator import add, sub
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from players import AWAY_BIT, GAME, PLAYER_IDS, PLAYER_INDEX, TEAM_OF
+
+QUARTERS = 4
+COLUMNS = tuple(f"Q{q}" for q in range(1, QUARTERS + 1)) + ('Season',)
+SEASON = QUARTERS   # column of the season total; quarters outside 1-4 only count here
+
+# Event types loaded per match side, for the team sheet and shots faced
+SIDE_EVENTS = ('Goal', 'Shot', 'Excl.Win', 'E.Lost', 'Save')
+SIDE_FILTER = (
+    "event_type IN ({}) AND (player_id LIKE 'H-%' OR player_id LIKE 'A-%')"
+    .format(", ".join(f"'{ev}'" for ev in SIDE_EVENTS))
+)
+
+# Metric shown in the season report: (name, label, format)
+REPORT_METRICS = (
+    ('conversion', 'Conv', '{:>4.0%}'),
+    ('save_rate', 'Saves/shot', '{:>4.0%}'),
+    ('excl_diff', 'Excl +/-', '{:>+4.0f}'),
+)
+
+
+def _ratio(a, b):
+    return a / b if b else 0.0
+
+
+# ------------ Backends ------------
+
+class ArrayBackend:
+    """
+    Pure Python backend. A plane is one flat array('d') of rows x len(COLUMNS) values;
+    counts are the planes of every event type back to back.
+    """
+    name = 'array'
+    width = len(COLUMNS)
+
+    def counts(self, cells, n_events, n_rows):
+        """cells: (event, row, quarter index, count) -> event x row x column counts."""
+        width = self.width
+        plane = n_rows * width
+        data = array('d', bytes(8 * n_events * plane))
+        for e, r, q, n in cells:
+            base = e * plane + r * width
+            if 0 <= q < QUARTERS:
+                data[base + q] += n
+            data[base + SEASON] += n
+        return data
+
+    def plane(self, counts, e, n_rows):
+        size = n_rows * self.width
+        return counts[e * size:(e + 1) * size]
+
+    def zeros(self, n_rows):
+        return array('d', bytes(8 * n_rows * self.width))
+
+    def membership(self, groups, n_cols):
+        return groups
+
+    def gather(self, groups, plane):
+        """Row r of the result is the sum of the plane rows listed in groups[r]."""
+        width = self.width
+        out = array('d')
+        for group in groups:
+            acc = [0.0] * width
+            for k in group:
+                acc = list(map(add, acc, plane[k * width:(k + 1) * width]))
+            out.extend(acc)
+        return out
+
+    def add(self, a, b):
+        return array('d', map(add, a, b))
+
+    def sub(self, a, b):
+        return array('d', map(sub, a, b))
+
+    def ratio(self, a, b):
+        return array('d', map(_ratio, a, b))
+
+    def rows(self, plane):
+        width = self.width
+        return [plane[i:i + width].tolist() for i in range(0, len(plane), width)]
+
+
+class NumpyBackend:
+    """NumPy backend: counts are one (event, row, column) ndarray, planes are 2-D views."""
+    name = 'numpy'
+    width = len(COLUMNS)
+
+    def counts(self, cells, n_events, n_rows):
+        data = numpy.zeros((n_events, n_rows, self.width))
+        if cells:
+            e, r, q, n = (numpy.array(c) for c in zip(*cells))
+            in_play = (q >= 0) & (q < QUARTERS)
+            numpy.add.at(data, (e[in_play], r[in_play], q[in_play]), n[in_play])
+            numpy.add.at(data, (e, r, SEASON), n)
+        return data
+
+    def plane(self, counts, e, n_rows):
+        return counts[e]
+
+    def zeros(self, n_rows):
+        return numpy.zeros((n_rows, self.width))
+
+    def membership(self, groups, n_cols):
+        m = numpy.zeros((len(groups), n_cols))
+        for r, group in enumerate(groups):
+            m[r, list(group)] = 1.0
+        return m
+
+    def gather(self, m, plane):
+        return m @ plane
+
+    def add(self, a, b):
+        return a + b
+
+    def sub(self, a, b):
+        return a - b
+
+    def ratio(self, a, b):
+        return numpy.divide(a, b, out=numpy.zeros_like(a), where=b != 0)
+
+    def rows(self, plane):
+        return plane.tolist()
+
+
+def default_backend():
+    return NumpyBackend() if numpy is not None else ArrayBackend()
+
+
+# ------------ Sheets ------------
+
+class MetricSheet:
+    """
+    Metric planes for one set of rows (players or teams).
+    - labels: row -> player id / team name (None for unused roster slots)
+    - table(name): {label: [Q1, Q2, Q3, Q4, Season]}
+    """
+
+    def __init__(self, labels, planes, backend, active):
+        self.labels = labels
+        self.planes = planes
+        self.backend = backend
+        self.active = active    # rows with any counted event
+
+    def table(self, name):
+        rows = self.backend.rows(self.planes[name])
+        return {self.labels[r]: rows[r] for r in self.active}
+
+    def lines(self, name_of=str, metrics=REPORT_METRICS):
+        lines = [f"Quarters ({' '.join(COLUMNS[:QUARTERS])} | Season):"]
+        tables = [(label, fmt, self.table(name)) for name, label, fmt in metrics]
+        for r in self.active:
+            key = self.labels[r]
+            lines.append(f"  {name_of(key)[:14]}")
+            for label, fmt, table in tables:
+                values = [fmt.format(v) for v in table[key]]
+                lines.append(f"    {label:10s} {' '.join(values[:QUARTERS])} | {values[SEASON]}")
+        if not self.active:
+            lines.append("  No matches yet.")
+        return lines
+
+
+def _metrics(be, own, faced):
+    goals, shots = own('Goal'), own('Shot')
+    attempts = be.add(goals, shots)
+    excl_won, excl_lost = own('Excl.Win'), own('E.Lost')
+    saves = own('Save')
+    return {
+        'goals': goals, 'attempts': attempts, 'conversion': be.ratio(goals, attempts),
+        'excl_won': excl_won, 'excl_lost': excl_lost, 'excl_diff': be.sub(excl_won, excl_lost),
+        'saves': saves, 'shots_faced': faced, 'save_rate': be.ratio(saves, faced),
+    }
+
+
+def _where(match_ids, clause=""):
+    if match_ids is None:
+        return (f"WHERE {clause}" if clause else ""), ()
+    marks = ", ".join("?" * len(match_ids))
+    return f"WHERE match_id IN ({marks})" + (f" AND {clause}" if clause else ""), tuple(match_ids)
+
+
+class _Sides:
+    """Per match side counts of SIDE_EVENTS (row 2 * match position + 1 for the away side)."""
+
+    def __init__(self, conn, be, match_ids):
+        where, params = _where(match_ids, SIDE_FILTER)
+        self.match_pos, cells = {}, []
+        for event_type, match_id, away, quarter, n in conn.execute(f"""
+            SELECT event_type, match_id, player_id LIKE 'A-%', quarter, SUM(count)
+            FROM match_player_quarter_counts {where}
+            GROUP BY event_type, match_id, 3, quarter
+        """, params):
+            m = self.match_pos.get(match_id)
+            if m is None:
+                m = self.match_pos[match_id] = len(self.match_pos)
+            cells.append((SIDE_EVENTS.index(event_type), 2 * m + away, quarter - 1, n))
+        self.be = be
+        self.n = 2 * len(self.match_pos)
+        self.counts = be.counts(cells, len(SIDE_EVENTS), self.n)
+        self.attempts = be.add(self.plane('Goal'), self.plane('Shot'))
+
+    def plane(self, event_type):
+        return self.be.plane(self.counts, SIDE_EVENTS.index(event_type), self.n)
+
+
+def _player_sheet(conn, be, match_ids, sides):
+    # Every event type, summed over matches along the table's primary key
+    where, params = _where(match_ids)
+    events, player_cells = {}, []
+    for event_type, pid, quarter, n in conn.execute(f"""
+        SELECT event_type, player_id, quarter, SUM(count) FROM match_player_quarter_counts
+        {where} GROUP BY event_type, player_id, quarter
+    """, params):
+        p = PLAYER_INDEX.get(pid)
+        # GAME, missing players ('') and ids off the roster belong to neither team
+        if p is None or TEAM_OF[p] is None:
+            continue
+        e = events.get(event_type)
+        if e is None:
+            e = events[event_type] = len(events)
+        player_cells.append((e, p, quarter - 1, n))
+
+    # Players face the other side of each match they logged an event in
+    where, params = _where(match_ids)
+    opponents = defaultdict(list)
+    for match_id, pid in conn.execute(f"""
+        SELECT match_id, player_id FROM match_player_event_counts {where}
+        GROUP BY match_id, player_id
+    """, params):
+        p = PLAYER_INDEX.get(pid)
+        m = sides.match_pos.get(match_id)
+        if p is not None and TEAM_OF[p] is not None and m is not None:
+            opponents[p].append(2 * m + (0 if p & AWAY_BIT else 1))
+
+    n_players = GAME
+    players = be.counts(player_cells, len(events), n_players)
+
+    def player_plane(event_type):
+        e = events.get(event_type)
+        return be.zeros(n_players) if e is None else be.plane(players, e, n_players)
+
+    player_faced = be.gather(
+        be.membership([opponents.get(p, ()) for p in range(n_players)], sides.n), sides.attempts
+    )
+    active = sorted({p for _, p, _, _ in player_cells})
+    return MetricSheet(PLAYER_IDS[:n_players], _metrics(be, player_plane, player_faced), be, active)
+
+
+def _team_sheet(conn, be, match_ids, sides):
+    # A team's own rows are its sides; the rows it faced are the other side of the same matches
+    where, params = _where(match_ids)
+    names = {
+        match_id: (home or 'Home', away or 'Away') for match_id, home, away in
+        conn.execute(f"SELECT match_id, home_team, away_team FROM matches {where}", params)
+    }
+    pairs = {match_id: names.get(match_id, ('Home', 'Away')) for match_id in sides.match_pos}
+    teams = sorted({name for pair in pairs.values() for name in pair})
+    team_index = {t: i for i, t in enumerate(teams)}
+    own_groups = [[] for _ in teams]
+    against_groups = [[] for _ in teams]
+    for match_id, m in sides.match_pos.items():
+        home, away = team_index[pairs[match_id][0]], team_index[pairs[match_id][1]]
+        own_groups[home].append(2 * m)
+        own_groups[away].append(2 * m + 1)
+        against_groups[home].append(2 * m + 1)
+        against_groups[away].append(2 * m)
+    own = be.membership(own_groups, sides.n)
+    return MetricSheet(
+        teams,
+        _metrics(be, lambda event_type: be.gather(own, sides.plane(event_type)),
+                 be.gather(be.membership(against_groups, sides.n), sides.attempts)),
+        be,
+        list(range(len(teams))),
+    )
+
+
+def season_sheets(conn, match_ids=None, backend=None):
+    """
+    (player sheet, team sheet) over stored matches (all, or match_ids).
+    Player rows are the roster slots summed over every match, as in
+    SeasonAnalytics.player_season(); team rows are the names in matches.
+    """
+    be = backend or default_backend()
+    sides = _Sides(conn, be, match_ids)
+    return _player_sheet(conn, be, match_ids, sides), _team_sheet(conn, be, match_ids, sides)
+
+
+def team_sheet(conn, match_ids=None, backend=None):
+    """The team sheet of season_sheets() alone, without reading or computing player rows."""
+    be = backend or default_backend()
+    return _team_sheet(conn, be, match_ids, _Sides(conn, be, match_ids))
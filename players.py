@@ -0,0 +1,100 @@
+"""
+Compact player identity and match records.
+
+Players are small interned integers: the low four bits are the cap slot (number - 1) and
+AWAY_BIT marks the away team, so H-Player3 is 2 and A-Player3 is 0x12. The string ids
+("H-Player3", "GAME") stay the storage format in the database; PLAYER_INDEX / PLAYER_IDS
+convert between the two, and team / number lookups are plain list indexing.
+"""
+
+TEAMS = ('Home', 'Away')
+ROSTER_SIZE = 14
+AWAY_BIT = 0x10
+GAME = 0x20
+FIRST_EXTRA = GAME + 1
+
+# index -> string id / team / cap number; roster slots 14, 15, 30 and 31 are unused
+PLAYER_IDS = [None] * FIRST_EXTRA
+TEAM_OF = [None] * FIRST_EXTRA
+NUMBER_OF = [None] * FIRST_EXTRA
+PLAYER_INDEX = {}
+
+for _bit, _team in ((0, 'Home'), (AWAY_BIT, 'Away')):
+    for _slot in range(ROSTER_SIZE):
+        _p = _bit | _slot
+        PLAYER_IDS[_p] = f"{_team[0]}-Player{_slot + 1}"
+        TEAM_OF[_p] = _team
+        NUMBER_OF[_p] = _slot + 1
+        PLAYER_INDEX[PLAYER_IDS[_p]] = _p
+PLAYER_IDS[GAME] = "GAME"
+PLAYER_INDEX["GAME"] = GAME
+
+# Roster string ids per team in cap order, for the player button rows
+TEAM_PLAYER_IDS = {
+    team: [PLAYER_IDS[bit | slot] for slot in range(ROSTER_SIZE)]
+    for bit, team in ((0, 'Home'), (AWAY_BIT, 'Away'))
+}
+# string id -> team, for ids read back from the database
+TEAM_OF_ID = {pid: TEAM_OF[p] for pid, p in PLAYER_INDEX.items() if TEAM_OF[p]}
+
+
+def player_index(team, slot):
+    """Index of the player in cap slot (0-13) of team."""
+    return slot | (AWAY_BIT if team == 'Away' else 0)
+
+
+def intern_player(player_id):
+    """
+    Index for a string id; ids outside the roster (merged data, None) get an extra index
+    with no team or number, so every id has exactly one index.
+    """
+    p = PLAYER_INDEX.get(player_id)
+    if p is None:
+        p = len(PLAYER_IDS)
+        PLAYER_IDS.append(player_id)
+        TEAM_OF.append(None)
+        NUMBER_OF.append(None)
+        PLAYER_INDEX[player_id] = p
+    return p
+
+
+# ------------ Records ------------
+
+class CriticalEvent:
+    """One entry of the critical events log."""
+    __slots__ = ('quarter', 'time', 'player', 'event', 'time_str')
+
+    def __init__(self, quarter, time, player, event, time_str):
+        self.quarter = quarter
+        self.time = time
+        self.player = player
+        self.event = event
+        self.time_str = time_str
+
+    @property
+    def player_id(self):
+        return PLAYER_IDS[self.player]
+
+    @property
+    def team(self):
+        return TEAM_OF[self.player]
+
+
+class SubEvent:
+    """One substitution (action 'IN' or 'OUT')."""
+    __slots__ = ('player', 'quarter', 'time_remaining', 'action', 'timestamp')
+
+    def __init__(self, player, quarter, time_remaining, action, timestamp=None):
+        self.player = player
+        self.quarter = quarter
+        self.time_remaining = time_remaining
+        self.action = action
+        self.timestamp = timestamp
+
+    @property
+    def player_id(self):
+        return PLAYER_IDS[self.player]
+
+    @property
+    def team(self):
+        return TEAM_OF[self.player]
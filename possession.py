@@ -0,0 +1,209 @@
+"""
+Possession chains from ball transfers and events.
+
+Every change of ball holder is a ball_transfers row (player_id NULL when the ball goes
+dead). SegmentBuilder folds transfers and events, in time order, into possession segments:
+one team holding the ball, the chain of holders (who passed to whom) and how it ended.
+- An event in event_types.POSSESSION_ENDS by the team in possession ends its segment.
+- So does the ball reaching the other team ('Turnover'), going dead ('Dead ball') or the
+  quarter changing ('Quarter end').
+The builder keeps only the open segment, so the same code runs live (fed by the controller)
+and over a season (build_segments(stream_possession_rows(conn))), one match at a time.
+"""
+from collections import Counter, defaultdict
+
+from event_types import POSSESSION_ENDS
+from players import TEAM_OF_ID
+from timeline import QUARTER_LENGTH, match_time
+
+_EVENT = 0
+_TRANSFER = 1
+
+TURNOVER = 'Turnover'
+DEAD_BALL = 'Dead ball'
+QUARTER_END = 'Quarter end'
+OPEN = 'Open'
+
+
+class PossessionSegment:
+    """One team's spell on the ball; start / end are match times (seconds since Q1 start)."""
+    __slots__ = ('match_id', 'team', 'quarter', 'start', 'end', 'players', 'end_reason', 'end_player')
+
+    def __init__(self, match_id, team, quarter, start, player_id):
+        self.match_id = match_id
+        self.team = team
+        self.quarter = quarter
+        self.start = start
+        self.end = start
+        self.players = [player_id]
+        self.end_reason = None
+        self.end_player = None
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    @property
+    def passes(self):
+        return len(self.players) - 1
+
+    def transfers(self):
+        """(from, to) for each pass in the chain."""
+        return list(zip(self.players, self.players[1:]))
+
+
+class SegmentBuilder:
+    """
+    Streaming possession segment builder.
+    transfer() / event() take one row each, in time order, and return the segment that
+    row closed (or None); finish() closes the open one at the end of the stream.
+    """
+
+    def __init__(self, quarter_length=QUARTER_LENGTH):
+        self.quarter_length = quarter_length
+        self.current = None
+        self.last_time = 0.0
+
+    def _close(self, end, reason, player_id=None):
+        seg = self.current
+        self.current = None
+        seg.end = max(end, seg.start)
+        seg.end_reason = reason
+        seg.end_player = player_id
+        return seg
+
+    def _roll_over(self, match_id, quarter):
+        # A row of another match or quarter: the open segment ended with what it belonged to
+        seg = self.current
+        if seg.match_id != match_id:
+            return self._close(self.last_time, OPEN)
+        if seg.quarter != quarter:
+            return self._close(match_time(seg.quarter, 0.0, self.quarter_length), QUARTER_END)
+        return None
+
+    def transfer(self, match_id, quarter, time_remaining, player_id):
+        t = match_time(quarter, time_remaining, self.quarter_length)
+        closed = self._roll_over(match_id, quarter) if self.current else None
+        self.last_time = t
+        seg = self.current
+        if player_id is None:
+            if seg:
+                closed = self._close(t, DEAD_BALL)
+            return closed
+        team = TEAM_OF_ID.get(player_id)
+        if seg and seg.team != team:
+            closed = self._close(t, TURNOVER)
+            seg = None
+        if seg is None:
+            self.current = PossessionSegment(match_id, team, quarter, t, player_id)
+        elif seg.players[-1] != player_id:
+            seg.players.append(player_id)
+            seg.end = t
+        return closed
+
+    def event(self, match_id, quarter, time_remaining, player_id, event_type):
+        t = match_time(quarter, time_remaining, self.quarter_length)
+        closed = self._roll_over(match_id, quarter) if self.current else None
+        self.last_time = t
+        seg = self.current
+        if seg is None:
+            return closed
+        seg.end = max(seg.end, t)
+        if event_type in POSSESSION_ENDS and TEAM_OF_ID.get(player_id) == seg.team:
+            closed = self._close(t, event_type, player_id)
+        return closed
+
+    def finish(self):
+        if self.current is None:
+            return None
+        return self._close(self.last_time, OPEN)
+
+
+def stream_possession_rows(conn, match_ids=None):
+    """
+    Yield (match_id, kind, quarter, time_remaining, player_id, event_type) for each match,
+    transfers and live events merged in time order by SQLite, one match's cursor at a time.
+    Events sort before a transfer logged at the same instant (a Goal, then the dead ball).
+    """
+    if match_ids is None:
+        match_ids = [r[0] for r in conn.execute("SELECT match_id FROM matches ORDER BY match_id")]
+    for match_id in match_ids:
+        yield from conn.execute(f"""
+            SELECT match_id, {_EVENT}, quarter, time_remaining, player_id, event_type,
+                   COALESCE(timestamp, 0) AS ts, event_id AS row_id
+            FROM events WHERE match_id = ? AND voided = 0
+            UNION ALL
+            SELECT match_id, {_TRANSFER}, quarter, time_remaining, player_id, NULL,
+                   COALESCE(timestamp, 0), transfer_id
+            FROM ball_transfers WHERE match_id = ?
+            ORDER BY ts, 2, row_id
+        """, (match_id, match_id))
+
+
+def build_segments(rows, quarter_length=QUARTER_LENGTH, builder=None, finish=True):
+    """
+    One pass over stream_possession_rows() output; yields segments as they close.
+    finish=False leaves the last segment open in builder (e.g. to keep feeding it live).
+    """
+    builder = builder or SegmentBuilder(quarter_length)
+    transfer = builder.transfer
+    event = builder.event
+    for match_id, kind, quarter, remaining, pid, event_type, *_ in rows:
+        if kind == _TRANSFER:
+            seg = transfer(match_id, quarter, remaining, pid)
+        else:
+            seg = event(match_id, quarter, remaining, pid, event_type)
+        if seg is not None:
+            yield seg
+    if finish:
+        seg = builder.finish()
+        if seg is not None:
+            yield seg
+
+
+class PossessionSummary:
+    """Running totals over segments, per key (team side, or team name for a season)."""
+
+    def __init__(self):
+        self.possessions = Counter()
+        self.seconds = defaultdict(float)
+        self.passes = Counter()
+        self.ends = defaultdict(Counter)
+        self.links = defaultdict(Counter)   # key -> (from, to) -> passes
+
+    def add(self, seg, key=None):
+        key = seg.team if key is None else key
+        self.possessions[key] += 1
+        self.seconds[key] += seg.duration
+        self.passes[key] += seg.passes
+        self.ends[key][seg.end_reason] += 1
+        self.links[key].update(seg.transfers())
+
+    def lines(self, name_of=str, top_links=3):
+        total = sum(self.seconds.values())
+        lines = []
+        for key in sorted(self.possessions, key=str):
+            n = self.possessions[key]
+            share = self.seconds[key] / total * 100 if total else 0.0
+            lines.append(
+                f"{key}: {n} possessions, {share:.0f}% of the ball, "
+                f"{self.passes[key] / n:.1f} passes each"
+            )
+            lines.append("  ends: " + ", ".join(
+                f"{reason or 'In play'} {c}" for reason, c in self.ends[key].most_common()
+            ))
+            for (a, b), c in self.links[key].most_common(top_links):
+                lines.append(f"  {name_of(a)} -> {name_of(b)}: {c}")
+        return lines
+
+
+def season_summary(conn, match_ids=None, quarter_length=QUARTER_LENGTH):
+    """PossessionSummary keyed by team name over stored matches, streamed one match at a time."""
+    names = {
+        match_id: {'Home': home or 'Home', 'Away': away or 'Away'}
+        for match_id, home, away in conn.execute("SELECT match_id, home_team, away_team FROM matches")
+    }
+    summary = PossessionSummary()
+    for seg in build_segments(stream_possession_rows(conn, match_ids), quarter_length):
+        summary.add(seg, names.get(seg.match_id, {}).get(seg.team, seg.team))
+    return summary
@@ -0,0 +1,171 @@
+"""
+Headless match replay: rebuilds the controller's live state for a match from the database.
+
+events and match_substitutions rows are streamed in timestamp order and folded through
+a reducer (MatchState.apply_event / apply_sub), which touches nothing but the state object.
+A full replay then takes pool time and the game position from what the live app stored
+(restore()): play goes on after the last event, so the rows alone cannot tell either.
+"""
+from collections import defaultdict
+
+from event_types import CRITICAL_EVENTS
+from critical_store import CriticalEventStore
+from players import SubEvent, TEAM_OF_ID, intern_player
+from timeline import QUARTER_LENGTH
+
+_EVENT = 1
+_SUB = 0
+
+
+def format_game_time(seconds):
+    mins, secs = divmod(int(seconds), 60)
+    return f"{mins}:{secs:02d}"
+
+
+class MatchState:
+    """Same shapes as WaterPoloTrackerController: stats, scores, critical_events, pool_time, sub_events."""
+
+    def __init__(self, match_id=None, quarter_length=QUARTER_LENGTH):
+        self.match_id = match_id
+        self.quarter_length = quarter_length
+
+        self.stats = defaultdict(lambda: defaultdict(int))
+        self.home_score = 0
+        self.away_score = 0
+        self.critical_events = CriticalEventStore()
+        self.sub_events = []
+        self.pool_time = defaultdict(lambda: defaultdict(float))
+        self.in_pool = {'Home': set(), 'Away': set()}
+
+        self.quarter = 1
+        self.last_time = quarter_length
+        self.event_count = 0
+        self._stint_start = {}
+
+    # ------------ Reducer ------------
+
+    def _advance(self, quarter, time_remaining):
+        if quarter != self.quarter:
+            # Quarter changed (Q ^ also wraps 4 back to 1): estimate that whoever was in the
+            # pool played it out; restore() replaces the estimate with the stored pool time
+            for pid, start in self._stint_start.items():
+                self.pool_time[pid][self.quarter] += start
+                self._stint_start[pid] = self.quarter_length
+            self.quarter = quarter
+        self.last_time = time_remaining
+
+    def apply_event(self, player_id, event_type, quarter, time_remaining):
+        self._advance(quarter, time_remaining)
+        self.event_count += 1
+        self.stats[player_id][event_type] += 1
+
+        if event_type == 'Goal':
+            team = TEAM_OF_ID.get(player_id)
+            if team == 'Home':
+                self.home_score += 1
+            elif team == 'Away':
+                self.away_score += 1
+
+        if event_type in CRITICAL_EVENTS:
+            self.critical_events.add(
+                quarter, time_remaining, intern_player(player_id), event_type,
+                format_game_time(time_remaining)
+            )
+
+    def apply_sub(self, player_id, action, quarter, time_remaining, timestamp=None):
+        self._advance(quarter, time_remaining)
+        self.sub_events.append(
+            SubEvent(intern_player(player_id), quarter, time_remaining, action, timestamp)
+        )
+        team = TEAM_OF_ID.get(player_id, 'Away')
+        if action == 'IN':
+            if player_id not in self._stint_start:
+                self._stint_start[player_id] = time_remaining
+                self.in_pool[team].add(player_id)
+        elif action == 'OUT':
+            start = self._stint_start.pop(player_id, None)
+            if start is not None:
+                self.pool_time[player_id][quarter] += max(0.0, start - time_remaining)
+                self.in_pool[team].discard(player_id)
+
+    def finish(self, time_remaining=None):
+        """Close open stints at time_remaining (default: the last time seen) without ending them."""
+        until = self.last_time if time_remaining is None else time_remaining
+        for pid, start in self._stint_start.items():
+            self.pool_time[pid][self.quarter] += max(0.0, start - until)
+            self._stint_start[pid] = until
+        self.last_time = until
+        return self
+
+    def restore(self, conn):
+        """
+        Pool time from player_pool_time (every second the live clock counted) and the quarter
+        and game clock last stored for the match; open stints carry on from that clock.
+        Matches without stored rows (e.g. merged from an older database) keep the estimates.
+        """
+        pool_time = defaultdict(lambda: defaultdict(float))
+        for pid, quarter, seconds in conn.execute(
+            "SELECT player_id, quarter, COALESCE(pool_seconds, 0) FROM player_pool_time "
+            "WHERE match_id=?", (self.match_id,)
+        ):
+            pool_time[pid][quarter] = seconds
+        if pool_time:
+            self.pool_time = pool_time
+        row = conn.execute(
+            "SELECT clock_quarter, clock_remaining FROM matches WHERE match_id=?", (self.match_id,)
+        ).fetchone()
+        if row and row[0] is not None:
+            self.quarter, self.last_time = row[0], row[1]
+            for pid in self._stint_start:
+                self._stint_start[pid] = self.last_time
+        return self
+
+    @property
+    def score(self):
+        return f"{self.home_score}-{self.away_score}"
+
+
+def stream_match_rows(conn, match_id):
+    """
+    Yield (timestamp, kind, row_id, player_id, event_or_action, quarter, time_remaining) in time order.
+    SQLite does the merge; rows are pulled lazily from the cursor.
+    Substitutions sort before events at the same instant.
+    """
+    return conn.execute(f"""
+        SELECT COALESCE(timestamp, 0), {_SUB}, rowid, player_id, action, quarter, time_remaining
+        FROM match_substitutions WHERE match_id=?
+        UNION ALL
+        SELECT COALESCE(timestamp, 0), {_EVENT}, event_id, player_id, event_type, quarter, time_remaining
+        FROM events WHERE match_id=? AND voided = 0
+        ORDER BY 1, 2, 3
+    """, (match_id, match_id))
+
+
+def replay_match(conn, match_id, quarter_length=QUARTER_LENGTH, until=None):
+    """
+    Rebuild a match's state in one pass over its events and substitutions.
+    Without until, pool time and the clock are then restored from the stored match.
+    """
+    state = MatchState(match_id, quarter_length)
+    apply_event = state.apply_event
+    apply_sub = state.apply_sub
+    for ts, kind, _, pid, what, quarter, remaining in stream_match_rows(conn, match_id):
+        if kind == _EVENT:
+            apply_event(pid, what, quarter, remaining)
+        else:
+            apply_sub(pid, what, quarter, remaining, ts)
+    state.finish(until)
+    return state if until is not None else state.restore(conn)
+
+
+def diff_live_state(state, stats, home_score, away_score):
+    """Compare replayed state against live counters; returns human-readable mismatches."""
+    problems = []
+    if (state.home_score, state.away_score) != (home_score, away_score):
+        problems.append(f"score: replay {state.score} vs live {home_score}-{away_score}")
+    for pid in set(state.stats) | set(stats):
+        replayed = {k: v for k, v in state.stats.get(pid, {}).items() if v}
+        live = {k: v for k, v in stats.get(pid, {}).items() if v}
+        if replayed != live:
+            problems.append(f"{pid}: replay {replayed} vs live {live}")
+    return problems
@@ -0,0 +1,120 @@
+"""
+Versioned cache of the per-match counts behind the match report and player breakdown.
+
+An entry is the (player, event type) counts of one match, tagged with the version it was
+built at: the match's highest event_id, substitution rowid and event_journal id (undo / redo
+change a row's voided flag without adding events).
+- Same version: the cached counts are returned after one indexed version query.
+- Not cached: the event counts are read from match_player_event_counts (kept by triggers,
+  one row per player and event type), so a cold report costs the same at any match length.
+- Newer version: only rows above the cached high-water marks are read and folded in;
+  journal rows adjust events counted earlier (-1 for undo, +1 for redo).
+- Least recently used matches are evicted beyond capacity.
+Nothing needs to invalidate an entry: undo, redo and void each append a journal row, and
+merged matches arrive under new match ids, so every change shows up in the version.
+"""
+from collections import OrderedDict, defaultdict
+
+VERSION_SQL = """
+    SELECT (SELECT COALESCE(MAX(event_id), 0) FROM events WHERE match_id = :m),
+           (SELECT COALESCE(MAX(rowid), 0) FROM match_substitutions WHERE match_id = :m),
+           (SELECT COALESCE(MAX(journal_id), 0) FROM event_journal WHERE match_id = :m)
+"""
+
+
+class MatchCounts:
+    """Live (non-voided) event counts of one match as of version (event, sub, journal ids)."""
+    __slots__ = ('match_id', 'version', 'counts')
+
+    def __init__(self, match_id):
+        self.match_id = match_id
+        self.version = (0, 0, 0)
+        self.counts = {}    # (player_id, event_type) -> count
+
+    def add(self, player_id, event_type, delta):
+        key = (player_id, event_type)
+        count = self.counts.get(key, 0) + delta
+        if count:
+            self.counts[key] = count
+        else:
+            # Gone entirely after an undo, as the counts table drops the row
+            self.counts.pop(key, None)
+
+    def by_player(self, exclude=('GAME', None)):
+        per_player = defaultdict(dict)
+        for (pid, ev), count in self.counts.items():
+            if pid not in exclude:
+                per_player[pid][ev] = count
+        return per_player
+
+
+class ReportCache:
+    """LRU of MatchCounts across matches; get() brings the entry up to date first."""
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+        # Counters, read by benchmarks / diagnostics
+        self.hits = 0
+        self.folds = 0
+        self.loads = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, conn, match_id):
+        # One read transaction: the version and the rows folded in come from the same snapshot
+        own_txn = not conn.in_transaction
+        if own_txn:
+            conn.execute("BEGIN")
+        try:
+            version = tuple(conn.execute(VERSION_SQL, {'m': match_id}).fetchone())
+            entry = self._entries.get(match_id)
+            if entry is None:
+                entry = self._load(conn, match_id, version)
+                self.loads += 1
+            elif entry.version != version:
+                self._fold(conn, entry, version)
+                self.folds += 1
+            else:
+                self.hits += 1
+        finally:
+            if own_txn:
+                conn.commit()
+
+        self._entries[match_id] = entry
+        self._entries.move_to_end(match_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _load(self, conn, match_id, version):
+        entry = MatchCounts(match_id)
+        # In the same snapshot as version, so the counts are exactly those of the version
+        for pid, ev, count in conn.execute("""
+            SELECT player_id, event_type, count FROM match_player_event_counts
+            WHERE match_id = ?
+        """, (match_id,)):
+            entry.counts[(pid or None, ev)] = count
+        entry.version = version
+        return entry
+
+    def _fold(self, conn, entry, version):
+        match_id = entry.match_id
+        events_hw, _, journal_hw = entry.version
+        # New rows are counted as they are now (already voided ones are skipped) ...
+        for pid, ev in conn.execute("""
+            SELECT player_id, event_type FROM events
+            WHERE match_id = ? AND event_id > ? AND event_id <= ? AND voided = 0
+        """, (match_id, events_hw, version[0])):
+            entry.add(pid, ev, 1)
+        # ... so undo / redo only adjust events that were counted before this fold
+        for action, pid, ev in conn.execute("""
+            SELECT j.action, e.player_id, e.event_type
+            FROM event_journal j JOIN events e ON e.event_id = j.event_id
+            WHERE j.match_id = ? AND j.journal_id > ? AND j.journal_id <= ? AND j.event_id <= ?
+            ORDER BY j.journal_id
+        """, (match_id, journal_hw, version[2], events_hw)):
+            entry.add(pid, ev, -1 if action == 'undo' else 1)
+        entry.version = version
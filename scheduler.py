@@ -0,0 +1,54 @@
+class ClockScheduler:
+    """
+    The one periodic ticker behind every match clock.
+    - start() schedules the callback unless it is already scheduled and returns the run's
+      token; stop(token) cancels it, ignoring tokens of earlier runs.
+    - Every scheduled call carries its run's token, so a call from a cancelled run (however
+      quickly Pause -> Go was pressed) does nothing and never reaches the callback.
+    - The callback returning False stops the run, like a Kivy interval.
+    clock is anything with schedule_interval(fn, interval) -> event.cancel(); Kivy's Clock
+    by default.
+    """
+
+    def __init__(self, callback, interval=0.1, clock=None):
+        if clock is None:
+            from kivy.clock import Clock as clock
+        self.callback = callback
+        self.interval = interval
+        self.clock = clock
+        self.token = 0
+        self._event = None
+
+        # Counters, read by the stress test
+        self.runs = 0
+        self.stale_calls = 0
+
+    @property
+    def running(self):
+        return self._event is not None
+
+    def start(self):
+        if self._event is None:
+            self.token += 1
+            token = self.token
+            self._event = self.clock.schedule_interval(
+                lambda dt: self._tick(token, dt), self.interval
+            )
+            self.runs += 1
+        return self.token
+
+    def stop(self, token=None):
+        if self._event is None or (token is not None and token != self.token):
+            return False
+        self._event.cancel()
+        self._event = None
+        return True
+
+    def _tick(self, token, dt):
+        if token != self.token or self._event is None:
+            self.stale_calls += 1
+            return False
+        if self.callback(dt) is False:
+            self._event = None
+            return False
+        return None
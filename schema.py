@@ -0,0 +1,330 @@
+"""
+SQLite schema and migrations for waterpolo.db.
+
+Each migration is (version, description, sql). migrate() applies only the ones newer than
+the version recorded in schema_version, each in its own transaction, so a database that is
+already current costs one SELECT at startup.
+"""
+import time
+
+from timeline import GAME_TIME_SQL
+
+# Live (non-voided) events per (match, player, event type); '' stands for a missing player
+EVENT_COUNTS_BACKFILL_SQL = """
+    INSERT INTO match_player_event_counts (match_id, player_id, event_type, count)
+    SELECT match_id, COALESCE(player_id, ''), COALESCE(event_type, ''), COUNT(*)
+    FROM events
+    WHERE voided = 0 AND match_id IS NOT NULL
+    GROUP BY 1, 2, 3
+"""
+
+# The same counts split by quarter, for the season metric sheets (metrics.py); keyed by
+# event type and player first so season totals group along the primary key without a sort
+QUARTER_COUNTS_BACKFILL_SQL = """
+    INSERT INTO match_player_quarter_counts (match_id, player_id, event_type, quarter, count)
+    SELECT match_id, COALESCE(player_id, ''), COALESCE(event_type, ''), COALESCE(quarter, 0),
+           COUNT(*)
+    FROM events
+    WHERE voided = 0 AND match_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+"""
+
+MIGRATIONS = [
+    (1, "base tables", '''
+        CREATE TABLE IF NOT EXISTS matches (
+            match_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_code TEXT UNIQUE,
+            date TEXT, home_team TEXT, away_team TEXT, final_score TEXT
+        );
+        CREATE TABLE IF NOT EXISTS players (
+            player_id TEXT PRIMARY KEY,
+            number INTEGER,
+            name TEXT,
+            team TEXT
+        );
+        CREATE TABLE IF NOT EXISTS events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER, match_code TEXT,
+            player_id TEXT, event_type TEXT,
+            quarter INTEGER, time_remaining REAL,
+            timestamp REAL, possession_team TEXT, ball_holder TEXT
+        );
+        CREATE TABLE IF NOT EXISTS player_possession (
+            match_id INTEGER,
+            player_id TEXT,
+            quarter INTEGER,
+            possession_seconds REAL,
+            PRIMARY KEY (match_id, player_id, quarter)
+        );
+        CREATE TABLE IF NOT EXISTS player_pool_time (
+            match_id INTEGER,
+            player_id TEXT,
+            quarter INTEGER,
+            pool_seconds REAL,
+            substitutions INTEGER DEFAULT 0,
+            PRIMARY KEY (match_id, player_id, quarter)
+        );
+        CREATE TABLE IF NOT EXISTS match_substitutions (
+            match_id INTEGER,
+            player_id TEXT,
+            quarter INTEGER,
+            time_remaining REAL,
+            action TEXT,
+            timestamp REAL
+        );
+    '''),
+    (2, "match_id indexes for reports", '''
+        CREATE INDEX IF NOT EXISTS idx_events_match_player_type
+            ON events (match_id, player_id, event_type);
+        CREATE INDEX IF NOT EXISTS idx_events_match_time
+            ON events (match_id, quarter, time_remaining);
+        CREATE INDEX IF NOT EXISTS idx_subs_match_player_quarter
+            ON match_substitutions (match_id, player_id, quarter);
+    '''),
+    (3, "season summary tables", '''
+        CREATE TABLE IF NOT EXISTS season_player_summary (
+            match_id INTEGER,
+            player_id TEXT,
+            team_side TEXT,
+            goals INTEGER DEFAULT 0,
+            shots INTEGER DEFAULT 0,
+            pen_won INTEGER DEFAULT 0,
+            excl_won INTEGER DEFAULT 0,
+            excl_lost INTEGER DEFAULT 0,
+            pen_lost INTEGER DEFAULT 0,
+            saves INTEGER DEFAULT 0,
+            blocks INTEGER DEFAULT 0,
+            events INTEGER DEFAULT 0,
+            pool_seconds REAL DEFAULT 0,
+            PRIMARY KEY (match_id, player_id)
+        );
+        CREATE TABLE IF NOT EXISTS season_team_summary (
+            match_id INTEGER,
+            side TEXT,
+            team_name TEXT,
+            goals_for INTEGER DEFAULT 0,
+            goals_against INTEGER DEFAULT 0,
+            shots INTEGER DEFAULT 0,
+            excl_won INTEGER DEFAULT 0,
+            excl_lost INTEGER DEFAULT 0,
+            saves INTEGER DEFAULT 0,
+            PRIMARY KEY (match_id, side)
+        );
+        CREATE INDEX IF NOT EXISTS idx_season_team_name
+            ON season_team_summary (team_name);
+        CREATE TABLE IF NOT EXISTS season_match_state (
+            match_id INTEGER PRIMARY KEY,
+            pool_seconds REAL DEFAULT 0,
+            dirty INTEGER DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS season_refresh_marks (
+            name TEXT PRIMARY KEY,
+            value INTEGER
+        );
+    '''),
+    (4, "event tombstones and undo journal", '''
+        ALTER TABLE events ADD COLUMN voided INTEGER NOT NULL DEFAULT 0;
+        DROP INDEX IF EXISTS idx_events_match_player_type;
+        CREATE INDEX IF NOT EXISTS idx_events_match_voided_player_type
+            ON events (match_id, voided, player_id, event_type);
+        CREATE TABLE IF NOT EXISTS event_journal (
+            journal_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER,
+            event_id INTEGER,
+            action TEXT,
+            timestamp REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_event_journal_match
+            ON event_journal (match_id, journal_id);
+    '''),
+    (5, "game-clock timeline index", f'''
+        CREATE INDEX IF NOT EXISTS idx_events_match_game_time
+            ON events (match_id, {GAME_TIME_SQL});
+    '''),
+    (6, "report cache version indexes", '''
+        CREATE INDEX IF NOT EXISTS idx_events_match_event
+            ON events (match_id, event_id);
+        CREATE INDEX IF NOT EXISTS idx_subs_match
+            ON match_substitutions (match_id);
+    '''),
+    (7, "trigger-maintained per-match event counts", '''
+        CREATE TABLE IF NOT EXISTS match_player_event_counts (
+            match_id INTEGER NOT NULL,
+            player_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (match_id, player_id, event_type)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_events_count_insert
+        AFTER INSERT ON events
+        WHEN NEW.voided = 0 AND NEW.match_id IS NOT NULL
+        BEGIN
+            INSERT INTO match_player_event_counts (match_id, player_id, event_type, count)
+            VALUES (NEW.match_id, COALESCE(NEW.player_id, ''), COALESCE(NEW.event_type, ''), 1)
+            ON CONFLICT(match_id, player_id, event_type) DO UPDATE SET count = count + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_events_count_delete
+        AFTER DELETE ON events
+        WHEN OLD.voided = 0 AND OLD.match_id IS NOT NULL
+        BEGIN
+            UPDATE match_player_event_counts SET count = count - 1
+            WHERE match_id = OLD.match_id AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '');
+            DELETE FROM match_player_event_counts
+            WHERE match_id = OLD.match_id AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '') AND count <= 0;
+        END;
+
+        -- Undo / redo flip voided; a corrected player or event type moves the count
+        CREATE TRIGGER IF NOT EXISTS trg_events_count_update
+        AFTER UPDATE OF match_id, player_id, event_type, voided ON events
+        BEGIN
+            UPDATE match_player_event_counts SET count = count - 1
+            WHERE OLD.voided = 0 AND match_id = OLD.match_id
+              AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '');
+            DELETE FROM match_player_event_counts
+            WHERE match_id = OLD.match_id AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '') AND count <= 0;
+            INSERT INTO match_player_event_counts (match_id, player_id, event_type, count)
+            SELECT NEW.match_id, COALESCE(NEW.player_id, ''), COALESCE(NEW.event_type, ''), 1
+            WHERE NEW.voided = 0 AND NEW.match_id IS NOT NULL
+            ON CONFLICT(match_id, player_id, event_type) DO UPDATE SET count = count + 1;
+        END;
+    ''' + EVENT_COUNTS_BACKFILL_SQL + ";"),
+    (8, "ball transfers", '''
+        CREATE TABLE IF NOT EXISTS ball_transfers (
+            transfer_id INTEGER PRIMARY KEY,
+            match_id INTEGER,
+            quarter INTEGER,
+            time_remaining REAL,
+            player_id TEXT,
+            timestamp REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ball_transfers_match_time
+            ON ball_transfers (match_id, timestamp);
+    '''),
+    (9, "trigger-maintained per-quarter event counts", '''
+        CREATE TABLE IF NOT EXISTS match_player_quarter_counts (
+            match_id INTEGER NOT NULL,
+            player_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            quarter INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (event_type, player_id, quarter, match_id)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_events_quarter_count_insert
+        AFTER INSERT ON events
+        WHEN NEW.voided = 0 AND NEW.match_id IS NOT NULL
+        BEGIN
+            INSERT INTO match_player_quarter_counts
+                (match_id, player_id, event_type, quarter, count)
+            VALUES (NEW.match_id, COALESCE(NEW.player_id, ''), COALESCE(NEW.event_type, ''),
+                    COALESCE(NEW.quarter, 0), 1)
+            ON CONFLICT(event_type, player_id, quarter, match_id) DO UPDATE SET count = count + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_events_quarter_count_delete
+        AFTER DELETE ON events
+        WHEN OLD.voided = 0 AND OLD.match_id IS NOT NULL
+        BEGIN
+            UPDATE match_player_quarter_counts SET count = count - 1
+            WHERE match_id = OLD.match_id AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '') AND quarter = COALESCE(OLD.quarter, 0);
+            DELETE FROM match_player_quarter_counts
+            WHERE match_id = OLD.match_id AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '') AND quarter = COALESCE(OLD.quarter, 0)
+              AND count <= 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_events_quarter_count_update
+        AFTER UPDATE OF match_id, player_id, event_type, quarter, voided ON events
+        BEGIN
+            UPDATE match_player_quarter_counts SET count = count - 1
+            WHERE OLD.voided = 0 AND match_id = OLD.match_id
+              AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '') AND quarter = COALESCE(OLD.quarter, 0);
+            DELETE FROM match_player_quarter_counts
+            WHERE match_id = OLD.match_id AND player_id = COALESCE(OLD.player_id, '')
+              AND event_type = COALESCE(OLD.event_type, '') AND quarter = COALESCE(OLD.quarter, 0)
+              AND count <= 0;
+            INSERT INTO match_player_quarter_counts
+                (match_id, player_id, event_type, quarter, count)
+            SELECT NEW.match_id, COALESCE(NEW.player_id, ''), COALESCE(NEW.event_type, ''),
+                   COALESCE(NEW.quarter, 0), 1
+            WHERE NEW.voided = 0 AND NEW.match_id IS NOT NULL
+            ON CONFLICT(event_type, player_id, quarter, match_id) DO UPDATE SET count = count + 1;
+        END;
+    ''' + QUARTER_COUNTS_BACKFILL_SQL + ";"),
+    (10, "stored game clock per match", '''
+        ALTER TABLE matches ADD COLUMN clock_quarter INTEGER;
+        ALTER TABLE matches ADD COLUMN clock_remaining REAL;
+    '''),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def configure_connection(conn, cache_kib=8192):
+    """
+    Connection pragmas:
+    - WAL so readers never block the writer and commits append instead of rewriting pages.
+    - synchronous=NORMAL: in WAL mode this only fsyncs at checkpoints, still crash-safe.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{int(cache_kib)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def current_version(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description TEXT, applied_at REAL)"
+    )
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Bring the database up to the newest migration. Returns the versions applied."""
+    version = current_version(conn)
+    conn.commit()
+    applied = []
+    for mig_version, description, sql in migrations:
+        if mig_version <= version:
+            continue
+        desc = description.replace("'", "''")
+        try:
+            conn.executescript(
+                "BEGIN;\n" + sql + "\n"
+                f"INSERT INTO schema_version (version, description, applied_at) "
+                f"VALUES ({int(mig_version)}, '{desc}', {time.time()!r});\n"
+                "COMMIT;"
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(mig_version)
+    return applied
+
+
+def backfill_event_counts(conn, match_id=None):
+    """
+    Rebuild match_player_event_counts and match_player_quarter_counts from events (all
+    matches, or one), e.g. for a database whose events were written with the triggers
+    dropped. Migrations 7 and 9 run the same backfills. The caller commits.
+    """
+    for table, sql in (("match_player_event_counts", EVENT_COUNTS_BACKFILL_SQL),
+                       ("match_player_quarter_counts", QUARTER_COUNTS_BACKFILL_SQL)):
+        if match_id is None:
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(sql)
+        else:
+            conn.execute(f"DELETE FROM {table} WHERE match_id = ?", (match_id,))
+            conn.execute(
+                sql.replace("WHERE voided = 0", "WHERE voided = 0 AND match_id = ?"), (match_id,)
+            )
@@ -0,0 +1,269 @@
+"""
+Season analytics over every match in the database.
+
+Per-match, per-player and per-team rows are kept in season_player_summary /
+season_team_summary. refresh() only recomputes matches that are new or changed since the
+last refresh, so season queries aggregate a few rows per match instead of every event.
+A match is considered changed when:
+- it has events or substitutions with ids above the last refresh's high-water marks,
+- its total pool time differs from what was summarised.
+Undo / redo of a single event adjusts the summary rows in place (apply_event_delta()).
+Recomputing a match reads its match_player_event_counts rows (kept by triggers on events),
+one per player and event type, instead of aggregating its events.
+"""
+
+PLAYER_COUNTS_SQL = """
+    INSERT INTO season_player_summary
+    (match_id, player_id, team_side, goals, shots, pen_won, excl_won,
+     excl_lost, pen_lost, saves, blocks, events)
+    SELECT match_id, player_id,
+           CASE WHEN player_id LIKE 'H-%' THEN 'Home' ELSE 'Away' END,
+           SUM((event_type = 'Goal') * count), SUM((event_type = 'Shot') * count),
+           SUM((event_type = 'Pen.Win') * count), SUM((event_type = 'Excl.Win') * count),
+           SUM((event_type = 'E.Lost') * count), SUM((event_type = 'P.Lost') * count),
+           SUM((event_type = 'Save') * count), SUM((event_type = 'Block') * count),
+           SUM(count)
+    FROM match_player_event_counts
+    WHERE match_id = ? AND player_id != '' AND player_id != 'GAME'
+    GROUP BY player_id
+"""
+
+PLAYER_POOL_SQL = """
+    INSERT INTO season_player_summary (match_id, player_id, team_side, pool_seconds)
+    SELECT match_id, player_id,
+           CASE WHEN player_id LIKE 'H-%' THEN 'Home' ELSE 'Away' END,
+           SUM(COALESCE(pool_seconds, 0))
+    FROM player_pool_time
+    WHERE match_id = ?
+    GROUP BY player_id
+    ON CONFLICT(match_id, player_id) DO UPDATE SET pool_seconds = excluded.pool_seconds
+"""
+
+TEAM_SIDES_SQL = """
+    INSERT INTO season_team_summary (match_id, side, team_name)
+    SELECT match_id, 'Home', COALESCE(home_team, 'Home') FROM matches WHERE match_id = ?
+    UNION ALL
+    SELECT match_id, 'Away', COALESCE(away_team, 'Away') FROM matches WHERE match_id = ?
+"""
+
+TEAM_TOTALS_SQL = """
+    UPDATE season_team_summary SET
+        goals_for = (SELECT COALESCE(SUM(goals), 0) FROM season_player_summary p
+                     WHERE p.match_id = season_team_summary.match_id
+                       AND p.team_side = season_team_summary.side),
+        goals_against = (SELECT COALESCE(SUM(goals), 0) FROM season_player_summary p
+                         WHERE p.match_id = season_team_summary.match_id
+                           AND p.team_side != season_team_summary.side),
+        shots = (SELECT COALESCE(SUM(goals + shots), 0) FROM season_player_summary p
+                 WHERE p.match_id = season_team_summary.match_id
+                   AND p.team_side = season_team_summary.side),
+        excl_won = (SELECT COALESCE(SUM(excl_won), 0) FROM season_player_summary p
+                    WHERE p.match_id = season_team_summary.match_id
+                      AND p.team_side = season_team_summary.side),
+        excl_lost = (SELECT COALESCE(SUM(excl_lost), 0) FROM season_player_summary p
+                     WHERE p.match_id = season_team_summary.match_id
+                       AND p.team_side = season_team_summary.side),
+        saves = (SELECT COALESCE(SUM(saves), 0) FROM season_player_summary p
+                 WHERE p.match_id = season_team_summary.match_id
+                   AND p.team_side = season_team_summary.side)
+    WHERE match_id = ?
+"""
+
+
+# event_type -> season_player_summary column
+PLAYER_COLUMNS = {
+    'Goal': 'goals', 'Shot': 'shots', 'Pen.Win': 'pen_won', 'Excl.Win': 'excl_won',
+    'E.Lost': 'excl_lost', 'P.Lost': 'pen_lost', 'Save': 'saves', 'Block': 'blocks',
+}
+
+# event_type -> [(season_team_summary column, True for the player's own side)]
+TEAM_COLUMNS = {
+    'Goal': [('goals_for', True), ('goals_against', False), ('shots', True)],
+    'Shot': [('shots', True)],
+    'Excl.Win': [('excl_won', True)],
+    'E.Lost': [('excl_lost', True)],
+    'Save': [('saves', True)],
+}
+
+
+def conversion(goals, attempts):
+    return goals / attempts if attempts else 0.0
+
+
+class SeasonAnalytics:
+    """
+    Season-level player and team numbers.
+    - refresh(): bring the summary tables up to date; returns the match ids recomputed.
+      Run it as a db command: the writer owns the transaction and commits.
+    - player_season() / team_season(): season rows as dicts, read from the summaries only.
+    Shot conversion is goals / (goals + shots), as a goal is logged instead of a shot.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    # ------------ Refresh ------------
+
+    def _mark(self, name):
+        row = self.conn.execute(
+            "SELECT value FROM season_refresh_marks WHERE name=?", (name,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def apply_event_delta(self, match_id, event_id, player_id, event_type, delta):
+        """
+        Add delta (+1 / -1) for one event to the summary rows, without re-aggregating.
+        Events above the last refresh's high-water mark are not summarised yet; the next
+        refresh() recomputes their match anyway. The caller commits.
+        """
+        if player_id is None or player_id == 'GAME' or event_id > self._mark('events'):
+            return
+        side = 'Home' if player_id.startswith('H-') else 'Away'
+        column = PLAYER_COLUMNS.get(event_type)
+        columns, params, sets = "events", [delta], ["events = events + excluded.events"]
+        if column:
+            columns += ", " + column
+            params.append(delta)
+            sets.append(f"{column} = {column} + excluded.{column}")
+        self.conn.execute(f"""
+            INSERT INTO season_player_summary (match_id, player_id, team_side, {columns})
+            VALUES (?, ?, ?{', ?' * len(params)})
+            ON CONFLICT(match_id, player_id) DO UPDATE SET {', '.join(sets)}
+        """, [match_id, player_id, side] + params)
+        # A player whose only event was undone no longer played in the match
+        self.conn.execute("""
+            DELETE FROM season_player_summary
+            WHERE match_id = ? AND player_id = ? AND events <= 0 AND COALESCE(pool_seconds, 0) = 0
+        """, (match_id, player_id))
+        other = 'Away' if side == 'Home' else 'Home'
+        for team_column, own in TEAM_COLUMNS.get(event_type, ()):
+            self.conn.execute(
+                f"UPDATE season_team_summary SET {team_column} = {team_column} + ? "
+                f"WHERE match_id = ? AND side = ?",
+                (delta, match_id, side if own else other)
+            )
+
+    def changed_matches(self):
+        events_mark = self._mark('events')
+        subs_mark = self._mark('subs')
+        rows = self.conn.execute("""
+            SELECT match_id FROM events WHERE event_id > ?
+            UNION
+            SELECT match_id FROM match_substitutions WHERE rowid > ?
+            UNION
+            SELECT m.match_id FROM matches m
+            LEFT JOIN season_match_state s ON s.match_id = m.match_id
+            WHERE s.match_id IS NULL
+            UNION
+            SELECT p.match_id FROM (
+                SELECT match_id, SUM(COALESCE(pool_seconds, 0)) AS secs
+                FROM player_pool_time GROUP BY match_id
+            ) p
+            LEFT JOIN season_match_state s ON s.match_id = p.match_id
+            WHERE s.match_id IS NULL OR ABS(s.pool_seconds - p.secs) > 0.001
+        """, (events_mark, subs_mark)).fetchall()
+        return sorted(r[0] for r in rows if r[0] is not None)
+
+    def refresh(self):
+        # High-water marks are read before the scan so rows landing meanwhile are seen next time
+        events_hw = self.conn.execute("SELECT COALESCE(MAX(event_id), 0) FROM events").fetchone()[0]
+        subs_hw = self.conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0) FROM match_substitutions"
+        ).fetchone()[0]
+        changed = self.changed_matches()
+
+        cur = self.conn.cursor()
+        for match_id in changed:
+            cur.execute("DELETE FROM season_player_summary WHERE match_id=?", (match_id,))
+            cur.execute("DELETE FROM season_team_summary WHERE match_id=?", (match_id,))
+            cur.execute(PLAYER_COUNTS_SQL, (match_id,))
+            cur.execute(PLAYER_POOL_SQL, (match_id,))
+            cur.execute(TEAM_SIDES_SQL, (match_id, match_id))
+            cur.execute(TEAM_TOTALS_SQL, (match_id,))
+            # season_match_state.dirty (migration 3) is left unused: nothing flags a match
+            cur.execute("""
+                INSERT INTO season_match_state (match_id, pool_seconds)
+                SELECT ?, COALESCE(SUM(pool_seconds), 0)
+                FROM player_pool_time WHERE match_id = ?
+                ON CONFLICT(match_id) DO UPDATE SET pool_seconds = excluded.pool_seconds
+            """, (match_id, match_id))
+        cur.executemany(
+            "INSERT OR REPLACE INTO season_refresh_marks (name, value) VALUES (?, ?)",
+            [('events', events_hw), ('subs', subs_hw)]
+        )
+        return changed
+
+    # ------------ Queries ------------
+
+    def player_season(self, side=None):
+        sql = """
+            SELECT player_id, team_side, COUNT(DISTINCT match_id),
+                   SUM(goals), SUM(shots), SUM(pen_won), SUM(excl_won),
+                   SUM(excl_lost), SUM(pen_lost), SUM(saves), SUM(blocks),
+                   SUM(events), SUM(pool_seconds)
+            FROM season_player_summary
+        """
+        params = ()
+        if side:
+            sql += " WHERE team_side = ?"
+            params = (side,)
+        sql += " GROUP BY player_id ORDER BY SUM(goals) DESC, player_id"
+
+        rows = []
+        for (pid, team_side, matches, goals, shots, pen_won, excl_won,
+             excl_lost, pen_lost, saves, blocks, events, pool) in self.conn.execute(sql, params):
+            rows.append({
+                'player_id': pid, 'side': team_side, 'matches': matches,
+                'goals': goals, 'shots': shots,
+                'conversion': conversion(goals, goals + shots),
+                'pen_won': pen_won, 'excl_won': excl_won, 'excl_lost': excl_lost,
+                'pen_lost': pen_lost, 'saves': saves, 'blocks': blocks,
+                'events': events, 'minutes': (pool or 0.0) / 60.0,
+            })
+        return rows
+
+    def team_season(self):
+        rows = []
+        for (team, played, won, drawn, lost, gf, ga, shots,
+             excl_won, excl_lost, saves) in self.conn.execute("""
+            SELECT team_name, COUNT(*),
+                   SUM(goals_for > goals_against), SUM(goals_for = goals_against),
+                   SUM(goals_for < goals_against),
+                   SUM(goals_for), SUM(goals_against), SUM(shots),
+                   SUM(excl_won), SUM(excl_lost), SUM(saves)
+            FROM season_team_summary
+            GROUP BY team_name
+            ORDER BY SUM(goals_for > goals_against) DESC, SUM(goals_for) - SUM(goals_against) DESC
+        """):
+            rows.append({
+                'team': team, 'played': played, 'won': won, 'drawn': drawn, 'lost': lost,
+                'goals_for': gf, 'goals_against': ga,
+                'conversion': conversion(gf, shots),
+                'excl_won': excl_won, 'excl_lost': excl_lost,
+                'excl_diff': excl_won - excl_lost, 'saves': saves,
+            })
+        return rows
+
+    def report_lines(self, name_of=str, top_n=15):
+        lines = ["Teams (P W D L  GF-GA  Conv  Excl +/-):"]
+        teams = self.team_season()
+        for t in teams:
+            lines.append(
+                f"  {t['team'][:14]:14s} {t['played']} {t['won']} {t['drawn']} {t['lost']}  "
+                f"{t['goals_for']}-{t['goals_against']}  {t['conversion']:.0%}  {t['excl_diff']:+d}"
+            )
+        if not teams:
+            lines.append("  No matches yet.")
+
+        lines.append("")
+        lines.append("Players (M  G/Att  Conv  ExclW  Min):")
+        players = self.player_season()[:top_n]
+        for p in players:
+            lines.append(
+                f"  {name_of(p['player_id'])[:14]:14s} {p['matches']}  "
+                f"{p['goals']}/{p['goals'] + p['shots']}  {p['conversion']:.0%}  "
+                f"{p['excl_won']}  {p['minutes']:.0f}"
+            )
+        if not players:
+            lines.append("  No player events yet.")
+        return lines
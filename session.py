@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+from critical_store import CriticalEventStore
+from log_buffer import LogRing
+from match_clock import MatchClock
+from possession import SegmentBuilder
+from stats_table import StatsTable
+from sub_index import SubstitutionIndex
+from timeline import QUARTER_LENGTH, Timeline
+from undo import UndoJournal
+
+
+class MatchSession:
+    """
+    Everything that belongs to one match being scored: clock, counters, pool, logs.
+    - The controller keeps one session per open match and shows one of them (the active
+      session); switching is a pointer swap plus a display refresh.
+    - Sessions hold no threads or timers of their own: the controller's single scheduler
+      polls every running clock and the DB / log writers are shared.
+    - Each session has its own log pane lines (log_ring); lines scrolled out of the pane
+      are written, in order, to that match's messages log (match_<code>_messages.log), next
+      to the tab-separated event log, whichever match is on screen.
+    """
+
+    def __init__(self, db, name_of=str, match_id=None, match_code=None, log_capacity=200):
+        self.match_id = match_id
+        self.match_code = match_code
+        self.home_team = "Home"
+        self.away_team = "Away"
+        self.match_clock = MatchClock(quarter_length=QUARTER_LENGTH)
+
+        self.stats = defaultdict(lambda: defaultdict(int))
+        self.stats_table = StatsTable(name_of)
+        self.home_score = 0
+        self.away_score = 0
+        self.critical_events = CriticalEventStore()
+        self.timeline = Timeline()
+        self.undo_journal = UndoJournal(db)
+
+        self.current_quarter = 1
+        self.auto_paused = False
+        self.possession_team = "Home"
+        self.ball_holder = None
+        self.pending_defensive_event = None
+        self.possession_time = defaultdict(lambda: defaultdict(float))
+        # Possession chains: closed segments, the open one lives in the builder
+        self.possession_builder = SegmentBuilder()
+        self.possession_segments = []
+        self.possessions_stale = False
+
+        # Substitution / pool time
+        self.in_pool = {'Home': set(), 'Away': set()}
+        self.starting_lineup = {'Home': [], 'Away': []}
+        self.sub_events = []
+        self.sub_index = SubstitutionIndex()
+        self.pool_time = defaultdict(lambda: defaultdict(float))
+
+        self.match_log_path = None
+        self.match_log = None
+        self.message_log = None
+        self.log_ring = LogRing(log_capacity, on_spill=self._spill_log_lines)
+        self.last_display_second = None
+
+    @property
+    def label(self):
+        return f"{self.home_team} v {self.away_team}"
+
+    def _spill_log_lines(self, lines):
+        if self.message_log:
+            self.message_log.write("".join(f"{line}\n" for line in lines))
+
+    def flush_logs(self):
+        self.log_ring.flush_spill()
+        for log in (self.match_log, self.message_log):
+            if log:
+                log.flush()
+
+    def close_log(self):
+        self.log_ring.flush_spill()
+        if self.message_log:
+            # The lines still in the pane too, so the messages log holds the whole match
+            self._spill_log_lines(list(self.log_ring))
+            self.message_log.close()
+            self.message_log = None
+        if self.match_log:
+            self.match_log.close()
+            self.match_log = None
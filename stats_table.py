@@ -0,0 +1,86 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+
+class StatsTable:
+    """
+    Incrementally maintained player x event-type stats table.
+    - add() updates one counter, the player's total and the ranking (bisect on a sorted list).
+    - render() re-formats only rows whose counts changed; the whole table is only re-formatted
+      when a new event type adds a column or names change (invalidate()).
+    """
+
+    def __init__(self, name_of=str, top_n=10):
+        self.name_of = name_of
+        self.top_n = top_n
+        self._clear()
+
+    def _clear(self):
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self.totals = {}
+        self.columns = []
+        self._column_set = set()
+        self._ranking = []      # sorted (-total, first_seen, player_id)
+        self._first_seen = {}
+        self._row_cache = {}
+        self._dirty = set()
+        self._header = None
+
+    def add(self, player_id, event_type, delta=1):
+        if event_type not in self._column_set:
+            insort(self.columns, event_type)
+            self._column_set.add(event_type)
+            self.invalidate()
+
+        if player_id not in self._first_seen:
+            self._first_seen[player_id] = len(self._first_seen)
+            self.totals[player_id] = 0
+        else:
+            old = (-self.totals[player_id], self._first_seen[player_id], player_id)
+            del self._ranking[bisect_left(self._ranking, old)]
+
+        self.counts[player_id][event_type] += delta
+        self.totals[player_id] += delta
+        insort(self._ranking, (-self.totals[player_id], self._first_seen[player_id], player_id))
+        self._dirty.add(player_id)
+
+    def reset(self, stats=None):
+        """Start over, optionally loading an existing {player: {event: count}} mapping."""
+        self._clear()
+        for pid, events in (stats or {}).items():
+            for ev, count in events.items():
+                if count:
+                    self.add(pid, ev, count)
+
+    def invalidate(self):
+        self._header = None
+        self._row_cache.clear()
+        self._dirty.clear()
+
+    def top(self, n=None):
+        return [pid for _, _, pid in self._ranking[:n or self.top_n]]
+
+    def _format_row(self, pid):
+        ev = self.counts[pid]
+        row = [self.name_of(pid).ljust(12)]
+        for et in self.columns:
+            row.append(str(ev.get(et, 0)).ljust(5))
+        row.append(str(self.totals[pid]))
+        return " ".join(row)
+
+    def render(self):
+        if not self._ranking:
+            return ""
+        if self._header is None:
+            self._header = "Player".ljust(12) + " " + " ".join(et[:4].ljust(5) for et in self.columns) + " Total"
+        for pid in self._dirty:
+            self._row_cache.pop(pid, None)
+        self._dirty.clear()
+
+        lines = [self._header, "-" * len(self._header)]
+        for pid in self.top():
+            line = self._row_cache.get(pid)
+            if line is None:
+                line = self._row_cache[pid] = self._format_row(pid)
+            lines.append(line)
+        return "\n".join(lines)
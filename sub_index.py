@@ -0,0 +1,37 @@
+import heapq
+from collections import defaultdict
+
+
+class SubstitutionIndex:
+    """
+    Substitution lookups for the once-per-second possession display.
+    - count(player, quarter) is a dict lookup, maintained on record().
+    - top_pool_time() is a heap selection over the players' pool time, independent of how
+      many substitutions the match has had.
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+
+    def record(self, player_id, quarter):
+        self._counts[(player_id, quarter)] += 1
+
+    def reset(self, sub_events=()):
+        self._counts.clear()
+        for s in sub_events:
+            self.record(s.player_id, s.quarter)
+
+    def count(self, player_id, quarter):
+        return self._counts.get((player_id, quarter), 0)
+
+    def top_pool_time(self, pool_time, quarter, n=8):
+        """[(player_id, seconds, subs)] for the n players with most pool time in quarter, descending."""
+        rows = (
+            (pid, quarters[quarter])
+            for pid, quarters in pool_time.items()
+            if quarter in quarters
+        )
+        return [
+            (pid, secs, self.count(pid, quarter))
+            for pid, secs in heapq.nlargest(n, rows, key=lambda r: r[1])
+        ]
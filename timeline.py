@@ -0,0 +1,191 @@
+"""
+Game-clock timeline: events keyed by absolute match time.
+
+match time = seconds of play since the start of Q1, from (quarter, time_remaining), so
+"Q3 5:00 to 3:00" or "the 20 s before each E.Lost" are plain ranges on one number.
+- Timeline keeps one match in memory (the live one, or a stored one via load()); range()
+  is a bisect on a sorted array plus the k rows returned, and windows() finds its anchors
+  in a per-event-type sorted index instead of scanning the match.
+- query_range() / query_windows() answer the same questions for any stored match in SQL,
+  through the idx_events_match_game_time expression index (migration 5).
+The quarter length is fixed at QUARTER_LENGTH: the index expression is built from it, so
+stored and in-memory match times always agree.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+QUARTER_LENGTH = 480.0
+
+# The expression of idx_events_match_game_time (schema migration 5); queries must use it
+# verbatim for the index to be used
+GAME_TIME_SQL = f"((quarter - 1) * {QUARTER_LENGTH!r} + {QUARTER_LENGTH!r} - time_remaining)"
+
+
+def match_time(quarter, time_remaining, quarter_length=QUARTER_LENGTH):
+    return (quarter - 1) * quarter_length + quarter_length - time_remaining
+
+
+def parse_clock(text):
+    """'5:00' / '300' -> seconds remaining on the game clock."""
+    text = text.strip()
+    if ':' in text:
+        mins, secs = text.split(':', 1)
+        return int(mins or 0) * 60 + float(secs or 0)
+    return float(text)
+
+
+def quarter_span(quarter, from_clock=None, to_clock=None):
+    """
+    (start, end) match times for quarter between two game-clock readings, e.g. 5:00 -> 3:00.
+    The clock counts down, so from_clock is the larger; either end defaults to the quarter's.
+    """
+    high = QUARTER_LENGTH if from_clock is None else from_clock
+    low = 0.0 if to_clock is None else to_clock
+    if low > high:
+        high, low = low, high
+    return match_time(quarter, high), match_time(quarter, low)
+
+
+class TimelineEvent:
+    __slots__ = ('time', 'event_id', 'quarter', 'time_remaining', 'player_id', 'event_type')
+
+    def __init__(self, time, event_id, quarter, time_remaining, player_id, event_type):
+        self.time = time
+        self.event_id = event_id
+        self.quarter = quarter
+        self.time_remaining = time_remaining
+        self.player_id = player_id
+        self.event_type = event_type
+
+    def clock(self):
+        mins, secs = divmod(int(self.time_remaining), 60)
+        return f"{mins}:{secs:02d}"
+
+
+class Timeline:
+    """
+    One match's events sorted by match time.
+    - add() appends (insertion only when an event lands behind the last one, e.g. after a
+      clock correction); discard() removes an undone event.
+    - range(start, end) is O(log n + k); windows(event_type, before, after) is O(log n + k)
+      per anchor, the anchors coming from by_type (event_type -> sorted times and events).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.times = array('d')
+        self.events = []
+        self.by_type = {}
+
+    @staticmethod
+    def _insert(times, events, t, ev):
+        if not times or times[-1] <= t:
+            times.append(t)
+            events.append(ev)
+        else:
+            pos = bisect_right(times, t)
+            times.insert(pos, t)
+            events.insert(pos, ev)
+
+    @staticmethod
+    def _remove(times, events, t, event_id):
+        pos = bisect_left(times, t)
+        while pos < len(times) and times[pos] == t:
+            if events[pos].event_id == event_id:
+                del times[pos]
+                del events[pos]
+                return True
+            pos += 1
+        return False
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, event_id, quarter, time_remaining, player_id, event_type):
+        t = match_time(quarter, time_remaining)
+        ev = TimelineEvent(t, event_id, quarter, time_remaining, player_id, event_type)
+        self._insert(self.times, self.events, t, ev)
+        index = self.by_type.get(event_type)
+        if index is None:
+            index = self.by_type[event_type] = (array('d'), [])
+        self._insert(index[0], index[1], t, ev)
+        return ev
+
+    def discard(self, event_id, quarter, time_remaining):
+        t = match_time(quarter, time_remaining)
+        pos = bisect_left(self.times, t)
+        while pos < len(self.times) and self.times[pos] == t:
+            ev = self.events[pos]
+            if ev.event_id == event_id:
+                del self.times[pos]
+                del self.events[pos]
+                self._remove(*self.by_type[ev.event_type], t, event_id)
+                return True
+            pos += 1
+        return False
+
+    def range(self, start, end, event_types=None):
+        """Events with start <= match time <= end, in game order."""
+        lo = bisect_left(self.times, start)
+        hi = bisect_right(self.times, end)
+        rows = self.events[lo:hi]
+        if event_types:
+            rows = [e for e in rows if e.event_type in event_types]
+        return rows
+
+    def quarter_range(self, quarter, from_clock=None, to_clock=None, event_types=None):
+        start, end = quarter_span(quarter, from_clock, to_clock)
+        return self.range(start, end, event_types)
+
+    def windows(self, event_type, before=20.0, after=0.0):
+        """[(anchor, events in [anchor - before, anchor + after])] for every event_type event."""
+        _, anchors = self.by_type.get(event_type, (None, ()))
+        return [(anchor, self.range(anchor.time - before, anchor.time + after)) for anchor in anchors]
+
+    @classmethod
+    def load(cls, conn, match_id):
+        timeline = cls()
+        for event_id, quarter, remaining, pid, ev in conn.execute(f"""
+            SELECT event_id, quarter, time_remaining, player_id, event_type
+            FROM events WHERE match_id = ? AND voided = 0
+            ORDER BY {GAME_TIME_SQL}, event_id
+        """, (match_id,)):
+            timeline.add(event_id, quarter, remaining, pid, ev)
+        return timeline
+
+
+# ------------ Stored matches (SQL) ------------
+
+def query_range(conn, match_id, start, end, event_types=None):
+    """Same as Timeline.range() for a stored match, without loading it."""
+    sql = f"""
+        SELECT {GAME_TIME_SQL}, event_id, quarter, time_remaining, player_id, event_type
+        FROM events
+        WHERE match_id = ? AND {GAME_TIME_SQL} BETWEEN ? AND ? AND voided = 0
+    """
+    params = [match_id, start, end]
+    if event_types:
+        sql += f" AND event_type IN ({','.join('?' * len(event_types))})"
+        params += list(event_types)
+    sql += f" ORDER BY {GAME_TIME_SQL}, event_id"
+    return [TimelineEvent(*row) for row in conn.execute(sql, params)]
+
+
+def query_quarter_range(conn, match_id, quarter, from_clock=None, to_clock=None, event_types=None):
+    start, end = quarter_span(quarter, from_clock, to_clock)
+    return query_range(conn, match_id, start, end, event_types)
+
+
+def query_windows(conn, match_id, event_type, before=20.0, after=0.0):
+    """Same as Timeline.windows() for a stored match: one index range per anchor event."""
+    anchors = conn.execute(f"""
+        SELECT {GAME_TIME_SQL}, event_id, quarter, time_remaining, player_id, event_type
+        FROM events WHERE match_id = ? AND event_type = ? AND voided = 0
+        ORDER BY {GAME_TIME_SQL}, event_id
+    """, (match_id, event_type)).fetchall()
+    return [
+        (TimelineEvent(*a), query_range(conn, match_id, a[0] - before, a[0] + after))
+        for a in anchors
+    ]
@@ -0,0 +1,75 @@
+import time
+
+
+class JournalEntry:
+    """A logged event as the undo stack needs it: enough to apply or invert its deltas."""
+    __slots__ = ('match_id', 'event_id', 'player_id', 'event_type', 'quarter',
+                 'time_remaining', 'time_str')
+
+    def __init__(self, match_id, event_id, player_id, event_type, quarter, time_remaining, time_str):
+        self.match_id = match_id
+        self.event_id = event_id
+        self.player_id = player_id
+        self.event_type = event_type
+        self.quarter = quarter
+        self.time_remaining = time_remaining
+        self.time_str = time_str
+
+
+class UndoJournal:
+    """
+    Undo / redo of logged events without rewriting the match.
+    - undo() tombstones the event row (events.voided = 1) and appends an 'undo' row to
+      event_journal; redo() clears the tombstone and appends 'redo'. Rows are never deleted.
+    - Both return the JournalEntry so the caller can apply the inverse / forward deltas;
+      each is one indexed UPDATE plus one INSERT, whatever the match length.
+    - Logging a new event drops the redo stack, as in any editor.
+    conn is a connection (the caller commits) or a Database, whose writer thread commits.
+    """
+
+    def __init__(self, conn, limit=500):
+        self.conn = conn
+        self.limit = limit
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def clear(self):
+        del self.undo_stack[:]
+        del self.redo_stack[:]
+
+    def record(self, entry):
+        self.undo_stack.append(entry)
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+        del self.redo_stack[:]
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def _mark(self, entry, voided, action):
+        self.conn.execute(
+            "UPDATE events SET voided = ? WHERE event_id = ?", (voided, entry.event_id)
+        )
+        self.conn.execute(
+            "INSERT INTO event_journal (match_id, event_id, action, timestamp) VALUES (?, ?, ?, ?)",
+            (entry.match_id, entry.event_id, action, time.time())
+        )
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self._mark(entry, 1, 'undo')
+        self.redo_stack.append(entry)
+        return entry
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self._mark(entry, 0, 'redo')
+        self.undo_stack.append(entry)
+        return entry